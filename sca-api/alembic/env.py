@@ -46,11 +46,11 @@ config.set_section_option(section, "sqlalchemy.url",
 # 导入项目中的基本映射类，与 需要迁移的 ORM 模型
 # 导入所有模块的模型
 # data_center 模块
-from apps.data_center.models import SseMarket, SzseMarket, StockInfo, StockDaily, StockMinute, StockTick
+from apps.data_center.models import SseMarket, SzseMarket, StockInfo, StockDaily, StockMinute, StockTick, StockAdjustFactor
 # record 模块
 from apps.record.models import LoginRecord, SMSSendRecord
 # user 模块
-from apps.user.models import User, Role, Menu, Dept, auth_user_roles, auth_user_depts, auth_role_depts
+from apps.user.models import User, Role, Menu, Dept, auth_user_roles, auth_user_depts, auth_role_depts, auth_dept_closure
 # system 模块
 from apps.system.models.settings import SystemSettings, SystemSettingsTab
 from apps.system.models.dict import DictType, DictDetails
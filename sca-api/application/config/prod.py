@@ -64,3 +64,5 @@ ALIYUN_OSS = {
 """
 IP_PARSE_ENABLE = os.getenv("IP_PARSE_ENABLE", "False") == "True"
 IP_PARSE_TOKEN = os.getenv("IP_PARSE_TOKEN", "IP_PARSE_TOKEN")
+# 离线 IP 库文件路径，配置后不再请求在线查询服务，文件格式见 infra/utils/ip_manage.py:LocalIPProvider
+IP_PARSE_LOCAL_DB = os.getenv("IP_PARSE_LOCAL_DB", "")
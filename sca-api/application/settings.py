@@ -101,8 +101,8 @@ ALLOW_HEADERS = ["*"]
 全局事件配置
 """
 EVENTS = [
-    "tt.event.connect_mongo" if MONGO_DB_ENABLE else None,
-    "tt.event.connect_redis" if REDIS_DB_ENABLE else None,
+    "infra.core.event.connect_mongo" if MONGO_DB_ENABLE else None,
+    "infra.core.event.connect_redis" if REDIS_DB_ENABLE else None,
 ]
 
 """
@@ -112,6 +112,10 @@ EVENTS = [
 DEFAULT_PASSWORD = "0"
 # 默认头像
 DEFAULT_AVATAR = "https://vv-reserve.oss-cn-hangzhou.aliyuncs.com/avatar/2023-01-27/1674820804e81e7631.png"
+# 密码哈希 bcrypt 计算强度，调高后已有用户在下次登录时自动按新强度重新生成哈希
+PASSWORD_BCRYPT_ROUNDS = 12
+# 密码哈希线程池大小，建议不超过 CPU 核数
+PASSWORD_HASH_WORKERS = 4
 # 默认登陆时最大输入密码或验证码错误次数
 DEFAULT_AUTH_ERROR_MAX_NUMBER = 5
 # 是否开启保存登录日志
@@ -124,15 +128,24 @@ OPERATION_LOG_RECORD = True
 OPERATION_RECORD_METHOD = ["POST", "PUT", "DELETE"]
 # 忽略的操作接口函数名称，列表中的函数名称不会被记录到操作日志中
 IGNORE_OPERATION_FUNCTION = ["post_dicts_details"]
+# MongoDB 日志保留天数，超过后由 TTL 索引自动删除，0 表示永久保留
+RECORD_RETENTION_DAYS = {
+    "operation_record": 90,
+    "scheduler_task_record": 30,
+}
+# 日志每日汇总数据保留天数，0 表示永久保留
+RECORD_ROLLUP_RETENTION_DAYS = 365
+# 刷新当天日志汇总数据的间隔时间，单位：秒
+RECORD_ROLLUP_INTERVAL = 600
 
 """
 中间件配置
 """
 MIDDLEWARES = [
-    "tt.middleware.register_request_log_middleware" if REQUEST_LOG_RECORD else None,
-    "tt.middleware.register_operation_record_middleware" if OPERATION_LOG_RECORD and MONGO_DB_ENABLE else None,
-    "tt.middleware.register_demo_env_middleware" if DEMO else None,
-    "tt.middleware.register_jwt_refresh_middleware"
+    "infra.core.middleware.register_request_log_middleware" if REQUEST_LOG_RECORD else None,
+    "infra.core.middleware.register_operation_record_middleware" if OPERATION_LOG_RECORD and MONGO_DB_ENABLE else None,
+    "infra.core.middleware.register_demo_env_middleware" if DEMO else None,
+    "infra.core.middleware.register_jwt_refresh_middleware"
 ]
 
 """
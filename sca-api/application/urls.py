@@ -22,6 +22,7 @@ from apps.data_center.views.stock_info import app as data_center_stock_info_app
 from apps.data_center.views.stock_daily import app as data_center_stock_daily_app
 from apps.data_center.views.stock_minute import app as data_center_stock_minute_app
 from apps.data_center.views.stock_tick import app as data_center_stock_tick_app
+from apps.data_center.views.stock_analytics import app as data_center_stock_analytics_app
 
 from infra.swagger.docs import register_docs
 
@@ -59,3 +60,4 @@ app.include_router(data_center_stock_info_app, prefix="/data-center", tags=["数
 app.include_router(data_center_stock_daily_app, prefix="/data-center", tags=["数据中心-股票日线数据"])
 app.include_router(data_center_stock_minute_app, prefix="/data-center", tags=["数据中心-股票分钟数据"])
 app.include_router(data_center_stock_tick_app, prefix="/data-center", tags=["数据中心-股票分笔数据"])
+app.include_router(data_center_stock_analytics_app, prefix="/data-center", tags=["数据中心-股票横截面统计"])
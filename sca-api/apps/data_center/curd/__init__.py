@@ -3,3 +3,5 @@ from .stock_daily_dal import StockDailyDal
 from .stock_minute_dal import StockMinuteDal
 from .stock_tick_dal import StockTickDal
 from .stock_market_dal import SseMarketDal, SzseMarketDal
+from .stock_adjust_factor_dal import StockAdjustFactorDal
+from .stock_analytics_dal import StockAnalyticsDal
@@ -0,0 +1,145 @@
+import logging
+import math
+
+import akshare as ak
+import pandas as pd
+from sqlalchemy import select, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.data_center import models, schemas
+from apps.data_center.utils import PriceAdjuster, ADJUST_NONE, ADJUST_TYPES
+from infra.db.crud import DalBase
+from infra.exception.exception import CustomException
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+
+class StockAdjustFactorDal(DalBase):
+    """股票复权因子数据访问层"""
+
+    def __init__(self, db: AsyncSession):
+        super(StockAdjustFactorDal, self).__init__(db=db, model=models.StockAdjustFactor, schema=schemas.StockAdjustFactorOut)
+
+    @staticmethod
+    def market_symbol(symbol: str) -> str:
+        """
+        转换为带交易所前缀的股票代码，如 600000 -> sh600000
+        """
+        if symbol.startswith(("6", "9")):
+            return f"sh{symbol}"
+        if symbol.startswith(("4", "8")):
+            return f"bj{symbol}"
+        return f"sz{symbol}"
+
+    async def sync_adjust_factor(self, symbol: str) -> dict:
+        """
+        同步股票后复权因子
+
+        后复权因子只在除权除息日变化且历史值不变，通常只需追加新的除权日；
+        若上游修正了历史因子，只更新发生变化的日期，上游已不存在的日期则删除
+        """
+        try:
+            logger.info(f"开始从akshare获取股票{symbol}复权因子")
+            factor_df = ak.stock_zh_a_daily(symbol=self.market_symbol(symbol), adjust="hfq-factor")
+            if factor_df is None or factor_df.empty:
+                logger.warning(f"股票{symbol}复权因子为空")
+                return {"status": "warning", "message": f"股票{symbol}复权因子为空"}
+
+            incoming = {
+                pd.Timestamp(row["date"]).strftime("%Y-%m-%d"): float(row["hfq_factor"])
+                for row in factor_df.to_dict(orient="records")
+            }
+            existing = {
+                row.trade_date: (row.id, row.hfq_factor)
+                for row in (await self.db.execute(
+                    select(self.model.id, self.model.trade_date, self.model.hfq_factor).where(
+                        self.model.symbol == symbol,
+                        self.model.is_delete == False
+                    )
+                )).all()
+            }
+
+            # 浮点数往返数据库后可能存在末位误差，按相对误差比较
+            changed = [
+                {"id": data_id, "hfq_factor": incoming[date]}
+                for date, (data_id, factor) in existing.items()
+                if date in incoming and not math.isclose(incoming[date], factor, rel_tol=1e-9)
+            ]
+            removed = [data_id for date, (data_id, _) in existing.items() if date not in incoming]
+            datas = [
+                {"symbol": symbol, "trade_date": date, "hfq_factor": factor}
+                for date, factor in sorted(incoming.items()) if date not in existing
+            ]
+            if changed:
+                await self.db.execute(update(self.model), changed)
+            if removed:
+                await self.db.execute(delete(self.model).where(self.model.id.in_(removed)))
+            if changed or removed:
+                await self.flush()
+                self.invalidate_cache()
+            if datas:
+                await self.create_datas(datas)
+
+            message = f"股票{symbol}复权因子同步完成，新增: {len(datas)}，更新: {len(changed)}，删除: {len(removed)}"
+            logger.info(message)
+            return {"status": "success", "message": message}
+        except Exception as e:
+            logger.error(f"股票{symbol}复权因子同步失败: {str(e)}", exc_info=True)
+            return {"status": "error", "message": f"股票{symbol}复权因子同步失败: {str(e)}"}
+
+    async def get_adjusters(self, symbols: list[str]) -> dict[str, PriceAdjuster]:
+        """
+        一次查询获取多只股票的复权计算器
+        :param symbols: 股票代码列表
+        """
+        sql = select(self.model.symbol, self.model.trade_date, self.model.hfq_factor).where(
+            self.model.symbol.in_(symbols),
+            self.model.is_delete == False
+        )
+        rows = (await self.db.execute(sql)).all()
+        df = pd.DataFrame(rows, columns=["symbol", "trade_date", "hfq_factor"])
+        return {symbol: PriceAdjuster(group) for symbol, group in df.groupby("symbol")}
+
+    async def adjust_datas(self, datas: list[dict], adjust: str, date_field: str = "trade_date") -> list[dict]:
+        """
+        对序列化后的不复权行情按股票分组复权，保持原有顺序
+        :param datas: 行情数据列表，需包含 symbol 字段
+        :param adjust: 复权类型：空字符串(不复权)、qfq(前复权)、hfq(后复权)
+        :param date_field: 日期字段，日线为 trade_date，分钟数据为 trade_time
+        """
+        if adjust not in ADJUST_TYPES:
+            raise CustomException(f"不支持的复权类型：{adjust}")
+        if not datas or adjust == ADJUST_NONE:
+            return datas
+        adjusters = await self.get_adjusters(list({data["symbol"] for data in datas}))
+        positions = {}
+        for index, data in enumerate(datas):
+            positions.setdefault(data["symbol"], []).append(index)
+        result = list(datas)
+        for symbol, indexes in positions.items():
+            adjuster = adjusters.get(symbol)
+            if adjuster is None:
+                logger.warning(f"股票{symbol}缺少复权因子，返回不复权数据")
+                continue
+            adjusted = adjuster.adjust_datas([datas[i] for i in indexes], adjust, date_field)
+            for i, data in zip(indexes, adjusted):
+                result[i] = data
+        return result
+
+    async def purge_adjusted_bars(self) -> dict:
+        """
+        删除历史遗留的前复权、后复权行情副本，复权行情统一在读取时计算
+
+        只删除已同步复权因子的股票，未同步复权因子的股票保留复权副本，同步后再次执行即可删除
+        """
+        symbols = select(self.model.symbol).where(self.model.is_delete == False).distinct()
+        counts = {}
+        for model in [models.StockDaily, models.StockMinute]:
+            result = await self.db.execute(
+                delete(model).where(model.adjust_flag.in_(["qfq", "hfq"]), model.symbol.in_(symbols))
+            )
+            counts[model.__tablename__] = result.rowcount
+        await self.flush()
+        self.invalidate_cache(models.StockDaily, models.StockMinute)
+        return {"status": "success", "message": f"已删除已同步复权因子股票的复权行情副本: {counts}"}
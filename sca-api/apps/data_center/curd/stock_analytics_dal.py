@@ -0,0 +1,160 @@
+from sqlalchemy import select, func, case, cast, type_coerce, or_, and_, Integer, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.data_center import models, schemas
+from infra.db.crud import DalBase
+
+# 涨跌停幅度判定阈值（%），考虑价格四舍五入，略低于理论涨跌幅
+MAIN_BOARD_LIMIT = 9.9
+GROWTH_BOARD_LIMIT = 19.9
+BJ_BOARD_LIMIT = 29.9
+ST_LIMIT = 4.9
+
+
+def count_if(condition):
+    """
+    条件计数，MySQL 中 SUM 返回 DECIMAL，转换为整数
+    """
+    return cast(func.sum(case((condition, 1), else_=0)), Integer)
+
+
+def as_float(expression):
+    """
+    聚合结果按浮点数返回，避免 DECIMAL 无法序列化或精度不一致
+    """
+    return type_coerce(expression, Float)
+
+
+class StockAnalyticsDal(DalBase):
+    """
+    股票横截面统计数据访问层
+
+    所有统计均在数据库中通过聚合与窗口函数完成，只返回统计结果，
+    依赖 data_stock_daily.trade_date 索引，单个交易日约 5000 行
+    """
+
+    def __init__(self, db: AsyncSession):
+        super(StockAnalyticsDal, self).__init__(db=db, model=models.StockDaily, schema=schemas.StockDailyOut)
+
+    def _day_conditions(self, trade_date: str) -> list:
+        """
+        指定交易日的不复权日线
+        """
+        return [
+            self.model.trade_date == trade_date,
+            self.model.is_delete == False,
+            or_(self.model.adjust_flag == "", self.model.adjust_flag.is_(None))
+        ]
+
+    def _limit_threshold(self):
+        """
+        按板块计算涨跌停阈值：创业板、科创板 20%，北交所 30%，主板 ST 5%，其余 10%；
+        创业板、科创板、北交所的 ST 股票与同板块其他股票涨跌幅限制相同，板块判定优先于 ST
+        """
+        symbol = self.model.symbol
+        return case(
+            (or_(symbol.like("300%"), symbol.like("301%"), symbol.like("688%"), symbol.like("689%")), GROWTH_BOARD_LIMIT),
+            (or_(symbol.like("4%"), symbol.like("8%"), symbol.like("92%")), BJ_BOARD_LIMIT),
+            (models.StockInfo.name.like("%ST%"), ST_LIMIT),
+            else_=MAIN_BOARD_LIMIT
+        )
+
+    def _base_query(self, *columns):
+        return select(*columns).select_from(self.model).outerjoin(
+            models.StockInfo, models.StockInfo.id == self.model.stock_id
+        )
+
+    async def get_market_breadth(self, trade_date: str) -> dict:
+        """
+        市场涨跌家数、涨跌停家数与成交额汇总
+        :param trade_date: 交易日期
+        """
+        model = self.model
+        threshold = self._limit_threshold()
+        sql = self._base_query(
+            func.count(model.id).label("total"),
+            count_if(model.change_percent > 0).label("advancers"),
+            count_if(model.change_percent < 0).label("decliners"),
+            count_if(model.change_percent == 0).label("unchanged"),
+            count_if(model.change_percent >= threshold).label("limit_up"),
+            count_if(model.change_percent <= -threshold).label("limit_down"),
+            as_float(func.avg(model.change_percent)).label("avg_change_percent"),
+            as_float(func.sum(model.amount)).label("total_amount"),
+            cast(func.sum(model.volume), Integer).label("total_volume"),
+        ).where(*self._day_conditions(trade_date))
+        result = (await self.db.execute(sql)).mappings().one()
+        return {"trade_date": trade_date, **{key: value or 0 for key, value in result.items()}}
+
+    async def get_rankings(self, trade_date: str, field: str = "change_percent", limit: int = 20, desc: bool = True) -> list[dict]:
+        """
+        按指定字段排名
+        :param trade_date: 交易日期
+        :param field: 排名字段：change_percent、turnover_rate、amount、amplitude
+        :param limit: 返回数量
+        :param desc: 是否降序
+        """
+        model = self.model
+        order_field = getattr(model, field)
+        order = order_field.desc() if desc else order_field.asc()
+        sql = self._base_query(
+            func.rank().over(order_by=order).label("rank"),
+            model.symbol,
+            models.StockInfo.name,
+            models.StockInfo.industry,
+            model.close_price,
+            model.change_percent,
+            model.turnover_rate,
+            model.amount,
+            model.amplitude,
+        ).where(*self._day_conditions(trade_date), order_field.isnot(None)).order_by(order).limit(limit)
+        return [dict(row) for row in (await self.db.execute(sql)).mappings().all()]
+
+    async def get_industry_stats(self, trade_date: str) -> list[dict]:
+        """
+        行业汇总：股票数、涨跌家数、平均涨跌幅、成交额及行业领涨股
+        :param trade_date: 交易日期
+        """
+        model = self.model
+        industry = func.coalesce(models.StockInfo.industry, "未分类")
+        ranked = self._base_query(
+            industry.label("industry"),
+            model.symbol,
+            models.StockInfo.name,
+            model.change_percent,
+            model.amount,
+            func.row_number().over(partition_by=industry, order_by=model.change_percent.desc()).label("industry_rank"),
+        ).where(*self._day_conditions(trade_date)).subquery()
+
+        sql = select(
+            ranked.c.industry,
+            func.count().label("total"),
+            count_if(ranked.c.change_percent > 0).label("advancers"),
+            count_if(ranked.c.change_percent < 0).label("decliners"),
+            as_float(func.avg(ranked.c.change_percent)).label("avg_change_percent"),
+            as_float(func.sum(ranked.c.amount)).label("total_amount"),
+            func.max(case((ranked.c.industry_rank == 1, ranked.c.symbol))).label("leader_symbol"),
+            func.max(case((ranked.c.industry_rank == 1, ranked.c.name))).label("leader_name"),
+            as_float(func.max(case((ranked.c.industry_rank == 1, ranked.c.change_percent)))).label("leader_change_percent"),
+        ).group_by(ranked.c.industry).order_by(func.avg(ranked.c.change_percent).desc())
+        return [dict(row) for row in (await self.db.execute(sql)).mappings().all()]
+
+    async def get_limit_stocks(self, trade_date: str, direction: str = "up") -> dict:
+        """
+        涨停或跌停股票
+        :param trade_date: 交易日期
+        :param direction: up 涨停，down 跌停
+        """
+        model = self.model
+        threshold = self._limit_threshold()
+        condition = model.change_percent >= threshold if direction == "up" else model.change_percent <= -threshold
+        sql = self._base_query(
+            model.symbol,
+            models.StockInfo.name,
+            models.StockInfo.industry,
+            model.close_price,
+            model.change_percent,
+            model.turnover_rate,
+            model.amount,
+        ).where(and_(*self._day_conditions(trade_date), condition)).order_by(model.amount.desc())
+        items = [dict(row) for row in (await self.db.execute(sql)).mappings().all()]
+        return {"trade_date": trade_date, "direction": direction, "count": len(items), "items": items}
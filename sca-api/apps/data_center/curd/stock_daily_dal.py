@@ -6,8 +6,10 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.data_center import models, schemas
+from apps.data_center.utils import ADJUST_NONE
 from infra.db.crud import DalBase
 from .stock_info_dal import StockInfoDal
+from .stock_adjust_factor_dal import StockAdjustFactorDal
 
 # 创建日志记录器
 logger = logging.getLogger(__name__)
@@ -76,10 +78,13 @@ class StockDailyDal(DalBase):
         except Exception as e:
             logger.error(f"保存股票{symbol}日线数据到本地缓存失败: {str(e)}")
 
-    async def sync_stock_daily(self, symbol: str, start_date: str, end_date: str, adjust: str = "") -> dict:
+    async def sync_stock_daily(self, symbol: str, start_date: str, end_date: str) -> dict:
         """
         同步股票日线数据
+
+        只获取并保存不复权数据，同时同步复权因子，前复权、后复权在读取时由 StockAdjustFactorDal 计算
         """
+        adjust = ADJUST_NONE
         try:
             # 先从本地缓存获取数据
             cached_df = self._get_cached_stock_daily(symbol, start_date, end_date, adjust)
@@ -172,9 +177,11 @@ class StockDailyDal(DalBase):
                     success_count += 1
             
             logger.info(f"股票{symbol}日线数据同步完成，新增: {success_count}，更新: {update_count}")
+
+            factor_result = await StockAdjustFactorDal(self.db).sync_adjust_factor(symbol)
             return {
                 "status": "success", 
-                "message": f"股票{symbol}日线数据同步完成，新增: {success_count}，更新: {update_count}"
+                "message": f"股票{symbol}日线数据同步完成，新增: {success_count}，更新: {update_count}；{factor_result['message']}"
             }
         except Exception as e:
             logger.error(f"股票{symbol}日线数据同步失败: {str(e)}", exc_info=True)
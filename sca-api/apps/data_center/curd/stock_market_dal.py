@@ -1,8 +1,11 @@
+import asyncio
 import logging
 import os
+from typing import Callable
 import akshare as ak
 import pandas as pd
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.data_center import models, schemas
@@ -16,6 +19,45 @@ LOCAL_CACHE_DIR = "apps/data_center/local_data_cache"
 SSE_MARKET_CACHE_FILE = os.path.join(LOCAL_CACHE_DIR, "sse_market.csv")
 SZSE_MARKET_CACHE_FILE = os.path.join(LOCAL_CACHE_DIR, "szse_market.csv")
 
+# 区间回补时同时请求 akshare 的最大并发数
+BACKFILL_CONCURRENCY = 4
+
+
+def to_number(series: pd.Series) -> pd.Series:
+    """
+    批量转换数值，去除千分位逗号，无法转换的值为 NaN
+    """
+    return pd.to_numeric(series.astype(str).str.replace(',', '', regex=False), errors='coerce')
+
+
+async def fetch_dates(fetch: Callable[[str], pd.DataFrame], dates: list[str], concurrency: int = BACKFILL_CONCURRENCY) -> dict[str, pd.DataFrame]:
+    """
+    限制并发地按日期调用 akshare 接口，akshare 为同步接口，在线程池中执行
+    :param fetch: 接收 YYYYMMDD 日期并返回 DataFrame 的函数
+    :param dates: 日期列表，格式 YYYYMMDD
+    :param concurrency: 最大并发数
+    :return: {日期: 数据}，非交易日或获取失败的日期不包含在结果中
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(date: str) -> tuple[str, pd.DataFrame | None]:
+        async with semaphore:
+            try:
+                return date, await asyncio.to_thread(fetch, date)
+            except Exception as e:
+                logger.warning(f"获取{date}市场总貌数据失败: {str(e)}")
+                return date, None
+
+    results = await asyncio.gather(*[fetch_one(date) for date in dates])
+    return {date: df for date, df in results if df is not None and not df.empty}
+
+
+def business_dates(start_date: str, end_date: str) -> list[str]:
+    """
+    获取区间内的工作日，格式 YYYYMMDD，节假日由接口返回空数据后跳过
+    """
+    return [date.strftime('%Y%m%d') for date in pd.bdate_range(start_date, end_date)]
+
 
 class SseMarketDal(DalBase):
     """上海证券交易所市场总貌数据访问层"""
@@ -152,6 +194,65 @@ class SseMarketDal(DalBase):
             return {"status": "error", "message": f"上交所市场总貌数据同步失败: {str(e)}"}
 
 
+    @staticmethod
+    def _parse_sse_deal_daily(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        将多日上交所每日概况一次性透视为 SseMarket 字段
+        :param frames: {日期: ak.stock_sse_deal_daily 返回数据}
+        """
+        df = pd.concat([frame.assign(date=date) for date, frame in frames.items()], ignore_index=True)
+        df = df.set_index(['date', '单日情况'])
+        # 主板包含主板 A 股与主板 B 股
+        df['主板'] = to_number(df['主板A']).fillna(0) + to_number(df['主板B']).fillna(0)
+        values = df[['股票', '主板', '科创板']].apply(to_number).unstack('单日情况')
+        result = pd.DataFrame({
+            'date': values.index,
+            'total_stocks': values[('股票', '挂牌数')],
+            'total_market_value': values[('股票', '市价总值')],
+            'circulating_market_value': values[('股票', '流通市值')],
+            'average_pe_ratio': values[('股票', '平均市盈率')],
+            'turnover_rate': values.get(('股票', '换手率')),
+            'main_board_stocks': values[('主板', '挂牌数')],
+            'sci_tech_board_stocks': values[('科创板', '挂牌数')],
+            'main_board_market_value': values[('主板', '市价总值')],
+            'sci_tech_board_market_value': values[('科创板', '市价总值')],
+        })
+        for field in ['total_stocks', 'main_board_stocks', 'sci_tech_board_stocks']:
+            result[field] = result[field].round().astype('Int64')
+        return result
+
+    async def backfill_sse_summary(self, start_date: str, end_date: str, concurrency: int = BACKFILL_CONCURRENCY) -> dict:
+        """
+        按日期区间回补上交所市场总貌数据
+
+        一次查询剔除已入库日期，其余日期限制并发获取每日概况，统一透视后批量写入；
+        每日概况接口不提供股本数据，总股本、流通股本为空
+        :param start_date: 开始日期，格式 YYYYMMDD
+        :param end_date: 结束日期，格式 YYYYMMDD
+        :param concurrency: 最大并发数
+        """
+        try:
+            dates = business_dates(start_date, end_date)
+            exist_dates = set((await self.db.scalars(select(self.model.date).where(self.model.date.in_(dates)))).all())
+            dates = [date for date in dates if date not in exist_dates]
+            if not dates:
+                return {"status": "info", "message": f"上交所{start_date}-{end_date}数据已存在"}
+
+            logger.info(f"开始从akshare回补上交所市场总貌数据，共{len(dates)}个日期")
+            frames = await fetch_dates(lambda date: ak.stock_sse_deal_daily(date=date), dates, concurrency)
+            if not frames:
+                return {"status": "warning", "message": f"上交所{start_date}-{end_date}无可用数据"}
+
+            df = self._parse_sse_deal_daily(frames)
+            datas = df.astype(object).where(df.notna(), None).to_dict(orient='records')
+            await self.create_datas(datas)
+            logger.info(f"上交所{start_date}-{end_date}市场总貌数据回补成功，新增: {len(datas)}")
+            return {"status": "success", "message": f"上交所{start_date}-{end_date}市场总貌数据回补成功，新增: {len(datas)}"}
+        except Exception as e:
+            logger.error(f"上交所市场总貌数据回补失败: {str(e)}", exc_info=True)
+            return {"status": "error", "message": f"上交所市场总貌数据回补失败: {str(e)}"}
+
+
 class SzseMarketDal(DalBase):
     """深圳证券交易所市场总貌数据访问层"""
 
@@ -167,7 +268,7 @@ class SzseMarketDal(DalBase):
         try:
             if os.path.exists(SZSE_MARKET_CACHE_FILE):
                 # 读取CSV文件
-                df = pd.read_csv(SZSE_MARKET_CACHE_FILE, encoding='utf-8')
+                df = pd.read_csv(SZSE_MARKET_CACHE_FILE, encoding='utf-8', dtype={'date': str})
                 # 过滤指定日期的数据
                 date_df = df[df['date'] == date]
                 if not date_df.empty:
@@ -177,20 +278,40 @@ class SzseMarketDal(DalBase):
             logger.warning(f"从本地缓存获取深交所{date}市场总貌数据失败: {str(e)}")
         return None
 
+    def _get_cached_szse_summaries(self, dates: list[str]) -> pd.DataFrame | None:
+        """
+        一次读取本地缓存中多个日期的深交所市场总貌数据
+        """
+        try:
+            if os.path.exists(SZSE_MARKET_CACHE_FILE):
+                df = pd.read_csv(SZSE_MARKET_CACHE_FILE, encoding='utf-8', dtype={'date': str})
+                return df[df['date'].isin(dates)]
+        except Exception as e:
+            logger.warning(f"从本地缓存获取深交所市场总貌数据失败: {str(e)}")
+        return None
+
     def _save_szse_summary_to_cache(self, date: str, szse_summary_df: pd.DataFrame) -> None:
         """
         保存深交所市场总貌数据到本地缓存
         """
+        # 添加日期列
+        szse_summary_df['date'] = date
+        self._save_szse_summaries_to_cache(szse_summary_df)
+
+    def _save_szse_summaries_to_cache(self, szse_summary_df: pd.DataFrame) -> None:
+        """
+        保存深交所市场总貌数据到本地缓存，支持一次写入多个日期，需包含 date 列
+        """
+        dates = szse_summary_df['date'].unique().tolist()
         try:
-            # 添加日期和更新日期列
-            szse_summary_df['date'] = date
+            # 添加更新日期列
             szse_summary_df['update_date'] = datetime.now().strftime('%Y-%m-%d')
             
             if os.path.exists(SZSE_MARKET_CACHE_FILE):
                 # 读取现有CSV文件
-                existing_df = pd.read_csv(SZSE_MARKET_CACHE_FILE, encoding='utf-8')
+                existing_df = pd.read_csv(SZSE_MARKET_CACHE_FILE, encoding='utf-8', dtype={'date': str})
                 # 删除已有的同一日期的数据
-                existing_df = existing_df[existing_df['date'] != date]
+                existing_df = existing_df[~existing_df['date'].isin(dates)]
                 # 合并数据
                 updated_df = pd.concat([existing_df, szse_summary_df], ignore_index=True)
                 # 保存回CSV
@@ -199,9 +320,45 @@ class SzseMarketDal(DalBase):
                 # 创建新的CSV文件
                 szse_summary_df.to_csv(SZSE_MARKET_CACHE_FILE, index=False, encoding='utf-8')
             
-            logger.info(f"保存深交所{date}市场总貌数据到本地缓存成功")
+            logger.info(f"保存深交所{len(dates)}个日期市场总貌数据到本地缓存成功")
         except Exception as e:
-            logger.error(f"保存深交所{date}市场总貌数据到本地缓存失败: {str(e)}")
+            logger.error(f"保存深交所市场总貌数据到本地缓存失败: {str(e)}")
+
+    @staticmethod
+    def _parse_szse_summaries(szse_summary_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        将一个或多个日期的深交所市场总貌按证券类别一次性透视为 SzseMarket 字段，缺失的类别取 0
+        :param szse_summary_df: ak.stock_szse_summary 返回数据，需包含 date 列
+        """
+        values = (
+            szse_summary_df.set_index(['date', '证券类别'])[['数量', '总市值', '流通市值']]
+            .apply(to_number)
+            .unstack('证券类别')
+        )
+
+        def column(field: str, category: str) -> pd.Series:
+            if (field, category) in values.columns:
+                return values[(field, category)].fillna(0)
+            return pd.Series(0, index=values.index)
+
+        result = pd.DataFrame({
+            'date': values.index,
+            'total_stocks': column('数量', '股票'),
+            'total_market_value': column('总市值', '股票'),
+            'circulating_market_value': column('流通市值', '股票'),
+            'turnover_rate': 0.0,
+            'main_board_a_stocks': column('数量', '主板A股'),
+            'main_board_b_stocks': column('数量', '主板B股'),
+            'sme_board_stocks': column('数量', '中小板'),
+            'gem_board_stocks': column('数量', '创业板A股'),
+            'main_board_a_market_value': column('总市值', '主板A股'),
+            'main_board_b_market_value': column('总市值', '主板B股'),
+            'sme_board_market_value': column('总市值', '中小板'),
+            'gem_board_market_value': column('总市值', '创业板A股'),
+        })
+        for field in ['total_stocks', 'main_board_a_stocks', 'main_board_b_stocks', 'sme_board_stocks', 'gem_board_stocks']:
+            result[field] = result[field].round().astype(int)
+        return result
 
     async def sync_szse_summary(self, date: str) -> dict:
         """
@@ -230,57 +387,10 @@ class SzseMarketDal(DalBase):
                 logger.info(f"深交所{date}数据已存在，无需重复同步")
                 return {"status": "info", "message": f"深交所{date}数据已存在"}
 
-            # 安全地转换数值
-            def safe_convert(value, convert_func=float, default=None):
-                if value is None or value == '':
-                    return default
-                try:
-                    if isinstance(value, str):
-                        return convert_func(value.replace(',', ''))
-                    return convert_func(value)
-                except (ValueError, TypeError):
-                    logger.warning(f"转换值失败: {value}")
-                    return default
-
-            # 提取数据
-            stock_row = stock_szse_summary_df[stock_szse_summary_df['证券类别'] == '股票'].iloc[0] if '股票' in stock_szse_summary_df['证券类别'].values else None
-            main_board_a_row = stock_szse_summary_df[stock_szse_summary_df['证券类别'] == '主板A股'].iloc[0] if '主板A股' in stock_szse_summary_df['证券类别'].values else None
-            main_board_b_row = stock_szse_summary_df[stock_szse_summary_df['证券类别'] == '主板B股'].iloc[0] if '主板B股' in stock_szse_summary_df['证券类别'].values else None
-            sme_board_row = stock_szse_summary_df[stock_szse_summary_df['证券类别'] == '中小板'].iloc[0] if '中小板' in stock_szse_summary_df['证券类别'].values else None
-            gem_board_row = stock_szse_summary_df[stock_szse_summary_df['证券类别'] == '创业板A股'].iloc[0] if '创业板A股' in stock_szse_summary_df['证券类别'].values else None
-
-            # 确保所有数值都被正确转换
-            total_stocks = safe_convert(stock_row['数量'], int, 0) if stock_row is not None else 0
-            total_market_value = safe_convert(stock_row['总市值'], float, 0.0) if stock_row is not None else 0.0
-            circulating_market_value = safe_convert(stock_row['流通市值'], float, 0.0) if stock_row is not None else 0.0
-            
-            # 板块数据
-            main_board_a_stocks = safe_convert(main_board_a_row['数量'], int, 0) if main_board_a_row is not None else 0
-            main_board_b_stocks = safe_convert(main_board_b_row['数量'], int, 0) if main_board_b_row is not None else 0
-            sme_board_stocks = safe_convert(sme_board_row['数量'], int, 0) if sme_board_row is not None else 0
-            gem_board_stocks = safe_convert(gem_board_row['数量'], int, 0) if gem_board_row is not None else 0
-            
-            main_board_a_market_value = safe_convert(main_board_a_row['总市值'], float, 0.0) if main_board_a_row is not None else 0.0
-            main_board_b_market_value = safe_convert(main_board_b_row['总市值'], float, 0.0) if main_board_b_row is not None else 0.0
-            sme_board_market_value = safe_convert(sme_board_row['总市值'], float, 0.0) if sme_board_row is not None else 0.0
-            gem_board_market_value = safe_convert(gem_board_row['总市值'], float, 0.0) if gem_board_row is not None else 0.0
-
-            # 创建数据
-            data = schemas.SzseMarket(
-                date=date,
-                total_stocks=total_stocks,
-                total_market_value=total_market_value,
-                circulating_market_value=circulating_market_value,
-                turnover_rate=0.0,  # 添加默认值
-                main_board_a_stocks=main_board_a_stocks,
-                main_board_b_stocks=main_board_b_stocks,
-                sme_board_stocks=sme_board_stocks,
-                gem_board_stocks=gem_board_stocks,
-                main_board_a_market_value=main_board_a_market_value,
-                main_board_b_market_value=main_board_b_market_value,
-                sme_board_market_value=sme_board_market_value,
-                gem_board_market_value=gem_board_market_value
-            )
+            # 按证券类别透视提取数据
+            stock_szse_summary_df['date'] = date
+            parsed = self._parse_szse_summaries(stock_szse_summary_df).iloc[0].to_dict()
+            data = schemas.SzseMarket(**parsed)
             
             result = await self.create_data(data=data)
             logger.info(f"深交所{date}市场总貌数据同步成功")
@@ -296,3 +406,43 @@ class SzseMarketDal(DalBase):
         except Exception as e:
             logger.error(f"深交所{date}市场总貌数据同步失败: {str(e)}", exc_info=True)
             return {"status": "error", "message": f"深交所市场总貌数据同步失败: {str(e)}"}
+
+    async def backfill_szse_summary(self, start_date: str, end_date: str, concurrency: int = BACKFILL_CONCURRENCY) -> dict:
+        """
+        按日期区间回补深交所市场总貌数据
+
+        一次查询剔除已入库日期，优先使用本地缓存，其余日期限制并发获取，
+        所有日期统一透视、一次写入缓存并批量写入数据库
+        :param start_date: 开始日期，格式 YYYYMMDD
+        :param end_date: 结束日期，格式 YYYYMMDD
+        :param concurrency: 最大并发数
+        """
+        try:
+            dates = business_dates(start_date, end_date)
+            exist_dates = set((await self.db.scalars(select(self.model.date).where(self.model.date.in_(dates)))).all())
+            dates = [date for date in dates if date not in exist_dates]
+            if not dates:
+                return {"status": "info", "message": f"深交所{start_date}-{end_date}数据已存在"}
+
+            cached_df = self._get_cached_szse_summaries(dates)
+            cached_dates = set(cached_df['date']) if cached_df is not None else set()
+            fetch_list = [date for date in dates if date not in cached_dates]
+            logger.info(f"开始回补深交所市场总貌数据，共{len(dates)}个日期，其中需从akshare获取{len(fetch_list)}个")
+
+            frames = await fetch_dates(lambda date: ak.stock_szse_summary(date=date), fetch_list, concurrency)
+            fetched_df = None
+            if frames:
+                fetched_df = pd.concat([frame.assign(date=date) for date, frame in frames.items()], ignore_index=True)
+                self._save_szse_summaries_to_cache(fetched_df.copy())
+
+            summary_dfs = [df for df in [cached_df, fetched_df] if df is not None and not df.empty]
+            if not summary_dfs:
+                return {"status": "warning", "message": f"深交所{start_date}-{end_date}无可用数据"}
+
+            datas = self._parse_szse_summaries(pd.concat(summary_dfs, ignore_index=True)).to_dict(orient='records')
+            await self.create_datas(datas)
+            logger.info(f"深交所{start_date}-{end_date}市场总貌数据回补成功，新增: {len(datas)}")
+            return {"status": "success", "message": f"深交所{start_date}-{end_date}市场总貌数据回补成功，新增: {len(datas)}"}
+        except Exception as e:
+            logger.error(f"深交所市场总貌数据回补失败: {str(e)}", exc_info=True)
+            return {"status": "error", "message": f"深交所市场总貌数据回补失败: {str(e)}"}
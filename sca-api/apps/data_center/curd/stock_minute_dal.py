@@ -3,9 +3,11 @@ import os
 import akshare as ak
 import pandas as pd
 from datetime import datetime
+from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.data_center import models, schemas
+from apps.data_center.utils import MinuteResampler, MINUTE_PERIOD, ROLLUP_PERIODS, DAILY_PERIOD, ADJUST_NONE
 from infra.db.crud import DalBase
 
 # 创建日志记录器
@@ -83,10 +85,18 @@ class StockMinuteDal(DalBase):
         except Exception as e:
             logger.error(f"保存股票{symbol} {period}分钟数据到本地缓存失败: {str(e)}")
 
-    async def sync_stock_minute(self, symbol: str, period: str, start_date: str = None, end_date: str = None, adjust: str = "") -> dict:
+    async def sync_stock_minute(self, symbol: str, period: str, start_date: str = None, end_date: str = None) -> dict:
         """
         同步股票分钟数据
+
+        上游只获取 1 分钟线，5/15/30/60 分钟线与日线由 rollup_stock_minute 基于已入库的 1 分钟线派生，
+        请求其他周期时同样只同步 1 分钟线并增量更新受影响交易日的派生周期；
+        只保存不复权数据，前复权、后复权在读取时由 StockAdjustFactorDal 计算
         """
+        adjust = ADJUST_NONE
+        if period != MINUTE_PERIOD:
+            logger.info(f"股票{symbol} {period}分钟数据由1分钟数据派生，改为同步1分钟数据")
+            period = MINUTE_PERIOD
         try:
             # 先从本地缓存获取数据
             cached_df = self._get_cached_stock_minute(symbol, period, start_date, end_date, adjust)
@@ -176,10 +186,61 @@ class StockMinuteDal(DalBase):
                     success_count += 1
             
             logger.info(f"股票{symbol} {period}分钟数据同步完成，新增: {success_count}，更新: {update_count}")
+
+            # 只重算本次同步涉及的交易日
+            trade_times = stock_zh_a_hist_min_em_df.get('时间', stock_zh_a_hist_min_em_df.get('trade_time'))
+            trade_dates = sorted({str(value)[:10] for value in trade_times})
+            rollup_count = await self.rollup_stock_minute(symbol, trade_dates[0], trade_dates[-1], adjust)
             return {
                 "status": "success", 
-                "message": f"股票{symbol} {period}分钟数据同步完成，新增: {success_count}，更新: {update_count}"
+                "message": f"股票{symbol} {period}分钟数据同步完成，新增: {success_count}，更新: {update_count}，派生周期: {rollup_count}"
             }
         except Exception as e:
             logger.error(f"股票{symbol} {period}分钟数据同步失败: {str(e)}", exc_info=True)
-            return {"status": "error", "message": f"股票{symbol} {period}分钟数据同步失败: {str(e)}"} 
\ No newline at end of file
+            return {"status": "error", "message": f"股票{symbol} {period}分钟数据同步失败: {str(e)}"}
+
+    async def rollup_stock_minute(self, symbol: str, start_date: str, end_date: str, adjust: str = ADJUST_NONE) -> int:
+        """
+        基于已入库的 1 分钟线重算指定交易日范围内的 5/15/30/60 分钟线与日线
+
+        派生数据与 1 分钟线存放在同一张表中，以 period 区分，日线 period 为 daily，
+        trade_time 为当日 15:00:00；重算时先删除范围内已有的派生数据再批量写入
+        :param symbol: 股票代码
+        :param start_date: 开始日期，格式 YYYY-MM-DD
+        :param end_date: 结束日期，格式 YYYY-MM-DD
+        :param adjust: 复权类型
+        :return: 写入的派生 K 线数量
+        """
+        time_range = (f"{start_date[:10]} 00:00:00", f"{end_date[:10]} 23:59:59")
+        columns = ["trade_time", *MinuteResampler.AGGREGATIONS.keys()]
+        sql = select(*[getattr(self.model, column) for column in columns]).where(
+            self.model.symbol == symbol,
+            self.model.period == MINUTE_PERIOD,
+            self.model.adjust_flag == adjust,
+            self.model.trade_time.between(*time_range),
+            self.model.is_delete == False
+        )
+        rows = (await self.db.execute(sql)).all()
+        await self.db.execute(
+            delete(self.model).where(
+                self.model.symbol == symbol,
+                self.model.period.in_([*ROLLUP_PERIODS, DAILY_PERIOD]),
+                self.model.adjust_flag == adjust,
+                self.model.trade_time.between(*time_range)
+            )
+        )
+        if not rows:
+            await self.flush()
+            self.invalidate_cache()
+            return 0
+
+        resampler = MinuteResampler(pd.DataFrame(rows, columns=columns))
+        datas = []
+        for rollup_period, bars in resampler.rollups().items():
+            bars = bars.astype(object).where(bars.notna(), None)
+            bars["volume"] = bars["volume"].astype(int)
+            for bar in bars.to_dict(orient="records"):
+                datas.append({**bar, "symbol": symbol, "period": rollup_period, "adjust_flag": adjust})
+        await self.create_datas(datas)
+        logger.info(f"股票{symbol} {start_date}-{end_date} 派生周期重算完成，共{len(datas)}条记录")
+        return len(datas)
@@ -3,9 +3,12 @@ import os
 import akshare as ak
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.data_center import models, schemas
+from apps.data_center.utils import TickStore
 from infra.db.crud import DalBase
 
 # 创建日志记录器
@@ -14,6 +17,23 @@ logger = logging.getLogger(__name__)
 # 本地数据缓存目录
 LOCAL_CACHE_DIR = "apps/data_center/local_data_cache"
 STOCK_TICK_CACHE_FILE = os.path.join(LOCAL_CACHE_DIR, "stock_tick.csv")
+# 分笔数据存储目录，按 股票代码/交易日期.npy 分区
+STOCK_TICK_STORE_DIR = os.path.join(LOCAL_CACHE_DIR, "tick_store")
+
+tick_store = TickStore(STOCK_TICK_STORE_DIR)
+# 集合竞价开始时间，此前最近交易日仍为上一个交易日
+TRADE_START_TIME = "09:15:00"
+
+
+@lru_cache(maxsize=1)
+def trade_calendar(today: str) -> list[str]:
+    """
+    获取交易日历，按自然日缓存，参数仅作为缓存键
+    :param today: 当天日期，格式 YYYY-MM-DD
+    :return: 升序排列的交易日期列表，格式 YYYY-MM-DD
+    """
+    calendar_df = ak.tool_trade_date_hist_sina()
+    return sorted(pd.to_datetime(calendar_df["trade_date"]).dt.strftime("%Y-%m-%d"))
 
 
 class StockTickDal(DalBase):
@@ -24,83 +44,126 @@ class StockTickDal(DalBase):
         # 确保缓存目录存在
         os.makedirs(LOCAL_CACHE_DIR, exist_ok=True)
 
-    def _get_cached_stock_tick(self, symbol: str, date: str = None) -> pd.DataFrame:
+    @staticmethod
+    def _normalize_date(date: str = None) -> str:
         """
-        从本地缓存获取股票分笔数据
+        统一交易日期格式为 YYYY-MM-DD，未指定时为当天
         """
-        try:
-            if os.path.exists(STOCK_TICK_CACHE_FILE):
-                # 读取CSV文件
-                df = pd.read_csv(STOCK_TICK_CACHE_FILE, encoding='utf-8')
-                # 过滤指定股票的数据
-                stock_df = df[df['symbol'] == symbol]
-                if not stock_df.empty:
-                    if date:
-                        # 提取日期部分用于比较
-                        stock_df['date'] = stock_df['trade_time'].str.split(' ').str[0]
-                        date_filtered_df = stock_df[stock_df['date'] == date]
-                        if not date_filtered_df.empty:
-                            logger.info(f"从本地缓存获取股票{symbol}分笔数据成功，日期: {date}")
-                            return date_filtered_df
-                    else:
-                        # 检查数据是否是今天的
-                        today = datetime.now().strftime('%Y-%m-%d')
-                        if 'update_date' in stock_df.columns and stock_df.iloc[0]['update_date'] == today:
-                            logger.info(f"从本地缓存获取股票{symbol}最新分笔数据成功")
-                            return stock_df
-        except Exception as e:
-            logger.warning(f"从本地缓存获取股票{symbol}分笔数据失败: {str(e)}")
-        return None
+        if not date:
+            return datetime.now().strftime('%Y-%m-%d')
+        return datetime.strptime(date.replace('-', ''), '%Y%m%d').strftime('%Y-%m-%d')
 
-    def _save_stock_tick_to_cache(self, symbol: str, stock_tick_df: pd.DataFrame, date: str = None) -> None:
+    @staticmethod
+    def _normalize_tick_frame(df: pd.DataFrame) -> pd.DataFrame:
         """
-        保存股票分笔数据到本地缓存
+        统一腾讯财经、新浪财经数据源字段为 trade_time、price、volume、direction，成交量单位统一为手
         """
-        try:
-            # 添加股票代码和日期列
-            stock_tick_df['symbol'] = symbol
-            stock_tick_df['update_date'] = datetime.now().strftime('%Y-%m-%d')
-            
-            if os.path.exists(STOCK_TICK_CACHE_FILE):
-                # 读取现有CSV文件
-                existing_df = pd.read_csv(STOCK_TICK_CACHE_FILE, encoding='utf-8')
-                
-                # 删除已有的同一股票同一日期的数据
-                if date:
-                    # 提取日期部分用于比较
-                    existing_df['date'] = existing_df['trade_time'].str.split(' ').str[0]
-                    existing_df = existing_df[~((existing_df['symbol'] == symbol) & (existing_df['date'] == date))]
-                else:
-                    # 如果没有指定日期，则删除所有该股票的数据
-                    existing_df = existing_df[existing_df['symbol'] != symbol]
-                
-                # 合并数据
-                updated_df = pd.concat([existing_df, stock_tick_df], ignore_index=True)
-                # 保存回CSV
-                updated_df.to_csv(STOCK_TICK_CACHE_FILE, index=False, encoding='utf-8')
-            else:
-                # 创建新的CSV文件
-                stock_tick_df.to_csv(STOCK_TICK_CACHE_FILE, index=False, encoding='utf-8')
-            
-            logger.info(f"保存股票{symbol}分笔数据到本地缓存成功")
-        except Exception as e:
-            logger.error(f"保存股票{symbol}分笔数据到本地缓存失败: {str(e)}")
+        if '成交时间' in df.columns:
+            return df.rename(columns={'成交时间': 'trade_time', '成交价格': 'price', '成交量': 'volume', '性质': 'direction'})
+        if 'ticktime' in df.columns:
+            df = df.rename(columns={'ticktime': 'trade_time'})
+            df['direction'] = df['kind'].map({'B': "买盘", 'S': "卖盘"}).fillna("中性盘")
+            # 新浪财经成交量单位为股
+            df['volume'] = pd.to_numeric(df['volume'], errors='coerce').fillna(0) // 100
+        return df
+
+    @staticmethod
+    def _normalize_mysql_volume(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        MySQL 中旧版新浪财经数据的成交量单位为股，成交额按 成交量 * 价格 计算，
+        腾讯财经数据的成交额约为 成交量 * 价格 * 100，据此识别并将成交量转换为手
+        """
+        shares = df["amount"] < df["price"] * df["volume"] * 10
+        df.loc[shares, "volume"] = df.loc[shares, "volume"] // 100
+        return df
+
+    def get_stock_ticks(
+            self,
+            symbol: str,
+            date: str,
+            start_time: str = None,
+            end_time: str = None,
+            direction: str = None,
+            page: int = 1,
+            limit: int = 10
+    ) -> tuple[list[dict], int]:
+        """
+        从分笔存储分页读取分笔数据，按成交时间倒序
+        :param symbol: 股票代码
+        :param date: 交易日期，格式 YYYYMMDD 或 YYYY-MM-DD
+        :param start_time: 开始时间，格式 HH:MM:SS，可选
+        :param end_time: 结束时间，格式 HH:MM:SS，可选
+        :param direction: 成交方向：买盘、卖盘、中性盘，可选
+        :param page: 页码
+        :param limit: 每页数量，为 0 时返回全部
+        :return: 当前页数据、总数
+        """
+        df = self.get_stock_tick_frame(symbol, date, start_time, end_time)
+        if df is None:
+            return [], 0
+        if direction:
+            df = df[df["direction"] == direction]
+        count = len(df)
+        df = df.iloc[::-1]
+        if limit:
+            df = df.iloc[(page - 1) * limit:page * limit]
+        return [{"symbol": symbol, **item} for item in df.to_dict(orient="records")], count
+
+    def get_stock_tick_frame(self, symbol: str, date: str, start_time: str = None, end_time: str = None) -> pd.DataFrame:
+        """
+        从分笔存储读取指定股票、交易日的分笔数据，不经过 MySQL
+        :param symbol: 股票代码
+        :param date: 交易日期，格式 YYYYMMDD 或 YYYY-MM-DD
+        :param start_time: 开始时间，格式 HH:MM:SS，可选
+        :param end_time: 结束时间，格式 HH:MM:SS，可选
+        """
+        return tick_store.read_frame(symbol, self._normalize_date(date), start_time, end_time)
+
+    @staticmethod
+    def _latest_trade_date() -> str:
+        """
+        最近交易日：当天为交易日且已开盘时为当天，否则为此前的最后一个交易日
+        """
+        now = datetime.now()
+        today = now.strftime('%Y-%m-%d')
+        calendar = trade_calendar(today)
+        if today in calendar and now.strftime('%H:%M:%S') >= TRADE_START_TIME:
+            return today
+        return [day for day in calendar if day < today][-1]
 
     async def sync_stock_tick(self, symbol: str, date: str = None) -> dict:
         """
         同步股票分笔数据
+
+        分笔数据写入 TickStore 按交易日分区的紧凑数组文件，不再逐笔写入 MySQL，
+        历史交易日分区已存在时直接返回，最近交易日的分区重新同步时整体替换。
+        腾讯财经、新浪财经分时接口只返回最近交易日的数据，仅用于同步最近交易日，
+        历史交易日使用网易数据源；非交易日不写入分区
         """
         try:
-            # 先从本地缓存获取数据
-            cached_df = self._get_cached_stock_tick(symbol, date)
+            latest_date = self._latest_trade_date()
+            trade_date = self._normalize_date(date) if date else latest_date
+            if trade_date not in trade_calendar(datetime.now().strftime('%Y-%m-%d')):
+                logger.warning(f"{trade_date}不是交易日，跳过股票{symbol}分笔数据同步")
+                return {"status": "warning", "message": f"{trade_date}不是交易日，无分笔数据"}
+            if trade_date > latest_date:
+                return {"status": "warning", "message": f"{trade_date}尚未开盘，无分笔数据"}
+            if tick_store.exists(symbol, trade_date) and trade_date != latest_date:
+                logger.info(f"股票{symbol} {trade_date}分笔数据已存在于分笔存储")
+                return {"status": "info", "message": f"股票{symbol} {trade_date}分笔数据已存在，无需同步"}
+
+            logger.info(f"开始从akshare获取股票{symbol}分笔数据，日期: {trade_date}")
             data_source = None
-            
-            # 如果本地缓存没有数据，则从akshare获取
-            if cached_df is None:
-                # 获取股票分笔数据
-                logger.info(f"开始从akshare获取股票{symbol}分笔数据，日期: {date or '最近交易日'}")
-                
-                # 根据不同的数据源获取分笔数据
+            # 根据不同的数据源获取分笔数据
+            if trade_date != latest_date:
+                try:
+                    stock_zh_a_tick_tx_js_df = ak.stock_zh_a_tick_163(symbol=symbol, trade_date=trade_date.replace('-', ''))
+                    data_source = "网易财经"
+                    logger.info(f"使用网易财经数据源获取股票{symbol}分笔数据成功")
+                except Exception as e:
+                    logger.error(f"使用网易财经数据源获取股票{symbol} {trade_date}分笔数据失败: {str(e)}")
+                    return {"status": "error", "message": f"获取股票{symbol} {trade_date}分笔数据失败: {str(e)}"}
+            else:
                 try:
                     # 先尝试使用腾讯财经的数据源
                     stock_zh_a_tick_tx_js_df = ak.stock_zh_a_tick_tx_js(symbol=symbol)
@@ -110,112 +173,85 @@ class StockTickDal(DalBase):
                     logger.warning(f"使用腾讯财经数据源获取股票{symbol}分笔数据失败: {str(e1)}")
                     try:
                         # 如果腾讯财经失败，尝试使用新浪财经的数据源
-                        if date:
-                            stock_zh_a_tick_tx_js_df = ak.stock_zh_a_tick_163(symbol=symbol, trade_date=date)
-                        else:
-                            stock_zh_a_tick_tx_js_df = ak.stock_intraday_sina(symbol=symbol)
+                        stock_zh_a_tick_tx_js_df = ak.stock_intraday_sina(symbol=symbol)
                         data_source = "新浪财经"
                         logger.info(f"使用新浪财经数据源获取股票{symbol}分笔数据成功")
                     except Exception as e2:
                         logger.error(f"使用新浪财经数据源获取股票{symbol}分笔数据失败: {str(e2)}")
                         return {
-                            "status": "error", 
+                            "status": "error",
                             "message": f"获取股票{symbol}分笔数据失败: 腾讯财经和新浪财经数据源均不可用"
                         }
-                
-                # 检查数据是否为空
-                if stock_zh_a_tick_tx_js_df is None or stock_zh_a_tick_tx_js_df.empty:
-                    logger.warning(f"股票{symbol}分笔数据为空，可能是非交易日或数据不可用")
-                    return {
-                        "status": "warning", 
-                        "message": f"股票{symbol}分笔数据为空，可能是非交易日或数据不可用"
-                    }
-                
-                logger.info(f"从akshare获取股票{symbol}分笔数据成功，共{len(stock_zh_a_tick_tx_js_df)}条记录")
-                
-                # 保存到本地缓存
-                self._save_stock_tick_to_cache(symbol, stock_zh_a_tick_tx_js_df, date)
-            else:
-                stock_zh_a_tick_tx_js_df = cached_df
-                data_source = "本地缓存"
-                logger.info(f"使用本地缓存的股票{symbol}分笔数据，共{len(stock_zh_a_tick_tx_js_df)}条记录")
-            
-            # 将数据写入文件
-            with open(f"logs/stock_tick_{symbol}_{date or 'latest'}.txt", "w", encoding="utf-8") as f:
-                f.write(f"股票{symbol}分笔数据，日期: {date or '最近交易日'}，数据源: {data_source}:\n")
-                f.write(str(stock_zh_a_tick_tx_js_df))
-            
-            success_count = 0
-            update_count = 0
-            
-            # 安全地转换数值
-            def safe_convert(value, convert_func=float, default=None):
-                if value is None or value == '':
-                    return default
-                try:
-                    if isinstance(value, str):
-                        return convert_func(value.replace(',', ''))
-                    return convert_func(value)
-                except (ValueError, TypeError):
-                    logger.warning(f"转换值失败: {value}")
-                    return default
-            
-            # 处理每一行数据
-            for _, row in stock_zh_a_tick_tx_js_df.iterrows():
-                # 根据不同数据源处理字段
-                if data_source == "腾讯财经":
-                    trade_time = row.get('成交时间', '')
-                    price = safe_convert(row.get('成交价格'), float, 0.0)
-                    volume = safe_convert(row.get('成交量'), int, 0)
-                    amount = safe_convert(row.get('成交额'), float, 0.0)
-                    direction = row.get('性质', '')
-                    price_change = safe_convert(row.get('价格变动'), float, 0.0)
-                elif data_source == "新浪财经":
-                    trade_time = row.get('ticktime', '')
-                    price = safe_convert(row.get('price'), float, 0.0)
-                    volume = safe_convert(row.get('volume'), int, 0)
-                    amount = volume * price  # 新浪财经没有成交额，需要自己计算
-                    direction = "买盘" if row.get('kind') == 'B' else ("卖盘" if row.get('kind') == 'S' else "中性盘")
-                    price_change = safe_convert(row.get('prev_price'), float, 0.0) - price if row.get('prev_price') else None
-                else:  # 本地缓存
-                    trade_time = row.get('trade_time', '')
-                    price = safe_convert(row.get('price'), float, 0.0)
-                    volume = safe_convert(row.get('volume'), int, 0)
-                    amount = safe_convert(row.get('amount'), float, 0.0)
-                    direction = row.get('direction', '')
-                    price_change = safe_convert(row.get('price_change'), float, None)
-                
-                # 检查数据是否已存在
-                exist_data = await self.get_data_by_filter(
-                    symbol=symbol, 
-                    trade_time=trade_time
-                )
-                
-                # 创建数据对象
-                data = schemas.StockTick(
-                    symbol=symbol,
-                    trade_time=trade_time,
-                    price=price,
-                    volume=volume,
-                    amount=amount,
-                    direction=direction,
-                    price_change=price_change
-                )
-                
-                if exist_data:
-                    # 更新数据
-                    await self.put_data(exist_data.id, data)
-                    update_count += 1
-                else:
-                    # 创建数据
-                    await self.create_data(data=data)
-                    success_count += 1
-            
-            logger.info(f"股票{symbol}分笔数据同步完成，新增: {success_count}，更新: {update_count}")
+
+            # 检查数据是否为空
+            if stock_zh_a_tick_tx_js_df is None or stock_zh_a_tick_tx_js_df.empty:
+                logger.warning(f"股票{symbol}分笔数据为空，可能是非交易日或数据不可用")
+                return {
+                    "status": "warning", 
+                    "message": f"股票{symbol}分笔数据为空，可能是非交易日或数据不可用"
+                }
+
+            tick_df = self._normalize_tick_frame(stock_zh_a_tick_tx_js_df)
+            count = tick_store.write_frame(symbol, trade_date, tick_df)
+            logger.info(f"股票{symbol} {trade_date}分笔数据同步完成，数据源: {data_source}，共{count}条记录")
             return {
                 "status": "success", 
-                "message": f"股票{symbol}分笔数据同步完成，新增: {success_count}，更新: {update_count}"
+                "message": f"股票{symbol} {trade_date}分笔数据同步完成，共{count}条记录"
             }
         except Exception as e:
             logger.error(f"股票{symbol}分笔数据同步失败: {str(e)}", exc_info=True)
-            return {"status": "error", "message": f"股票{symbol}分笔数据同步失败: {str(e)}"} 
\ No newline at end of file
+            return {"status": "error", "message": f"股票{symbol}分笔数据同步失败: {str(e)}"}
+
+    async def compact_stock_tick(self, symbol: str = None) -> dict:
+        """
+        分笔数据压缩任务
+
+        将 MySQL 中逐笔保存的历史分笔数据与旧版 stock_tick.csv 缓存按股票、交易日合并进分笔存储，
+        分区不存在或已有分区记录较少时写入，之后删除对应的 MySQL 记录，CSV 缓存全部迁移后删除
+        :param symbol: 股票代码，为空时处理全部股票
+        """
+        try:
+            day = func.substr(self.model.trade_time, 1, 10)
+            sql = select(self.model.symbol, day).where(self.model.is_delete == False).distinct()
+            if symbol:
+                sql = sql.where(self.model.symbol == symbol)
+            partitions = (await self.db.execute(sql)).all()
+
+            row_count = 0
+            for tick_symbol, trade_date in partitions:
+                where = [self.model.symbol == tick_symbol, day == trade_date]
+                rows = (await self.db.execute(
+                    select(
+                        self.model.trade_time, self.model.price, self.model.volume, self.model.amount, self.model.direction
+                    ).where(*where, self.model.is_delete == False)
+                )).all()
+                tick_df = self._normalize_mysql_volume(
+                    pd.DataFrame(rows, columns=["trade_time", "price", "volume", "amount", "direction"])
+                )
+                tick_store.merge(tick_symbol, trade_date, TickStore.encode(tick_df))
+                await self.db.execute(delete(self.model).where(*where))
+                await self.flush()
+                row_count += len(rows)
+            if partitions:
+                self.invalidate_cache()
+
+            csv_count = 0
+            if not symbol and os.path.exists(STOCK_TICK_CACHE_FILE):
+                cache_df = self._normalize_tick_frame(
+                    pd.read_csv(STOCK_TICK_CACHE_FILE, encoding='utf-8', dtype={'symbol': str})
+                )
+                if 'trade_time' in cache_df.columns:
+                    # 旧缓存只含时间时以缓存更新日期作为交易日期
+                    trade_time = cache_df['trade_time'].astype(str)
+                    cache_df['trade_date'] = trade_time.str[:10].where(trade_time.str.len() > 8, cache_df['update_date'])
+                    for (tick_symbol, trade_date), group in cache_df.groupby(['symbol', 'trade_date']):
+                        tick_store.merge(tick_symbol, trade_date, TickStore.encode(group))
+                        csv_count += len(group)
+                os.remove(STOCK_TICK_CACHE_FILE)
+
+            message = f"分笔数据压缩完成，分区: {len(partitions)}，迁移 MySQL 记录: {row_count}，迁移缓存记录: {csv_count}"
+            logger.info(message)
+            return {"status": "success", "message": message}
+        except Exception as e:
+            logger.error(f"分笔数据压缩失败: {str(e)}", exc_info=True)
+            return {"status": "error", "message": f"分笔数据压缩失败: {str(e)}"}
@@ -1,2 +1,2 @@
-from .stock import StockInfo, StockDaily, StockMinute, StockTick
+from .stock import StockInfo, StockDaily, StockMinute, StockTick, StockAdjustFactor
 from .stock_market import SseMarket, SzseMarket
\ No newline at end of file
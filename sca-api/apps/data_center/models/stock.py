@@ -100,3 +100,13 @@ class StockTick(BaseModel):
     amount: Mapped[float] = mapped_column(Float, comment="成交额（元）")
     direction: Mapped[str] = mapped_column(String(10), comment="交易方向：买盘、卖盘、中性盘")
     price_change: Mapped[float] = mapped_column(Float, nullable=True, comment="价格变动")
+
+
+class StockAdjustFactor(BaseModel):
+    """股票复权因子表"""
+    __tablename__ = "data_stock_adjust_factor"
+    __table_args__ = ({'comment': '股票复权因子表'})
+
+    symbol: Mapped[str] = mapped_column(String(20), index=True, nullable=False, comment="股票代码")
+    trade_date: Mapped[str] = mapped_column(String(10), index=True, nullable=False, comment="除权除息日期，自该日起生效")
+    hfq_factor: Mapped[float] = mapped_column(Float(53), nullable=False, comment="后复权因子，前复权因子由其与最新因子之比得出")
@@ -1,4 +1,4 @@
-from fastapi import Depends
+from fastapi import Depends, Query
 from infra.core.dependencies import Paging, QueryParams
 
 
@@ -38,7 +38,7 @@ class StockDailyParams(QueryParams):
             trade_date: str = None,
             start_date: str = None,
             end_date: str = None,
-            adjust_flag: str = None
+            adjust: str = ""
     ):
         super().__init__(params)
         self.v_order = "desc"
@@ -46,7 +46,8 @@ class StockDailyParams(QueryParams):
         self.symbol = symbol
         self.stock_id = stock_id
         self.trade_date = trade_date
-        self.adjust_flag = adjust_flag
+        # 复权类型在读取时计算，不作为查询条件
+        self.adjust = adjust
         
         # 处理日期范围查询
         if start_date:
@@ -68,7 +69,7 @@ class StockMinuteParams(QueryParams):
             trade_time: str = None,
             start_time: str = None,
             end_time: str = None,
-            adjust_flag: str = None
+            adjust: str = ""
     ):
         super().__init__(params)
         self.v_order = "desc"
@@ -76,7 +77,8 @@ class StockMinuteParams(QueryParams):
         self.symbol = symbol
         self.period = period
         self.trade_time = trade_time
-        self.adjust_flag = adjust_flag
+        # 复权类型在读取时计算，不作为查询条件
+        self.adjust = adjust
         
         # 处理时间范围查询
         if start_time:
@@ -88,28 +90,20 @@ class StockMinuteParams(QueryParams):
 
 
 class StockTickParams(QueryParams):
-    """股票分笔数据查询参数"""
+    """股票分笔数据查询参数，数据从分笔存储读取"""
 
     def __init__(
             self,
             params: Paging = Depends(),
-            symbol: str = None,
-            trade_time: str = None,
-            start_time: str = None,
-            end_time: str = None,
-            direction: str = None
+            symbol: str = Query(..., description="股票代码"),
+            date: str = Query(..., description="交易日期，格式 YYYYMMDD 或 YYYY-MM-DD"),
+            start_time: str = Query(None, description="开始时间，格式 HH:MM:SS"),
+            end_time: str = Query(None, description="结束时间，格式 HH:MM:SS"),
+            direction: str = Query(None, description="成交方向：买盘、卖盘、中性盘")
     ):
         super().__init__(params)
-        self.v_order = "desc"
-        self.v_order_field = "trade_time"
         self.symbol = symbol
-        self.trade_time = trade_time
+        self.date = date
+        self.start_time = start_time
+        self.end_time = end_time
         self.direction = direction
-        
-        # 处理时间范围查询
-        if start_time:
-            self.trade_time = (">=", start_time)
-        if end_time:
-            self.trade_time = ("<=", end_time)
-        if start_time and end_time:
-            self.trade_time = ("between", [start_time, end_time]) 
\ No newline at end of file
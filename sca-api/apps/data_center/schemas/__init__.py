@@ -4,5 +4,6 @@ from .stock import (
     StockInfo, StockInfoOut, StockInfoListOut, StockInfoSimpleOut,
     StockDaily, StockDailyOut, StockDailyListOut,
     StockMinute, StockMinuteOut, StockMinuteListOut,
-    StockTick, StockTickOut, StockTickListOut
+    StockTick, StockTickOut, StockTickListOut,
+    StockAdjustFactor, StockAdjustFactorOut
 ) 
\ No newline at end of file
@@ -190,4 +190,19 @@ class StockTickOut(StockTick):
 
 
 class StockTickListOut(StockTickOut):
-    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# 股票复权因子相关模型
+class StockAdjustFactor(BaseModel):
+    symbol: str | None = None
+    trade_date: str | None = None
+    hfq_factor: float | None = None
+
+
+class StockAdjustFactorOut(StockAdjustFactor):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    update_datetime: DatetimeStr
+    create_datetime: DatetimeStr
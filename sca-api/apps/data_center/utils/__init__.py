@@ -0,0 +1,3 @@
+from .minute_resample import MinuteResampler, MINUTE_PERIOD, ROLLUP_PERIODS, DAILY_PERIOD
+from .price_adjust import PriceAdjuster, ADJUST_NONE, ADJUST_QFQ, ADJUST_HFQ, ADJUST_TYPES
+from .tick_store import TickStore, TICK_DTYPE
@@ -0,0 +1,123 @@
+"""
+分钟线重采样
+
+基于已入库的 1 分钟线派生 5/15/30/60 分钟线与日线，按 A 股交易时段切分：
+上午 09:30-11:30，下午 13:00-15:00，每个时段 120 分钟，K 线以区间结束时间标记，
+09:30 的集合竞价成交并入当日第一根 K 线，下午的 K 线不会跨越午间休市与上午合并。
+"""
+import pandas as pd
+
+# 上游唯一需要获取的周期
+MINUTE_PERIOD = "1"
+# 由 1 分钟线派生的分钟周期
+ROLLUP_PERIODS = ["5", "15", "30", "60"]
+# 由 1 分钟线派生的日线周期
+DAILY_PERIOD = "daily"
+
+# 交易时段，单位：当日分钟数
+MORNING_OPEN = 9 * 60 + 30
+MORNING_CLOSE = 11 * 60 + 30
+AFTERNOON_OPEN = 13 * 60
+AFTERNOON_CLOSE = 15 * 60
+SESSION_MINUTES = MORNING_CLOSE - MORNING_OPEN
+TRADING_MINUTES = SESSION_MINUTES + AFTERNOON_CLOSE - AFTERNOON_OPEN
+
+
+class MinuteResampler:
+    """
+    1 分钟线聚合器
+
+    开盘价取区间第一笔，收盘价取最后一笔，最高/最低价取极值，成交量与成交额求和，
+    均价沿用数据源含义（当日累计均价），取区间最后一根 1 分钟线的值。
+    """
+
+    AGGREGATIONS = {
+        "open_price": "first",
+        "high_price": "max",
+        "low_price": "min",
+        "close_price": "last",
+        "volume": "sum",
+        "amount": "sum",
+        "avg_price": "last",
+    }
+
+    def __init__(self, minute_df: pd.DataFrame):
+        """
+        :param minute_df: 1 分钟线数据，至少包含 trade_time 与 AGGREGATIONS 中的列
+        """
+        df = minute_df.copy()
+        if "avg_price" not in df.columns:
+            df["avg_price"] = None
+        df["trade_time"] = pd.to_datetime(df["trade_time"])
+        df = df.sort_values("trade_time").drop_duplicates("trade_time", keep="last")
+        df["trade_date"] = df["trade_time"].dt.strftime("%Y-%m-%d")
+        df["session_offset"] = self.session_offset(df["trade_time"])
+        self.df = df
+
+    @staticmethod
+    def session_offset(trade_time: pd.Series) -> pd.Series:
+        """
+        计算 K 线结束时间在当日连续交易时间轴上的分钟偏移量
+
+        09:31 -> 1，11:30 -> 120，13:01 -> 121，15:00 -> 240，09:30 集合竞价归入 1
+        :param trade_time: datetime 序列
+        """
+        minutes = trade_time.dt.hour * 60 + trade_time.dt.minute
+        morning = minutes - MORNING_OPEN
+        afternoon = minutes - AFTERNOON_OPEN + SESSION_MINUTES
+        return morning.where(minutes <= MORNING_CLOSE, afternoon).clip(lower=1, upper=TRADING_MINUTES)
+
+    @staticmethod
+    def offset_to_clock(offset: pd.Series) -> pd.Series:
+        """
+        将分钟偏移量还原为 HH:MM:SS 时间字符串
+        :param offset: 分钟偏移量
+        """
+        minutes = (offset + MORNING_OPEN).where(offset <= SESSION_MINUTES, offset - SESSION_MINUTES + AFTERNOON_OPEN)
+        return (
+            (minutes // 60).astype(int).astype(str).str.zfill(2)
+            + ":"
+            + (minutes % 60).astype(int).astype(str).str.zfill(2)
+            + ":00"
+        )
+
+    def resample(self, period: str) -> pd.DataFrame:
+        """
+        聚合为指定分钟周期
+        :param period: 分钟周期，如 5、15、30、60
+        :return: 以区间结束时间标记的 K 线，trade_time 格式：YYYY-MM-DD HH:MM:SS
+        """
+        if self.df.empty:
+            return pd.DataFrame(columns=["trade_time", *self.AGGREGATIONS.keys()])
+        minutes = int(period)
+        if SESSION_MINUTES % minutes != 0:
+            raise ValueError(f"不支持的分钟周期：{period}")
+        bucket = (self.df["session_offset"] + minutes - 1) // minutes * minutes
+        result = self.df.groupby([self.df["trade_date"], bucket], sort=True).agg(self.AGGREGATIONS)
+        result.index.names = ["trade_date", "bucket"]
+        result = result.reset_index()
+        result["trade_time"] = result["trade_date"] + " " + self.offset_to_clock(result["bucket"])
+        return result.drop(columns=["trade_date", "bucket"])
+
+    def daily(self) -> pd.DataFrame:
+        """
+        聚合为日线
+        :return: trade_time 为当日收盘时间 YYYY-MM-DD 15:00:00
+        """
+        if self.df.empty:
+            return pd.DataFrame(columns=["trade_time", *self.AGGREGATIONS.keys()])
+        result = self.df.groupby("trade_date", sort=True).agg(self.AGGREGATIONS).reset_index()
+        result["trade_time"] = result["trade_date"] + " 15:00:00"
+        return result.drop(columns=["trade_date"])
+
+    def rollups(self, periods: list[str] = None, include_daily: bool = True) -> dict[str, pd.DataFrame]:
+        """
+        一次性生成所有派生周期
+        :param periods: 分钟周期列表，默认 ROLLUP_PERIODS
+        :param include_daily: 是否包含日线
+        :return: {周期: K 线数据}
+        """
+        result = {period: self.resample(period) for period in (periods or ROLLUP_PERIODS)}
+        if include_daily:
+            result[DAILY_PERIOD] = self.daily()
+        return result
@@ -0,0 +1,83 @@
+"""
+读取时复权
+
+数据库只保存不复权行情与后复权因子，前复权、后复权价格在读取时计算：
+后复权价格 = 不复权价格 × 当日后复权因子
+前复权价格 = 不复权价格 × 当日后复权因子 ÷ 最新后复权因子
+新的除权除息事件只需在复权因子表中追加一行，行情数据无需重新获取。
+"""
+import numpy as np
+import pandas as pd
+
+# 不复权
+ADJUST_NONE = ""
+# 前复权
+ADJUST_QFQ = "qfq"
+# 后复权
+ADJUST_HFQ = "hfq"
+ADJUST_TYPES = [ADJUST_NONE, ADJUST_QFQ, ADJUST_HFQ]
+
+# 需要复权的价格字段，成交量、成交额及涨跌幅保持不变
+PRICE_FIELDS = ["open_price", "high_price", "low_price", "close_price", "pre_close", "avg_price", "change_amount"]
+
+
+class PriceAdjuster:
+    """
+    向量化复权计算器
+    """
+
+    def __init__(self, factor_df: pd.DataFrame):
+        """
+        :param factor_df: 单只股票的复权因子，包含 trade_date 与 hfq_factor 列
+        """
+        factor_df = factor_df.sort_values("trade_date")
+        self.dates = factor_df["trade_date"].to_numpy(dtype=str)
+        self.factors = factor_df["hfq_factor"].to_numpy(dtype=float)
+
+    def factors_for(self, trade_dates: np.ndarray, adjust: str) -> np.ndarray:
+        """
+        获取每个交易日对应的复权乘数
+        :param trade_dates: 交易日期数组，格式 YYYY-MM-DD，分钟数据可传入 trade_time 的前 10 位
+        :param adjust: 复权类型
+        """
+        if adjust not in ADJUST_TYPES:
+            raise ValueError(f"不支持的复权类型：{adjust}")
+        if adjust == ADJUST_NONE or self.factors.size == 0:
+            return np.ones(len(trade_dates))
+        # 除权日当天即使用新的因子，早于第一条因子记录的日期使用第一条因子
+        index = np.searchsorted(self.dates, trade_dates, side="right") - 1
+        factors = self.factors[np.clip(index, 0, None)]
+        if adjust == ADJUST_QFQ:
+            factors = factors / self.factors[-1]
+        return factors
+
+    def adjust_frame(self, df: pd.DataFrame, adjust: str, date_field: str = "trade_date") -> pd.DataFrame:
+        """
+        对行情数据复权
+        :param df: 单只股票的不复权行情
+        :param adjust: 复权类型
+        :param date_field: 日期字段，分钟数据为 trade_time
+        :return: 复权后的副本，adjust_flag 更新为对应复权类型
+        """
+        df = df.copy()
+        if df.empty:
+            return df
+        factors = self.factors_for(df[date_field].astype(str).str[:10].to_numpy(), adjust)
+        for field in PRICE_FIELDS:
+            if field in df.columns:
+                df[field] = (pd.to_numeric(df[field], errors="coerce") * factors).round(4)
+        if "adjust_flag" in df.columns:
+            df["adjust_flag"] = adjust
+        return df
+
+    def adjust_datas(self, datas: list[dict], adjust: str, date_field: str = "trade_date") -> list[dict]:
+        """
+        对序列化后的行情数据复权
+        :param datas: 单只股票的不复权行情
+        :param adjust: 复权类型
+        :param date_field: 日期字段，分钟数据为 trade_time
+        """
+        if not datas or adjust == ADJUST_NONE:
+            return datas
+        df = self.adjust_frame(pd.DataFrame(datas), adjust, date_field)
+        return df.astype(object).where(df.notna(), None).to_dict(orient="records")
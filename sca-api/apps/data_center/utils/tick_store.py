@@ -0,0 +1,158 @@
+"""
+分笔数据紧凑存储
+
+每只股票每个交易日保存为一个 numpy 结构化数组文件：{root}/{symbol}/{YYYY-MM-DD}.npy，
+每笔成交 13 字节：
+time       int32  当日秒数，如 09:30:00 -> 34200
+price      int32  成交价，单位：分
+volume     int32  成交量，单位：手
+direction  int8   成交方向：1 买盘，-1 卖盘，0 中性盘
+成交额与价格变动可由以上字段计算，不再单独存储；读取时以内存映射方式打开，不经过 MySQL。
+"""
+import os
+import numpy as np
+import pandas as pd
+
+TICK_DTYPE = np.dtype([
+    ("time", "<i4"),
+    ("price", "<i4"),
+    ("volume", "<i4"),
+    ("direction", "i1"),
+])
+
+DIRECTION_CODES = {"买盘": 1, "卖盘": -1, "中性盘": 0}
+DIRECTION_NAMES = {code: name for name, code in DIRECTION_CODES.items()}
+
+
+class TickStore:
+    """
+    按股票、交易日分区的分笔数据存储
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: 存储根目录
+        """
+        self.root = root
+
+    def path(self, symbol: str, date: str) -> str:
+        """
+        分区文件路径
+        :param symbol: 股票代码
+        :param date: 交易日期，格式 YYYY-MM-DD
+        """
+        return os.path.join(self.root, symbol, f"{date}.npy")
+
+    def exists(self, symbol: str, date: str) -> bool:
+        return os.path.exists(self.path(symbol, date))
+
+    def list_dates(self, symbol: str) -> list[str]:
+        """
+        获取已存储的交易日期
+        :param symbol: 股票代码
+        """
+        directory = os.path.join(self.root, symbol)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(directory) if name.endswith(".npy"))
+
+    @staticmethod
+    def encode(df: pd.DataFrame) -> np.ndarray:
+        """
+        将分笔数据编码为紧凑数组，按时间排序，同一时间的成交保持原有顺序
+        :param df: 包含 trade_time、price、volume、direction 列，trade_time 可为 HH:MM:SS 或 YYYY-MM-DD HH:MM:SS
+        """
+        clock = df["trade_time"].astype(str).str[-8:].str.split(":", expand=True).astype(int)
+        ticks = np.empty(len(df), dtype=TICK_DTYPE)
+        ticks["time"] = (clock[0] * 3600 + clock[1] * 60 + clock[2]).to_numpy()
+        ticks["price"] = np.rint(pd.to_numeric(df["price"], errors="coerce").fillna(0).to_numpy() * 100)
+        ticks["volume"] = pd.to_numeric(df["volume"], errors="coerce").fillna(0).to_numpy()
+        ticks["direction"] = df["direction"].map(DIRECTION_CODES).fillna(0).to_numpy()
+        return ticks[np.argsort(ticks["time"], kind="stable")]
+
+    @staticmethod
+    def decode(ticks: np.ndarray, date: str) -> pd.DataFrame:
+        """
+        将紧凑数组还原为与 StockTick 字段一致的 DataFrame
+        :param ticks: 分笔数组
+        :param date: 交易日期，格式 YYYY-MM-DD
+        """
+        seconds = ticks["time"].astype(np.int64)
+        price = ticks["price"] / 100
+        volume = ticks["volume"].astype(np.int64)
+        clock = pd.to_timedelta(seconds, unit="s") + pd.Timestamp(date)
+        price_change = np.diff(price, prepend=price[0] if len(price) else 0)
+        return pd.DataFrame({
+            "trade_time": clock.strftime("%Y-%m-%d %H:%M:%S"),
+            "price": price,
+            "volume": volume,
+            "amount": price * volume * 100,
+            "direction": pd.Series(ticks["direction"]).map(DIRECTION_NAMES).to_numpy(),
+            "price_change": np.round(price_change, 2),
+        })
+
+    def write(self, symbol: str, date: str, ticks: np.ndarray) -> int:
+        """
+        写入一个交易日的分笔数据，先写临时文件再原子替换，读取方不会看到半写入的文件
+        :param symbol: 股票代码
+        :param date: 交易日期，格式 YYYY-MM-DD
+        :param ticks: 分笔数组
+        :return: 写入的记录数
+        """
+        path = self.path(symbol, date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(ticks, dtype=TICK_DTYPE))
+        os.replace(tmp_path, path)
+        return len(ticks)
+
+    def write_frame(self, symbol: str, date: str, df: pd.DataFrame) -> int:
+        """
+        编码并写入一个交易日的分笔数据
+        """
+        return self.write(symbol, date, self.encode(df))
+
+    def read(self, symbol: str, date: str) -> np.ndarray | None:
+        """
+        以内存映射方式读取一个交易日的分笔数组
+        :return: 不存在时返回 None
+        """
+        path = self.path(symbol, date)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def read_frame(self, symbol: str, date: str, start_time: str = None, end_time: str = None) -> pd.DataFrame | None:
+        """
+        读取一个交易日的分笔数据
+        :param symbol: 股票代码
+        :param date: 交易日期，格式 YYYY-MM-DD
+        :param start_time: 开始时间，格式 HH:MM:SS，可选
+        :param end_time: 结束时间，格式 HH:MM:SS，可选
+        """
+        ticks = self.read(symbol, date)
+        if ticks is None:
+            return None
+        if start_time or end_time:
+            # 数组按时间有序，二分定位区间
+            lower = np.searchsorted(ticks["time"], self.to_seconds(start_time or "00:00:00"), side="left")
+            upper = np.searchsorted(ticks["time"], self.to_seconds(end_time or "23:59:59"), side="right")
+            ticks = ticks[lower:upper]
+        return self.decode(ticks, date)
+
+    def merge(self, symbol: str, date: str, ticks: np.ndarray) -> int:
+        """
+        合并写入：每个数据源保存的都是一个交易日的完整快照，分区不存在时直接写入，
+        已存在时保留记录数较多（更完整）的一份，不按记录去重，同一秒内相同的成交都是有效记录
+        :return: 分区最终的记录数
+        """
+        existing = self.read(symbol, date)
+        if existing is not None and len(existing) >= len(ticks):
+            return len(existing)
+        return self.write(symbol, date, ticks)
+
+    @staticmethod
+    def to_seconds(clock: str) -> int:
+        hour, minute, second = (int(value) for value in clock[-8:].split(":"))
+        return hour * 3600 + minute * 60 + second
@@ -3,3 +3,4 @@ from .stock_daily import app as stock_daily_app
 from .stock_minute import app as stock_minute_app
 from .stock_tick import app as stock_tick_app
 from .stock_market import app as stock_market_app
+from .stock_analytics import app as stock_analytics_app
@@ -0,0 +1,60 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+
+from apps.user.utils.current import AllUserAuth
+from apps.user.utils.validation.auth import Auth
+from infra.utils.response import SuccessResponse
+from apps.data_center.curd.stock_analytics_dal import StockAnalyticsDal
+
+app = APIRouter()
+
+
+###########################################################
+#    股票横截面统计
+###########################################################
+@app.get("/stock/analytics/breadth", summary="获取市场涨跌统计")
+async def get_market_breadth(
+    trade_date: str = Query(..., description="交易日期"),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    获取指定交易日的涨跌家数、涨跌停家数与成交额汇总
+    """
+    return SuccessResponse(await StockAnalyticsDal(auth.db).get_market_breadth(trade_date))
+
+
+@app.get("/stock/analytics/ranking", summary="获取股票排行")
+async def get_stock_ranking(
+    trade_date: str = Query(..., description="交易日期"),
+    field: Literal["change_percent", "turnover_rate", "amount", "amplitude"] = Query("change_percent", description="排名字段"),
+    limit: int = Query(20, ge=1, le=200, description="返回数量"),
+    desc: bool = Query(True, description="是否降序，涨幅榜为 true，跌幅榜为 false"),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    获取指定交易日的涨幅榜、跌幅榜、换手率榜或成交额榜
+    """
+    return SuccessResponse(await StockAnalyticsDal(auth.db).get_rankings(trade_date, field, limit, desc))
+
+
+@app.get("/stock/analytics/industry", summary="获取行业统计")
+async def get_industry_stats(
+    trade_date: str = Query(..., description="交易日期"),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    获取指定交易日按行业汇总的涨跌家数、平均涨跌幅、成交额及领涨股
+    """
+    return SuccessResponse(await StockAnalyticsDal(auth.db).get_industry_stats(trade_date))
+
+
+@app.get("/stock/analytics/limit", summary="获取涨跌停股票")
+async def get_limit_stocks(
+    trade_date: str = Query(..., description="交易日期"),
+    direction: Literal["up", "down"] = Query("up", description="up 涨停，down 跌停"),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    获取指定交易日的涨停或跌停股票及数量
+    """
+    return SuccessResponse(await StockAnalyticsDal(auth.db).get_limit_stocks(trade_date, direction))
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import joinedload
 
-from apps.user.utils.current import AllUserAuth
+from apps.user.utils.current import AllUserAuth, FullAdminAuth
 from apps.user.utils.validation.auth import Auth
 from infra.utils.response import SuccessResponse
 from apps.data_center import schemas, params, models
 from apps.data_center.curd.stock_daily_dal import StockDailyDal
+from apps.data_center.curd.stock_adjust_factor_dal import StockAdjustFactorDal
+from infra.utils.excel.stream_export import StreamExport
 
 app = APIRouter()
 
@@ -17,17 +22,23 @@ app = APIRouter()
 async def get_stock_dailies(p: params.StockDailyParams = Depends(), auth: Auth = Depends(AllUserAuth())):
     """
     获取股票日线数据列表
+
+    - adjust: 复权类型，可选值：空字符串(不复权)、qfq(前复权)、hfq(后复权)，基于复权因子在读取时计算
     """
     model = models.StockDaily
     options = [joinedload(model.stock_info)]
     schema = schemas.StockDailyListOut
-    datas, count = await StockDailyDal(auth.db).get_datas(
-        **p.dict(),
+    datas, count, cursor = await StockDailyDal(auth.db).get_datas(
+        **p.dict(exclude=["adjust"]),
         v_options=options,
         v_schema=schema,
-        v_return_count=True
+        v_return_count=True,
+        v_return_cursor=True,
+        v_estimated_count=True,
+        v_cache_ttl=60
     )
-    return SuccessResponse(datas, count=count)
+    datas = await StockAdjustFactorDal(auth.db).adjust_datas(datas, p.adjust)
+    return SuccessResponse(datas, count=count, cursor=cursor)
 
 
 @app.get("/stock/daily/{data_id}", summary="获取股票日线数据详情")
@@ -50,21 +61,82 @@ async def sync_stock_daily(
     symbol: str, 
     start_date: str, 
     end_date: str, 
-    adjust: str = "", 
     auth: Auth = Depends(AllUserAuth())
 ):
     """
     同步股票日线数据
+
+    只同步不复权数据及复权因子，复权数据在查询时通过 adjust 参数计算
     
     - symbol: 股票代码，如 000001
     - start_date: 开始日期，格式 YYYYMMDD
     - end_date: 结束日期，格式 YYYYMMDD
-    - adjust: 复权类型，可选值：空字符串(不复权)、qfq(前复权)、hfq(后复权)
     """
     result = await StockDailyDal(auth.db).sync_stock_daily(
         symbol=symbol, 
         start_date=start_date, 
-        end_date=end_date,
-        adjust=adjust
+        end_date=end_date
+    )
+    return SuccessResponse(result)
+
+
+@app.post("/stock/daily/export", summary="导出股票日线数据为excel")
+async def export_stock_daily(
+    header: list = Body(..., title="表头与对应字段"),
+    oss: bool = False,
+    p: params.StockDailyParams = Depends(),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    导出全部符合条件的不复权日线数据，按批次流式写入文件，不受分页参数影响
+
+    - header: 表头与对应字段，如 [{"label": "交易日期", "field": "trade_date"}]
+    - oss: 是否上传到 OSS，否则保存在 static 目录
+    """
+    return SuccessResponse(await StreamExport(header).export_xlsx(
+        StockDailyDal(auth.db),
+        "股票日线数据",
+        oss_path="export/stock_daily" if oss else None,
+        **p.dict(exclude=["adjust"])
+    ))
+
+
+@app.post("/stock/daily/export/csv", summary="流式导出股票日线数据为csv")
+async def export_stock_daily_csv(
+    header: list = Body(..., title="表头与对应字段"),
+    p: params.StockDailyParams = Depends(),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    边查询边输出不复权日线数据，适用于百万行级别的导出
+    """
+    content = await StreamExport(header).export_csv(StockDailyDal(auth.db), **p.dict(exclude=["adjust"]))
+    filename = quote("股票日线数据.csv")
+    return StreamingResponse(
+        content,
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"}
     )
-    return SuccessResponse(result) 
\ No newline at end of file
+
+
+###########################################################
+#    股票复权因子
+###########################################################
+@app.post("/stock/adjust-factor/sync", summary="同步股票复权因子")
+async def sync_stock_adjust_factor(symbol: str, auth: Auth = Depends(AllUserAuth())):
+    """
+    同步股票复权因子，除权除息后只需同步复权因子，无需重新同步行情数据
+    """
+    return SuccessResponse(await StockAdjustFactorDal(auth.db).sync_adjust_factor(symbol))
+
+
+@app.delete("/stock/adjust-factor/adjusted-bars", summary="删除复权行情副本")
+async def purge_adjusted_bars(
+        auth: Auth = Depends(FullAdminAuth(permissions=["data.stock.adjust.purge"]))
+):
+    """
+    删除历史遗留的前复权、后复权日线与分钟数据，复权行情统一在读取时计算
+
+    不可恢复，只删除已同步复权因子的股票的复权副本
+    """
+    return SuccessResponse(await StockAdjustFactorDal(auth.db).purge_adjusted_bars()) 
\ No newline at end of file
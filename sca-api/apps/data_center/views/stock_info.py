@@ -21,7 +21,8 @@ async def get_stock_infos(p: params.StockInfoParams = Depends(), auth: Auth = De
     datas, count = await StockInfoDal(auth.db).get_datas(
         **p.dict(),
         v_schema=schema,
-        v_return_count=True
+        v_return_count=True,
+        v_cache_ttl=60
     )
     return SuccessResponse(datas, count=count)
 
@@ -35,7 +36,8 @@ async def get_stock_info_options(auth: Auth = Depends(AllUserAuth())):
     return SuccessResponse(await StockInfoDal(auth.db).get_datas(
         limit=0, 
         is_active=True, 
-        v_schema=schema
+        v_schema=schema,
+        v_cache_ttl=300
     ))
 
 
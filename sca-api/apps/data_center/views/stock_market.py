@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 from apps.user.utils.current import AllUserAuth
 from apps.user.utils.validation.auth import Auth
@@ -21,7 +21,8 @@ async def get_sse_markets(p: params.SseMarketParams = Depends(), auth: Auth = De
     datas, count = await SseMarketDal(auth.db).get_datas(
         **p.dict(),
         v_schema=schema,
-        v_return_count=True
+        v_return_count=True,
+        v_cache_ttl=60
     )
     return SuccessResponse(datas, count=count)
 
@@ -44,6 +45,20 @@ async def sync_sse_market(auth: Auth = Depends(AllUserAuth())):
     return SuccessResponse(result)
 
 
+@app.post("/stock/market/sse/backfill", summary="按日期区间回补上交所市场总貌数据")
+async def backfill_sse_market(
+    start_date: str = Query(..., description="开始日期，格式 YYYYMMDD"),
+    end_date: str = Query(..., description="结束日期，格式 YYYYMMDD"),
+    concurrency: int = Query(4, ge=1, le=16, description="最大并发数"),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    按日期区间回补上交所市场总貌数据，已入库的日期自动跳过
+    """
+    result = await SseMarketDal(auth.db).backfill_sse_summary(start_date, end_date, concurrency)
+    return SuccessResponse(result)
+
+
 ###########################################################
 #    深圳证券交易所市场总貌
 ###########################################################
@@ -56,7 +71,8 @@ async def get_szse_markets(p: params.SzseMarketParams = Depends(), auth: Auth =
     datas, count = await SzseMarketDal(auth.db).get_datas(
         **p.dict(),
         v_schema=schema,
-        v_return_count=True
+        v_return_count=True,
+        v_cache_ttl=60
     )
     return SuccessResponse(datas, count=count)
 
@@ -77,3 +93,17 @@ async def sync_szse_market(date: str, auth: Auth = Depends(AllUserAuth())):
     """
     result = await SzseMarketDal(auth.db).sync_szse_summary(date)
     return SuccessResponse(result)
+
+
+@app.post("/stock/market/szse/backfill", summary="按日期区间回补深交所市场总貌数据")
+async def backfill_szse_market(
+    start_date: str = Query(..., description="开始日期，格式 YYYYMMDD"),
+    end_date: str = Query(..., description="结束日期，格式 YYYYMMDD"),
+    concurrency: int = Query(4, ge=1, le=16, description="最大并发数"),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    按日期区间回补深交所市场总貌数据，已入库的日期自动跳过
+    """
+    result = await SzseMarketDal(auth.db).backfill_szse_summary(start_date, end_date, concurrency)
+    return SuccessResponse(result)
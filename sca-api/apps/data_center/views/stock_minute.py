@@ -5,6 +5,7 @@ from apps.user.utils.validation.auth import Auth
 from infra.utils.response import SuccessResponse
 from apps.data_center import schemas, params
 from apps.data_center.curd.stock_minute_dal import StockMinuteDal
+from apps.data_center.curd.stock_adjust_factor_dal import StockAdjustFactorDal
 
 app = APIRouter()
 
@@ -16,14 +17,19 @@ app = APIRouter()
 async def get_stock_minutes(p: params.StockMinuteParams = Depends(), auth: Auth = Depends(AllUserAuth())):
     """
     获取股票分钟数据列表
+
+    - adjust: 复权类型，可选值：空字符串(不复权)、qfq(前复权)、hfq(后复权)，基于复权因子在读取时计算
     """
     schema = schemas.StockMinuteListOut
-    datas, count = await StockMinuteDal(auth.db).get_datas(
-        **p.dict(),
+    datas, count, cursor = await StockMinuteDal(auth.db).get_datas(
+        **p.dict(exclude=["adjust"]),
         v_schema=schema,
-        v_return_count=True
+        v_return_count=True,
+        v_return_cursor=True,
+        v_estimated_count=True
     )
-    return SuccessResponse(datas, count=count)
+    datas = await StockAdjustFactorDal(auth.db).adjust_datas(datas, p.adjust, date_field="trade_time")
+    return SuccessResponse(datas, count=count, cursor=cursor)
 
 
 @app.get("/stock/minute/{data_id}", summary="获取股票分钟数据详情")
@@ -41,23 +47,39 @@ async def sync_stock_minute(
     period: str = Query(..., description="周期，如1、5、15、30、60"),
     start_date: str = None, 
     end_date: str = None, 
-    adjust: str = "", 
     auth: Auth = Depends(AllUserAuth())
 ):
     """
     同步股票分钟数据
+
+    上游只获取 1 分钟数据，5、15、30、60 分钟及日线（period=daily）由 1 分钟数据派生，
+    同步完成后自动重算本次涉及交易日的派生周期
     
     - symbol: 股票代码，如 000001
     - period: 周期，如1、5、15、30、60
     - start_date: 开始日期，格式 YYYY-MM-DD HH:MM:SS，可选
     - end_date: 结束日期，格式 YYYY-MM-DD HH:MM:SS，可选
-    - adjust: 复权类型，可选值：空字符串(不复权)、qfq(前复权)、hfq(后复权)
+
+    只同步不复权数据，复权数据在查询时通过 adjust 参数计算
     """
     result = await StockMinuteDal(auth.db).sync_stock_minute(
         symbol=symbol,
         period=period,
         start_date=start_date,
-        end_date=end_date,
-        adjust=adjust
+        end_date=end_date
     )
-    return SuccessResponse(result) 
\ No newline at end of file
+    return SuccessResponse(result)
+
+
+@app.post("/stock/minute/rollup", summary="重算股票分钟派生周期")
+async def rollup_stock_minute(
+    symbol: str,
+    start_date: str = Query(..., description="开始日期，格式 YYYY-MM-DD"),
+    end_date: str = Query(..., description="结束日期，格式 YYYY-MM-DD"),
+    auth: Auth = Depends(AllUserAuth())
+):
+    """
+    基于已入库的 1 分钟数据重算 5、15、30、60 分钟及日线数据
+    """
+    count = await StockMinuteDal(auth.db).rollup_stock_minute(symbol, start_date, end_date)
+    return SuccessResponse({"status": "success", "message": f"股票{symbol}派生周期重算完成，共{count}条记录"})
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 from apps.user.utils.current import AllUserAuth
 from apps.user.utils.validation.auth import Auth
 from infra.utils.response import SuccessResponse
-from apps.data_center import schemas, params
+from apps.data_center import params
 from apps.data_center.curd.stock_tick_dal import StockTickDal
 
 app = APIRouter()
@@ -15,24 +15,29 @@ app = APIRouter()
 @app.get("/stock/tick", summary="获取股票分笔数据列表")
 async def get_stock_ticks(p: params.StockTickParams = Depends(), auth: Auth = Depends(AllUserAuth())):
     """
-    获取股票分笔数据列表
+    获取股票分笔数据列表，从按交易日分区的分笔存储读取，按成交时间倒序分页
     """
-    schema = schemas.StockTickListOut
-    datas, count = await StockTickDal(auth.db).get_datas(
-        **p.dict(),
-        v_schema=schema,
-        v_return_count=True
+    datas, count = StockTickDal(auth.db).get_stock_ticks(
+        p.symbol, p.date, p.start_time, p.end_time, p.direction, p.page, p.limit
     )
     return SuccessResponse(datas, count=count)
 
 
-@app.get("/stock/tick/{data_id}", summary="获取股票分笔数据详情")
-async def get_stock_tick(data_id: int, auth: Auth = Depends(AllUserAuth())):
+@app.get("/stock/tick/store", summary="获取分笔存储中的股票分笔数据")
+async def get_stock_tick_store(
+    symbol: str,
+    date: str = Query(..., description="交易日期，格式 YYYYMMDD 或 YYYY-MM-DD"),
+    start_time: str = Query(None, description="开始时间，格式 HH:MM:SS"),
+    end_time: str = Query(None, description="结束时间，格式 HH:MM:SS"),
+    auth: Auth = Depends(AllUserAuth())
+):
     """
-    获取股票分笔数据详情
+    从按交易日分区的分笔存储读取数据，不查询 MySQL
     """
-    schema = schemas.StockTickOut
-    return SuccessResponse(await StockTickDal(auth.db).get_data(data_id, v_schema=schema))
+    df = StockTickDal(auth.db).get_stock_tick_frame(symbol, date, start_time, end_time)
+    if df is None:
+        return SuccessResponse([], count=0)
+    return SuccessResponse(df.to_dict(orient="records"), count=len(df))
 
 
 @app.post("/stock/tick/sync", summary="同步股票分笔数据")
@@ -42,7 +47,7 @@ async def sync_stock_tick(
     auth: Auth = Depends(AllUserAuth())
 ):
     """
-    同步股票分笔数据
+    同步股票分笔数据，写入按交易日分区的分笔存储
     
     - symbol: 股票代码，如 sh000001 或 sz000001，需要带上市场标识
     - date: 日期，格式 YYYYMMDD，可选，默认为最近交易日
@@ -51,4 +56,14 @@ async def sync_stock_tick(
         symbol=symbol,
         date=date
     )
-    return SuccessResponse(result) 
\ No newline at end of file
+    return SuccessResponse(result)
+
+
+@app.post("/stock/tick/compact", summary="压缩股票分笔数据")
+async def compact_stock_tick(symbol: str = None, auth: Auth = Depends(AllUserAuth())):
+    """
+    将 MySQL 与旧版 CSV 缓存中的分笔数据迁移到分笔存储
+
+    - symbol: 股票代码，可选，默认处理全部股票
+    """
+    return SuccessResponse(await StockTickDal(auth.db).compact_stock_tick(symbol))
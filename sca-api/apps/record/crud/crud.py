@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from apps.record import models, schemas
 from infra.db.crud import DalBase
 from infra.mongo.mongo_manage import MongoManage
+from infra.mongo.retention import RollupDal, OPERATION_RECORD_POLICY
 
 
 class LoginRecordDal(DalBase):
@@ -78,3 +79,9 @@ class OperationRecordDal(MongoManage):
         self.collection = db["operation_record"]
         self.schema = schemas.OperationRecordSimpleOut
         self.is_object_id = True
+
+
+class OperationRecordRollupDal(RollupDal):
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        super(OperationRecordRollupDal, self).__init__(db, OPERATION_RECORD_POLICY)
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Mapped, mapped_column
 
 from application.settings import LOGIN_LOG_RECORD
 from apps.user.utils.validation import LoginForm, WXLoginForm
-from infra.utils.ip_manage import IPManage
+from infra.utils.ip_manage import ip_locator
 from sqlalchemy.ext.asyncio import AsyncSession
 from infra.db.base_model import BaseModel
 from sqlalchemy import String, Boolean, Text
@@ -12,6 +12,9 @@ from fastapi import Request
 from starlette.requests import Request as StarletteRequest
 from user_agents import parse
 
+# 会话中待回填归属地的登录记录，事务提交后加入回填队列
+SESSION_LOCATION_KEY = "login_record_locations"
+
 
 class LoginRecord(BaseModel):
     __tablename__ = "record_login"
@@ -46,6 +49,8 @@ class LoginRecord(BaseModel):
     ):
         """
         创建登录记录
+
+        IP 归属地不在登录请求中查询，事务提交后由后台任务查询并回填
         :return:
         """
         if not LOGIN_LOG_RECORD:
@@ -62,10 +67,8 @@ class LoginRecord(BaseModel):
         user_agent = parse(req.headers.get("user-agent"))
         system = f"{user_agent.os.family} {user_agent.os.version_string}"
         browser = f"{user_agent.browser.family} {user_agent.browser.version_string}"
-        ip = IPManage(req.client.host)
-        location = await ip.parse()
         obj = LoginRecord(
-            **location.dict(),
+            ip=req.client.host,
             telephone=data.telephone if data.telephone else data.code,
             status=status,
             browser=browser,
@@ -77,3 +80,5 @@ class LoginRecord(BaseModel):
         )
         db.add(obj)
         await db.flush()
+        if ip_locator.provider is not None:
+            db.sync_session.info.setdefault(SESSION_LOCATION_KEY, []).append((obj.id, obj.ip))
@@ -1,3 +1,3 @@
 from .login import LoginParams
-from .operation import OperationParams
+from .operation import OperationParams, OperationRollupParams
 from .sms import SMSParams
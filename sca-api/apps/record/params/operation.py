@@ -1,6 +1,7 @@
 """
 类依赖项-官方文档：https://fastapi.tiangolo.com/zh/tutorial/dependencies/classes-as-dependencies/
 """
+import datetime
 from fastapi import Depends
 from infra.core.dependencies import Paging, QueryParams
 
@@ -21,3 +22,21 @@ class OperationParams(QueryParams):
         self.telephone = ("like", telephone)
         self.request_method = request_method
         self.v_order = "desc"
+
+
+class OperationRollupParams(QueryParams):
+    """
+    操作日志每日汇总，默认查询最近 7 天
+    """
+    def __init__(
+            self,
+            start_date: datetime.date = None,
+            end_date: datetime.date = None,
+            api_path: str = None,
+            request_method: str = None
+    ):
+        super().__init__()
+        self.end_date = end_date or datetime.date.today()
+        self.start_date = start_date or self.end_date - datetime.timedelta(days=6)
+        self.api_path = api_path
+        self.request_method = request_method
@@ -0,0 +1,122 @@
+"""
+登录记录 IP 归属地回填
+
+登录时只保存 IP，登录记录所在事务提交后把记录 ID 与 IP 放入进程内有界队列，
+由后台任务批量查询归属地（同一网段只查询一次，并优先使用缓存），再按主键批量更新登录记录。
+"""
+import asyncio
+
+from sqlalchemy import event, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from apps.record.models.login import LoginRecord, SESSION_LOCATION_KEY
+from infra.db.database import session_factory
+from infra.logger.logger import logger
+from infra.utils.ip_manage import ip_locator, LOCATION_FIELDS
+
+
+class LocationBackfill:
+    """
+    登录记录 IP 归属地回填
+    """
+
+    def __init__(self, max_size: int = 10000, batch_size: int = 100, flush_interval: float = 1.0):
+        """
+        :param max_size: 队列最大长度，超出后丢弃
+        :param batch_size: 每批最大回填数量
+        :param flush_interval: 最长回填间隔，单位：秒
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.task: asyncio.Task | None = None
+        self.metrics = {"enqueued": 0, "updated": 0, "dropped": 0, "failed": 0}
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        """
+        停止后台任务，队列中未回填的记录直接丢弃，归属地可通过 IP 重新查询
+        """
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    def put(self, record_id: int, ip: str) -> bool:
+        """
+        放入回填队列，不等待，首次调用时启动后台任务
+        """
+        self.start()
+        try:
+            self.queue.put_nowait((record_id, ip))
+        except asyncio.QueueFull:
+            self.metrics["dropped"] += 1
+            return False
+        self.metrics["enqueued"] += 1
+        return True
+
+    def stats(self) -> dict:
+        return {**self.metrics, "pending": self.queue.qsize(), "locator": ip_locator.stats()}
+
+    async def __run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(items) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.__flush(items)
+
+    async def __flush(self, items: list[tuple[int, str]]) -> None:
+        ips = list({ip for _, ip in items})
+        locations = dict(zip(ips, await asyncio.gather(*[ip_locator.locate(ip) for ip in ips])))
+        rows = []
+        for record_id, ip in items:
+            location = locations[ip].model_dump(include=set(LOCATION_FIELDS))
+            if location["address"]:
+                rows.append({"id": record_id, **location})
+        if not rows:
+            return
+        try:
+            async with session_factory() as session:
+                async with session.begin():
+                    # 按主键批量更新
+                    await session.execute(update(LoginRecord), rows)
+            self.metrics["updated"] += len(rows)
+        except SQLAlchemyError as e:
+            self.metrics["failed"] += len(rows)
+            logger.error(f"回填登录记录归属地失败，{len(rows)} 条数据：{e}")
+
+
+location_backfill = LocationBackfill()
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_after_commit(session: Session) -> None:
+    records = session.info.pop(SESSION_LOCATION_KEY, None)
+    if not records:
+        return
+    try:
+        for record_id, ip in records:
+            location_backfill.put(record_id, ip)
+    except RuntimeError:
+        pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(SESSION_LOCATION_KEY, None)
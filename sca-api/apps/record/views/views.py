@@ -2,10 +2,13 @@ from fastapi import APIRouter, Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from infra.utils.response import SuccessResponse
 from apps.record.crud import crud
-from apps.user.utils.current import AllUserAuth
+from apps.user.utils.current import AllUserAuth, FullAdminAuth
 from apps.user.utils.validation.auth import Auth
-from apps.record.params import LoginParams, OperationParams, SMSParams
+from apps.record.params import LoginParams, OperationParams, SMSParams, OperationRollupParams
 from infra.mongo.mongo_db import mongo_getter
+from infra.core.middleware import operation_record_writer
+from infra.mongo.retention import record_retention
+from apps.record.utils.location_backfill import location_backfill
 
 app = APIRouter()
 
@@ -19,6 +22,11 @@ async def get_record_login(p: LoginParams = Depends(), auth: Auth = Depends(AllU
     return SuccessResponse(datas, count=count)
 
 
+@app.get("/logins/location/stats", summary="获取登录归属地回填队列状态")
+async def get_record_login_location_stats(auth: Auth = Depends(AllUserAuth())):
+    return SuccessResponse(location_backfill.stats())
+
+
 @app.get("/operations", summary="获取操作日志列表")
 async def get_record_operation(
         p: OperationParams = Depends(),
@@ -30,6 +38,34 @@ async def get_record_operation(
     return SuccessResponse(datas, count=count)
 
 
+@app.get("/operations/writer/stats", summary="获取操作日志写入队列状态")
+async def get_record_operation_writer_stats(auth: Auth = Depends(FullAdminAuth())):
+    return SuccessResponse(operation_record_writer.stats())
+
+
+@app.get("/operations/rollups", summary="获取操作日志每日汇总列表")
+async def get_record_operation_rollups(
+        p: OperationRollupParams = Depends(),
+        db: AsyncIOMotorDatabase = Depends(mongo_getter),
+        auth: Auth = Depends(AllUserAuth())
+):
+    return SuccessResponse(await crud.OperationRecordRollupDal(db).get_rollups(**p.dict()))
+
+
+@app.get("/operations/rollups/summary", summary="获取操作日志按接口合计的汇总数据")
+async def get_record_operation_rollup_summary(
+        p: OperationRollupParams = Depends(),
+        db: AsyncIOMotorDatabase = Depends(mongo_getter),
+        auth: Auth = Depends(AllUserAuth())
+):
+    return SuccessResponse(await crud.OperationRecordRollupDal(db).get_summary(**p.dict()))
+
+
+@app.get("/retention/stats", summary="获取日志保留与汇总任务状态")
+async def get_record_retention_stats(auth: Auth = Depends(AllUserAuth())):
+    return SuccessResponse(record_retention.stats())
+
+
 @app.get("/sms/send/list", summary="获取短信发送列表")
 async def get_sms_send_list(p: SMSParams = Depends(), auth: Auth = Depends(AllUserAuth())):
     datas, count = await crud.SMSSendRecordDal(auth.db).get_datas(**p.dict(), v_return_count=True)
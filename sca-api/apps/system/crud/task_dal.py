@@ -31,9 +31,9 @@ class TaskDal(MongoManage):
         """
         获取单个数据，默认使用 ID 查询，否则使用关键词查询
 
-        包括临时字段 last_run_datetime，is_active
-        is_active: 只有在 scheduler_task_jobs 任务运行表中存在相同 _id 才表示任务添加成功，任务状态才为 True
-        last_run_datetime: 在 scheduler_task_record 中获取该任务最近一次执行完成的时间
+        is_active 与 last_run_datetime 为任务表中的冗余字段，由 sca-task 维护：
+        is_active: 任务添加到调度器成功时为 True，添加失败或任务已结束时为 False
+        last_run_datetime: 该任务最近一次执行完成的时间
 
         :param _id: 数据 ID
         :param v_return_none: 是否返回空 None，否则抛出异常，默认抛出异常
@@ -43,72 +43,12 @@ class TaskDal(MongoManage):
             kwargs["_id"] = ("ObjectId", _id)
 
         params = self.filter_condition(**kwargs)
-        pipeline = [
-            {
-                '$addFields': {
-                    'str_id': {'$toString': '$_id'}
-                }
-            },
-            {
-                '$lookup': {
-                    'from': 'scheduler_task_jobs',
-                    'localField': 'str_id',
-                    'foreignField': '_id',
-                    'as': 'matched_jobs'
-                }
-            },
-            {
-                '$lookup': {
-                    'from': 'scheduler_task_record',
-                    'localField': 'str_id',
-                    'foreignField': 'job_id',
-                    'as': 'matched_records'
-                }
-            },
-            {
-                '$addFields': {
-                    'is_active': {
-                        '$cond': {
-                            'if': {'$ne': ['$matched_jobs', []]},
-                            'then': True,
-                            'else': False
-                        }
-                    },
-                    'last_run_datetime': {
-                        '$ifNull': [
-                            {'$arrayElemAt': ['$matched_records.create_datetime', -1]},
-                            None
-                        ]
-                    }
-                }
-            },
-            {
-                '$project': {
-                    'matched_records': 0,
-                    'matched_jobs': 0
-                }
-            },
-            {
-                '$match': params
-            },
-            {
-                '$facet': {
-                    'documents': [
-                        {'$limit': 1},
-                    ]
-                }
-            }
-        ]
-        # 执行聚合查询
-        cursor = self.collection.aggregate(pipeline)
-        result = await cursor.to_list(length=None)
-        data = result[0]['documents']
+        data = await self.collection.find_one(params)
         if not data and v_return_none:
             return None
         elif not data:
             raise CustomException("未查找到对应数据", code=status.HTTP_404_NOT_FOUND)
-        data = data[0]
-        if data and v_schema:
+        if v_schema:
             return jsonable_encoder(v_schema(**data))
         return data
 
@@ -119,89 +59,28 @@ class TaskDal(MongoManage):
             v_schema: Any = None,
             v_order: str = None,
             v_order_field: str = None,
+            v_cursor: str = None,
             **kwargs
     ) -> tuple:
         """
-        获取任务信息列表
+        获取任务信息列表，按 page 分页，忽略 v_cursor
 
-        添加了两个临时字段
-        is_active: 只有在 scheduler_task_jobs 任务运行表中存在相同 _id 才表示任务添加成功，任务状态才为 True
-        last_run_datetime: 在 scheduler_task_record 中获取该任务最近一次执行完成的时间
+        is_active 与 last_run_datetime 直接从任务表中读取，过滤条件先于排序与分页执行，
+        查询耗时只与分页大小有关，与调度日志数量无关
         """
         v_order_field = v_order_field if v_order_field else 'create_datetime'
         v_order = -1 if v_order in self.ORDER_FIELD else 1
         params = self.filter_condition(**kwargs)
-        pipeline = [
-            {
-                '$addFields': {
-                    'str_id': {'$toString': '$_id'}
-                }
-            },
-            {
-                '$lookup': {
-                    'from': 'scheduler_task_jobs',
-                    'localField': 'str_id',
-                    'foreignField': '_id',
-                    'as': 'matched_jobs'
-                }
-            },
-            {
-                '$lookup': {
-                    'from': 'scheduler_task_record',
-                    'localField': 'str_id',
-                    'foreignField': 'job_id',
-                    'as': 'matched_records'
-                }
-            },
-            {
-                '$addFields': {
-                    'is_active': {
-                        '$cond': {
-                            'if': {'$ne': ['$matched_jobs', []]},
-                            'then': True,
-                            'else': False
-                        }
-                    },
-                    'last_run_datetime': {
-                        '$ifNull': [
-                            {'$arrayElemAt': ['$matched_records.create_datetime', -1]},
-                            None
-                        ]
-                    }
-                }
-            },
-            {
-                '$project': {
-                    'matched_records': 0,
-                    'matched_jobs': 0
-                }
-            },
-            {
-                '$match': params
-            },
-            {
-                '$facet': {
-                    'documents': [
-                        {'$sort': {v_order_field: v_order}},
-                        {'$limit': limit},
-                        {'$skip': (page - 1) * limit}
-                    ],
-                    'count': [{'$count': 'total'}]
-                }
-            }
-        ]
-
-        # 执行聚合查询
-        cursor = self.collection.aggregate(pipeline)
-        result = await cursor.to_list(length=None)
-        datas = result[0]['documents']
-        count = result[0]['count'][0]['total'] if result[0]['count'] else 0
+        count = await self.collection.count_documents(params)
         if count == 0:
             return [], 0
-        elif v_schema:
-            datas = [jsonable_encoder(v_schema(**data)) for data in datas]
-        elif self.schema:
-            datas = [jsonable_encoder(self.schema(**data)) for data in datas]
+        cursor = self.collection.find(params).sort(v_order_field, v_order)
+        if limit != 0:
+            cursor.skip((page - 1) * limit).limit(limit)
+        datas = await cursor.to_list(length=None)
+        schema = v_schema or self.schema
+        if schema:
+            datas = [jsonable_encoder(schema(**data)) for data in datas]
         return datas, count
 
     async def add_task(self, rd: Redis, data: dict) -> int:
@@ -223,6 +102,8 @@ class TaskDal(MongoManage):
         if exec_strategy == "interval" or exec_strategy == "cron":
             job_params["start_date"] = data.get("start_date")
             job_params["end_date"] = data.get("end_date")
+        for key in ("executor", "max_instances", "coalesce", "misfire_grace_time"):
+            job_params[key] = data.get(key)
         message = {
             "operation": self.JobOperation.add.value,
             "task": {
@@ -237,7 +118,8 @@ class TaskDal(MongoManage):
         创建任务
         """
         data_dict = data.model_dump()
-        is_active = data_dict.pop('is_active')
+        is_active = data_dict['is_active']
+        data_dict['last_run_datetime'] = None
         insert_result = await super().create_data(data_dict)
         obj = await self.get_task(insert_result.inserted_id, v_schema=schemas.TaskSimpleOut)
 
@@ -254,14 +136,14 @@ class TaskDal(MongoManage):
         if is_active:
             # 创建任务成功后, 如果任务状态为 True，则向消息队列中发送任务
             result['subscribe_number'] = await self.add_task(rd, obj)
+            await self.deactivate_unreceived(obj["_id"], result)
         return result
 
     async def put_task(self, rd: Redis, _id: str, data: schemas.Task) -> dict:
         """
         更新任务
         """
-        data_dict = data.model_dump()
-        is_active = data_dict.pop('is_active')
+        is_active = data.is_active
         await super(TaskDal, self).put_data(_id, data)
         obj: dict = await self.get_task(_id, v_schema=schemas.TaskSimpleOut)
 
@@ -284,8 +166,17 @@ class TaskDal(MongoManage):
         if is_active:
             # 更新任务成功后, 如果任务状态为 True，则向消息队列中发送任务
             result['subscribe_number'] = await self.add_task(rd, obj)
+            await self.deactivate_unreceived(_id, result)
         return result
 
+    async def deactivate_unreceived(self, _id: str, result: dict) -> None:
+        """
+        没有 sca-task 订阅消息时任务不会被添加到调度器，将任务状态改为 False
+        """
+        if result['subscribe_number'] == 0:
+            await super(TaskDal, self).put_data(_id, {"is_active": False})
+            result['is_active'] = False
+
     async def delete_task(self, _id: str) -> bool:
         """
         删除任务
@@ -310,7 +201,8 @@ class TaskDal(MongoManage):
                 "exec_strategy": "once",
                 "job_params": {
                     "name": obj.get("_id"),
-                    "job_class": obj.get("job_class")
+                    "job_class": obj.get("job_class"),
+                    "executor": obj.get("executor")
                 }
             }
         }
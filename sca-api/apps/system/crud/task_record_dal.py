@@ -1,9 +1,16 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from infra.mongo.mongo_manage import MongoManage
+from infra.mongo.retention import RollupDal, TASK_RECORD_POLICY
 
 
 class TaskRecordDal(MongoManage):
 
     def __init__(self, db: AsyncIOMotorDatabase):
-        super(TaskRecordDal, self).__init__(db, "scheduler_task_record")
\ No newline at end of file
+        super(TaskRecordDal, self).__init__(db, "scheduler_task_record")
+
+
+class TaskRecordRollupDal(RollupDal):
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        super(TaskRecordRollupDal, self).__init__(db, TASK_RECORD_POLICY)
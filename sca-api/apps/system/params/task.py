@@ -1,4 +1,5 @@
 
+import datetime
 from fastapi import Depends
 from infra.core.dependencies import Paging, QueryParams
 
@@ -24,3 +25,14 @@ class TaskRecordParams(QueryParams):
         self.job_id = ("like", job_id)
         self.name = ("like", name)
         self.v_order = "desc"
+
+
+class TaskRecordRollupParams(QueryParams):
+    """
+    定时任务调度日志每日汇总，默认查询最近 7 天
+    """
+    def __init__(self, start_date: datetime.date = None, end_date: datetime.date = None, job_id: str = None):
+        super().__init__()
+        self.end_date = end_date or datetime.date.today()
+        self.start_date = start_date or self.end_date - datetime.timedelta(days=6)
+        self.job_id = job_id
@@ -1,4 +1,4 @@
-
+from typing import Literal
 from pydantic import BaseModel, Field, ConfigDict
 from infra.core.data_types import DatetimeStr, ObjectIdStr
 
@@ -9,10 +9,16 @@ class Task(BaseModel):
     job_class: str
     exec_strategy: str
     expression: str
-    is_active: bool | None = True  # 临时字段，不在表中创建
+    is_active: bool | None = True  # 冗余字段，由 sca-task 根据任务添加结果维护
     remark: str | None = None
     start_date: DatetimeStr | None = None
     end_date: DatetimeStr | None = None
+    # 执行器：thread 线程池，process 进程池（CPU 密集型任务），asyncio 事件循环（main 为协程函数的任务）
+    executor: Literal["thread", "process", "asyncio"] | None = "thread"
+    # 同时运行的最大实例数量、错过多次执行时是否只执行一次、错过执行时间后允许延迟执行的秒数，为空时使用默认值
+    max_instances: int | None = Field(None, ge=1)
+    coalesce: bool | None = None
+    misfire_grace_time: int | None = Field(None, ge=1)
 
 
 class TaskSimpleOut(Task):
@@ -21,5 +27,5 @@ class TaskSimpleOut(Task):
     id: ObjectIdStr = Field(..., alias='_id')
     create_datetime: DatetimeStr
     update_datetime: DatetimeStr
-    last_run_datetime: DatetimeStr | None = None  # 临时字段，不在表中创建
+    last_run_datetime: DatetimeStr | None = None  # 冗余字段，由 sca-task 在任务执行完成后更新
 
@@ -17,7 +17,7 @@ app = APIRouter()
 ###########################################################
 @app.get("/dict/types", summary="获取字典类型列表")
 async def get_dict_types(p: DictTypeParams = Depends(), auth: Auth = Depends(AllUserAuth())):
-    datas, count = await DictTypeDal(auth.db).get_datas(**p.dict(), v_return_count=True)
+    datas, count = await DictTypeDal(auth.db).get_datas(**p.dict(), v_return_count=True, v_cache_ttl=300)
     return SuccessResponse(datas, count=count)
 
 
@@ -67,7 +67,7 @@ async def create_dict_details(data: schemas.DictDetails, auth: Auth = Depends(Al
 
 @app.get("/dict/details", summary="获取单个字典类型下的字典元素列表，分页")
 async def get_dict_details(params: DictDetailParams = Depends(), auth: Auth = Depends(AllUserAuth())):
-    datas, count = await DictDetailsDal(auth.db).get_datas(**params.dict(), v_return_count=True)
+    datas, count = await DictDetailsDal(auth.db).get_datas(**params.dict(), v_return_count=True, v_cache_ttl=300)
     return SuccessResponse(datas, count=count)
 
 
@@ -5,9 +5,9 @@ from redis.asyncio import Redis
 from apps.system import schemas
 from apps.system.crud.task_dal import TaskDal
 from apps.system.crud.task_group_dal import TaskGroupDal
-from apps.system.crud.task_record_dal import TaskRecordDal
+from apps.system.crud.task_record_dal import TaskRecordDal, TaskRecordRollupDal
 from apps.system.params import TaskParams
-from apps.system.params.task import TaskRecordParams
+from apps.system.params.task import TaskRecordParams, TaskRecordRollupParams
 from apps.user.utils.current import AllUserAuth
 from apps.user.utils.validation.auth import Auth
 from infra.mongo.mongo_db import mongo_getter
@@ -100,3 +100,21 @@ async def get_task_records(
     count = await TaskRecordDal(db).get_count(**p.to_count())
     datas = await TaskRecordDal(db).get_datas(**p.dict())
     return SuccessResponse(datas, count=count)
+
+
+@app.get("/task/records/rollups", summary="获取定时任务调度日志每日汇总列表")
+async def get_task_record_rollups(
+        p: TaskRecordRollupParams = Depends(),
+        db: AsyncIOMotorDatabase = Depends(mongo_getter),
+        auth: Auth = Depends(AllUserAuth())
+):
+    return SuccessResponse(await TaskRecordRollupDal(db).get_rollups(**p.dict()))
+
+
+@app.get("/task/records/rollups/summary", summary="获取定时任务调度日志按任务合计的汇总数据")
+async def get_task_record_rollup_summary(
+        p: TaskRecordRollupParams = Depends(),
+        db: AsyncIOMotorDatabase = Depends(mongo_getter),
+        auth: Auth = Depends(AllUserAuth())
+):
+    return SuccessResponse(await TaskRecordRollupDal(db).get_summary(**p.dict()))
@@ -1,5 +1,9 @@
-from sqlalchemy import select, false
+from typing import Any
+
+from sqlalchemy import select, false, insert, delete, literal, and_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.strategy_options import _AbstractLoad
+from sqlalchemy.sql.selectable import Select
 
 from apps.user import models, schemas
 from infra.db.crud import DalBase
@@ -11,6 +15,163 @@ class DeptDal(DalBase):
     def __init__(self, db: AsyncSession):
         super(DeptDal, self).__init__(db=db, model=models.Dept, schema=schemas.DeptSimpleOut)
 
+    async def create_data(
+            self,
+            data: schemas.Dept,
+            v_options: list[_AbstractLoad] = None,
+            v_return_obj: bool = False,
+            v_schema: Any = None
+    ) -> Any:
+        """
+        创建部门，并写入闭包表：自身一行，以及上级部门的所有祖先各一行
+        :param data:
+        :param v_options:
+        :param v_return_obj:
+        :param v_schema:
+        :return:
+        """
+        obj = await super(DeptDal, self).create_data(data, v_return_obj=True)
+        await self.insert_closure([obj.id], obj.parent_id)
+        return await self.out_dict(obj, v_options, v_return_obj, v_schema)
+
+    async def put_data(
+            self,
+            data_id: int,
+            data: schemas.Dept,
+            v_options: list[_AbstractLoad] = None,
+            v_return_obj: bool = False,
+            v_schema: Any = None
+    ) -> Any:
+        """
+        更新部门信息，上级部门变化时移动整个子树的闭包关系
+        :param data_id:
+        :param data:
+        :param v_options:
+        :param v_return_obj:
+        :param v_schema:
+        :return:
+        """
+        obj = await self.get_data(data_id)
+        old_parent_id = obj.parent_id
+        if data.parent_id != old_parent_id:
+            subtree_ids = await self.get_subtree_ids([data_id])
+            if data.parent_id is not None and data.parent_id in subtree_ids:
+                raise CustomException("上级部门不能为当前部门或其下级部门", code=400)
+        result = await super(DeptDal, self).put_data(data_id, data, v_options, v_return_obj, v_schema)
+        if data.parent_id != old_parent_id:
+            await self.move_closure(data_id, subtree_ids, data.parent_id)
+        return result
+
+    async def insert_closure(self, dept_ids: list[int], parent_id: int | None) -> None:
+        """
+        为新部门写入闭包关系
+        :param dept_ids: 新部门 ID
+        :param parent_id: 上级部门 ID
+        """
+        closure = models.auth_dept_closure
+        await self.db.execute(
+            insert(closure),
+            [{"ancestor_id": dept_id, "descendant_id": dept_id, "depth": 0} for dept_id in dept_ids]
+        )
+        if parent_id is not None:
+            for dept_id in dept_ids:
+                ancestors = select(closure.c.ancestor_id, literal(dept_id), closure.c.depth + 1) \
+                    .where(closure.c.descendant_id == parent_id)
+                await self.db.execute(
+                    insert(closure).from_select(["ancestor_id", "descendant_id", "depth"], ancestors)
+                )
+        await self.db.flush()
+
+    async def move_closure(self, dept_id: int, subtree_ids: list[int], parent_id: int | None) -> None:
+        """
+        移动子树：删除子树与原祖先的关系，再与新上级部门的祖先逐一关联，子树内部关系不变
+        :param dept_id: 被移动的部门 ID
+        :param subtree_ids: 被移动部门及其所有下级部门 ID
+        :param parent_id: 新的上级部门 ID
+        """
+        closure = models.auth_dept_closure
+        await self.db.execute(
+            delete(closure).where(
+                closure.c.descendant_id.in_(subtree_ids),
+                closure.c.ancestor_id.notin_(subtree_ids)
+            )
+        )
+        if parent_id is not None:
+            # MySQL 不支持在子查询中引用被插入的表，先查询再插入
+            ancestors = (await self.db.execute(
+                select(closure.c.ancestor_id, closure.c.depth).where(closure.c.descendant_id == parent_id)
+            )).all()
+            descendants = (await self.db.execute(
+                select(closure.c.descendant_id, closure.c.depth).where(closure.c.ancestor_id == dept_id)
+            )).all()
+            rows = [
+                {"ancestor_id": ancestor_id, "descendant_id": descendant_id, "depth": up + down + 1}
+                for ancestor_id, up in ancestors
+                for descendant_id, down in descendants
+            ]
+            if rows:
+                await self.db.execute(insert(closure), rows)
+        await self.db.flush()
+
+    async def rebuild_closure(self) -> int:
+        """
+        根据 parent_id 重建闭包表，用于初始化或修复数据
+        :return: 写入的关系数
+        """
+        closure = models.auth_dept_closure
+        parents = dict((await self.db.execute(select(self.model.id, self.model.parent_id))).all())
+        rows = []
+        for dept_id in parents:
+            ancestor_id, depth = dept_id, 0
+            visited = set()
+            while ancestor_id is not None and ancestor_id not in visited:
+                visited.add(ancestor_id)
+                rows.append({"ancestor_id": ancestor_id, "descendant_id": dept_id, "depth": depth})
+                ancestor_id, depth = parents.get(ancestor_id), depth + 1
+        await self.db.execute(delete(closure))
+        if rows:
+            await self.db.execute(insert(closure), rows)
+        await self.db.flush()
+        return len(rows)
+
+    async def ensure_closure(self) -> int:
+        """
+        闭包表为空且存在部门时重建闭包表，已有数据库升级后在启动时自动回填
+        :return: 写入的关系数，无需重建时返回 0
+        """
+        closure = models.auth_dept_closure
+        if await self.db.scalar(select(closure.c.ancestor_id).limit(1)) is not None:
+            return 0
+        if await self.db.scalar(select(self.model.id).limit(1)) is None:
+            return 0
+        return await self.rebuild_closure()
+
+    def subtree_select(self, dept_ids: Select | list[int]) -> Select:
+        """
+        子树部门 ID 查询语句，可作为子查询或关联查询使用
+        :param dept_ids: 根部门 ID 列表或查询部门 ID 的语句
+        :return: 包含根部门自身的所有未删除下级部门 ID
+        """
+        closure = models.auth_dept_closure
+        return select(closure.c.descendant_id).join(
+            self.model, and_(self.model.id == closure.c.descendant_id, self.model.is_delete == false())
+        ).where(closure.c.ancestor_id.in_(dept_ids)).distinct()
+
+    def user_subtree_select(self, user_id: int) -> Select:
+        """
+        用户所在部门及其所有下级部门 ID 查询语句，用于数据范围为“本部门及以下”时关联过滤
+        :param user_id: 用户 ID
+        """
+        user_depts = models.auth_user_depts
+        return self.subtree_select(select(user_depts.c.dept_id).where(user_depts.c.user_id == user_id))
+
+    async def get_subtree_ids(self, dept_ids: list[int]) -> list[int]:
+        """
+        获取部门及其所有下级部门 ID
+        :param dept_ids: 根部门 ID 列表
+        """
+        return list((await self.db.scalars(self.subtree_select(dept_ids))).all())
+
     async def get_tree_list(self, mode: int) -> list:
         """
         1：获取部门树列表
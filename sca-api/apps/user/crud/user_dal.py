@@ -1,3 +1,4 @@
+import asyncio
 import copy
 from datetime import datetime
 from typing import Any
@@ -5,8 +6,9 @@ from typing import Any
 from fastapi import UploadFile
 from fastapi.encoders import jsonable_encoder
 from redis.asyncio import Redis
+from sqlalchemy import select, insert, false
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.orm.strategy_options import _AbstractLoad
 
 from application import settings
@@ -15,12 +17,13 @@ from apps.user import models, schemas
 from apps.user.params import UserParams
 from infra.db.crud import DalBase
 from infra.exception.exception import CustomException
+from infra.logger.logger import logger
 from infra.utils import status
-from infra.utils.excel.excel_manage import ExcelManage
 from infra.utils.excel.import_manage import ImportManage, FieldType
+from infra.utils.excel.stream_export import StreamExport
 from infra.utils.excel.write_xlsx import WriteXlsx
 from infra.utils.file.aliyun_oss import AliyunOSS, BucketConf
-from infra.utils.send_email import EmailSender
+from infra.utils.notification import notification_dispatcher
 from infra.utils.sms.reset_passwd import ResetPasswordSMS
 from infra.utils.tools import test_password
 from infra.utils.validator_utils import vali_telephone
@@ -28,9 +31,13 @@ from infra.utils.wx.oauth import WXOAuth
 # 修改导入路径，使用完全限定路径
 from apps.user.crud.dept_dal import DeptDal
 from apps.user.crud.role_dal import RoleDal
+from apps.user.utils.principal_cache import principal_cache
 
 
 class UserDal(DalBase):
+    # 批量导入每批插入的用户数
+    IMPORT_CHUNK_SIZE = 1000
+
     import_headers = [
         {"label": "姓名", "field": "name", "required": True},
         {"label": "昵称", "field": "nickname", "required": False},
@@ -42,32 +49,13 @@ class UserDal(DalBase):
     def __init__(self, db: AsyncSession):
         super(UserDal, self).__init__(db=db, model=models.User, schema=schemas.UserSimpleOut)
 
-    async def recursion_get_dept_ids(
-            self,
-            user: models.User,
-            depts: list[models.Dept] = None,
-            dept_ids: list[int] = None
-    ) -> list:
+    async def recursion_get_dept_ids(self, user: models.User) -> list:
         """
-        递归获取所有关联部门 id
+        获取用户所在部门及其所有下级部门 id，通过部门闭包表一次查询
         :param user:
-        :param depts: 所有部门实例
-        :param dept_ids: 父级部门 id 列表
         :return:
         """
-        if not depts:
-            depts = await DeptDal(self.db).get_datas(limit=0, v_return_objs=True)
-            result = []
-            for i in user.depts:
-                result.append(i.id)
-            result.extend(await self.recursion_get_dept_ids(user, depts, result))
-            return list(set(result))
-        elif dept_ids:
-            result = [i.id for i in filter(lambda item: item.parent_id in dept_ids, depts)]
-            result.extend(await self.recursion_get_dept_ids(user, depts, result))
-            return result
-        else:
-            return []
+        return list((await self.db.scalars(DeptDal(self.db).user_subtree_select(user.id))).all())
 
     async def update_login_info(self, user: models.User, last_ip: str) -> None:
         """
@@ -99,7 +87,7 @@ class UserDal(DalBase):
         if unique:
             raise CustomException("手机号已存在！", code=status.HTTP_ERROR)
         password = data.telephone[5:12] if settings.DEFAULT_PASSWORD == "0" else settings.DEFAULT_PASSWORD
-        data.password = self.model.get_password_hash(password)
+        data.password = await self.model.get_password_hash(password)
         data.avatar = data.avatar if data.avatar else settings.DEFAULT_AVATAR
         obj = self.model(**data.model_dump(exclude={'role_ids', "dept_ids"}))
         if data.role_ids:
@@ -165,8 +153,10 @@ class UserDal(DalBase):
         result = test_password(data.password)
         if isinstance(result, str):
             raise CustomException(msg=result, code=400)
-        user.password = self.model.get_password_hash(data.password)
+        user.password = await self.model.get_password_hash(data.password)
         user.is_reset_password = True
+        # 修改密码后已签发的令牌全部失效
+        principal_cache.revoke_on_commit(self.db, {user.id})
         await self.flush(user)
 
     async def update_current_info(self, user: models.User, data: schemas.UserUpdateBaseInfo) -> Any:
@@ -191,44 +181,29 @@ class UserDal(DalBase):
     async def export_query_list(self, header: list, params: UserParams) -> dict:
         """
         导出用户查询列表为 excel
+
+        按批次流式读取并写入文件，角色、部门使用 selectinload 按批次加载
         :param header:
         :param params:
         :return:
         """
-        datas = await self.get_datas(
-            **params.dict(),
-            v_return_objs=True,
-            v_options=[joinedload(self.model.depts), joinedload(self.model.roles)]
-        )
-        # 获取表头
-        row = list(map(lambda i: i.get("label"), header))
-        rows = []
         options = await self.get_export_headers_options()
-        for user in datas:
-            data = []
-            for item in header:
-                field = item.get("field")
-                # 通过反射获取对应的属性值
-                value = getattr(user, field, "")
-                if field == "is_active":
-                    value = "可用" if value else "停用"
-                elif field == "is_staff":
-                    value = "是" if value else "否"
-                elif field == "gender":
-                    result = list(filter(lambda i: i["value"] == value, options["gender_options"]))
-                    value = result[0]["label"] if result else ""
-                elif field == "roles":
-                    value = ",".join([i.name for i in value])
-                elif field == "depts":
-                    value = ",".join([i.name for i in value])
-                data.append(value)
-            rows.append(data)
-        em = ExcelManage()
-        em.create_excel("用户列表")
-        em.write_list(rows, row)
-        remote_file_url = em.save_excel().get("remote_path")
-        em.close()
-        return {"url": remote_file_url, "filename": "用户列表.xlsx"}
+        exporter = StreamExport(
+            header,
+            options={"gender": options["gender_options"]},
+            formatters={
+                "is_active": lambda value: "可用" if value else "停用",
+                "is_staff": lambda value: "是" if value else "否",
+                "roles": lambda value: ",".join([i.name for i in value]),
+                "depts": lambda value: ",".join([i.name for i in value]),
+            }
+        )
+        return await exporter.export_xlsx(
+            self,
+            "用户列表",
+            v_options=[selectinload(self.model.depts), selectinload(self.model.roles)],
+            **params.dict()
+        )
 
     async def get_export_headers_options(self, include: list[str] = None) -> dict[str, list]:
         """
@@ -278,6 +253,8 @@ class UserDal(DalBase):
     async def import_users(self, file: UploadFile) -> dict:
         """
         批量导入用户数据
+
+        手机号一次查询判重，用户与角色、部门关联分批插入，相同的初始密码只生成一次哈希
         :param file:
         :return:
         """
@@ -285,17 +262,60 @@ class UserDal(DalBase):
         im = ImportManage(file, copy.deepcopy(self.import_headers))
         await im.get_table_data()
         im.check_table_data()
+
+        telephones = [item.get("telephone") for item in im.success]
+        existing = set()
+        for chunk in im.chunks(telephones, self.IMPORT_CHUNK_SIZE):
+            existing.update((await self.db.scalars(
+                select(self.model.telephone).where(self.model.telephone.in_(chunk), self.model.is_delete == false())
+            )).all())
+        im.check_unique("telephone", existing, "手机号")
+
+        users = []
         for item in im.success:
             old_data_list = item.pop("old_data_list")
-            data = schemas.UserIn(**item)
             try:
-                await self.create_data(data)
+                data = schemas.UserIn(**item)
             except ValueError as e:
-                old_data_list.append(e.__str__())
-                im.add_error_data(old_data_list)
-            except Exception:
-                old_data_list.append("创建失败，请联系管理员！")
-                im.add_error_data(old_data_list)
+                im.add_error_data(old_data_list + [e.__str__()])
+                continue
+            data.password = data.telephone[5:12] if settings.DEFAULT_PASSWORD == "0" else settings.DEFAULT_PASSWORD
+            data.avatar = data.avatar if data.avatar else settings.DEFAULT_AVATAR
+            users.append((data, old_data_list))
+
+        # 每个不同的默认密码只计算一次哈希，并在线程池中并行计算
+        passwords = list({data.password for data, _ in users})
+        hashes = await asyncio.gather(*[self.model.get_password_hash(password) for password in passwords])
+        password_hashes = dict(zip(passwords, hashes))
+        for data, _ in users:
+            data.password = password_hashes[data.password]
+
+        for chunk in im.chunks(users, self.IMPORT_CHUNK_SIZE):
+            try:
+                # 每批使用保存点，失败时只回滚当前批次
+                async with self.db.begin_nested():
+                    await self.create_datas([data.model_dump(exclude={"role_ids", "dept_ids"}) for data, _ in chunk])
+                    ids = dict((await self.db.execute(
+                        select(self.model.telephone, self.model.id).where(
+                            self.model.telephone.in_([data.telephone for data, _ in chunk]),
+                            self.model.is_delete == false()
+                        )
+                    )).all())
+                    user_roles = [
+                        {"user_id": ids[data.telephone], "role_id": role_id} for data, _ in chunk for role_id in data.role_ids
+                    ]
+                    user_depts = [
+                        {"user_id": ids[data.telephone], "dept_id": dept_id} for data, _ in chunk for dept_id in data.dept_ids
+                    ]
+                    if user_roles:
+                        await self.db.execute(insert(models.auth_user_roles), user_roles)
+                    if user_depts:
+                        await self.db.execute(insert(models.auth_user_depts), user_depts)
+                    await self.db.flush()
+            except Exception as e:
+                logger.error(f"批量导入用户失败：{e}")
+                for _, old_data_list in chunk:
+                    im.add_error_data(old_data_list + ["创建失败，请联系管理员！"])
         return {
             "success_number": im.success_number,
             "error_number": im.error_number,
@@ -310,76 +330,63 @@ class UserDal(DalBase):
         :return:
         """
         users = await self.get_datas(limit=0, id=("in", ids), v_return_objs=True)
+        passwords = [
+            user.telephone[5:12] if settings.DEFAULT_PASSWORD == "0" else settings.DEFAULT_PASSWORD for user in users
+        ]
+        # 在线程池中并行计算哈希，不再逐个串行阻塞事件循环
+        hashes = await asyncio.gather(*[self.model.get_password_hash(password) for password in passwords])
         result = []
-        for user in users:
+        for user, password, hashed_password in zip(users, passwords, hashes):
             # 重置密码
             data = {"id": user.id, "telephone": user.telephone, "name": user.name, "email": user.email}
-            password = user.telephone[5:12] if settings.DEFAULT_PASSWORD == "0" else settings.DEFAULT_PASSWORD
-            user.password = self.model.get_password_hash(password)
+            user.password = hashed_password
             user.is_reset_password = False
             self.db.add(user)
             data["reset_password_status"] = True
             data["password"] = password
             result.append(data)
+        principal_cache.revoke_on_commit(self.db, {user.id for user in users})
         await self.db.flush()
         return result
 
-    async def init_password_send_sms(self, ids: list[int], rd: Redis) -> list:
+    async def init_password_send_sms(self, ids: list[int], rd: Redis) -> dict:
         """
         初始化所选用户密码并发送通知短信
         将用户密码改为系统默认密码，并将初始化密码状态改为false
+        短信在事务提交后由后台任务批量发送
         :param ids:
         :param rd:
-        :return:
+        :return: 通知任务，可通过任务 ID 查询每个用户的发送结果
         """
         result = await self.init_password(ids)
-        for user in result:
-            if not user["reset_password_status"]:
-                user["send_sms_status"] = False
-                user["send_sms_msg"] = "重置密码失败"
-                continue
-            password = user.pop("password")
-            sms = ResetPasswordSMS([user.get("telephone")], rd)
-            try:
-                send_result = (await sms.main_async(password=password))[0]
-                user["send_sms_status"] = send_result
-                user["send_sms_msg"] = "" if send_result else "短信发送失败，请联系管理员"
-            except CustomException as e:
-                user["send_sms_status"] = False
-                user["send_sms_msg"] = e.msg
-        return result
+        recipients = [{"id": user["id"], "name": user["name"], "to": user["telephone"]} for user in result]
+        messages = [{"id": user["id"], "to": user["telephone"], "params": {"password": user["password"]}} for user in result]
+        job = notification_dispatcher.create_job("sms", recipients)
+        return await notification_dispatcher.submit_on_commit(self.db, job, messages, sms_class=ResetPasswordSMS)
 
-    async def init_password_send_email(self, ids: list[int], rd: Redis) -> list:
+    async def init_password_send_email(self, ids: list[int], rd: Redis) -> dict:
         """
         初始化所选用户密码并发送通知邮件
         将用户密码改为系统默认密码，并将初始化密码状态改为false
+        邮件在事务提交后由后台任务批量发送
         :param ids:
         :param rd:
-        :return:
+        :return: 通知任务，可通过任务 ID 查询每个用户的发送结果
         """
         result = await self.init_password(ids)
+        recipients = []
+        messages = []
         for user in result:
-            if not user["reset_password_status"]:
-                user["send_sms_status"] = False
-                user["send_sms_msg"] = "重置密码失败"
-                continue
-            password: str = user.pop("password")
             email: str = user.get("email", None)
+            recipient = {"id": user["id"], "name": user["name"], "to": email}
             if email:
-                subject = "密码已重置"
-                body = f"您好，您的密码已经重置为{password}，请及时登录并修改密码。"
-                es = EmailSender(rd)
-                try:
-                    send_result = await es.send_email([email], subject, body)
-                    user["send_sms_status"] = send_result
-                    user["send_sms_msg"] = "" if send_result else "短信发送失败，请联系管理员"
-                except CustomException as e:
-                    user["send_sms_status"] = False
-                    user["send_sms_msg"] = e.msg
+                body = f"您好，您的密码已经重置为{user['password']}，请及时登录并修改密码。"
+                messages.append({"id": user["id"], "to": email, "body": body})
             else:
-                user["send_sms_status"] = False
-                user["send_sms_msg"] = "未获取到邮箱地址"
-        return result
+                recipient.update(status=False, msg="未获取到邮箱地址")
+            recipients.append(recipient)
+        job = notification_dispatcher.create_job("email", recipients)
+        return await notification_dispatcher.submit_on_commit(self.db, job, messages, subject="密码已重置")
 
     async def update_current_avatar(self, user: models.User, file: UploadFile) -> str:
         """
@@ -2,4 +2,4 @@ from .m2m import auth_user_roles, auth_role_menus, auth_user_depts, auth_role_de
 from .menu import Menu
 from .role import Role
 from .user import User
-from .dept import Dept
+from .dept import Dept, auth_dept_closure
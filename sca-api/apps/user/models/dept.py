@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from infra.db.base_model import BaseModel
-from sqlalchemy import String, Boolean, Integer, ForeignKey
+from infra.db.base_model import BaseModel, Base
+from sqlalchemy import String, Boolean, Integer, ForeignKey, Table, Column, Index, PrimaryKeyConstraint
 
 
 class Dept(BaseModel):
@@ -17,3 +17,17 @@ class Dept(BaseModel):
     email: Mapped[str | None] = mapped_column(String(255), comment="邮箱")
     parent_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey("auth_dept.id", ondelete='CASCADE'), comment="上级部门")
+
+
+# 部门闭包表：每个部门与其所有上级部门（含自身）各一行，depth 为层级距离，自身为 0
+# 子树查询为按 ancestor_id 的一次索引查询，由 DeptDal 在创建、移动部门时维护，删除部门时由外键级联删除
+auth_dept_closure = Table(
+    "auth_dept_closure",
+    Base.metadata,
+    Column("ancestor_id", Integer, ForeignKey("auth_dept.id", ondelete="CASCADE"), nullable=False, comment="上级部门"),
+    Column("descendant_id", Integer, ForeignKey("auth_dept.id", ondelete="CASCADE"), nullable=False, comment="下级部门"),
+    Column("depth", Integer, nullable=False, default=0, comment="层级距离"),
+    PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    Index("ix_auth_dept_closure_descendant_id", "descendant_id"),
+    comment="部门闭包表"
+)
@@ -2,13 +2,11 @@ from datetime import datetime
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from infra.db.base_model import BaseModel
 from sqlalchemy import String, Boolean, DateTime
-from passlib.context import CryptContext
+from infra.utils.password import password_hasher
 from .role import Role
 from .dept import Dept
 from .m2m import auth_user_roles, auth_user_depts
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
-
 
 class User(BaseModel):
     __tablename__ = "auth_user"
@@ -37,23 +35,34 @@ class User(BaseModel):
     depts: Mapped[set[Dept]] = relationship(secondary=auth_user_depts)
 
     @staticmethod
-    def get_password_hash(password: str) -> str:
+    async def get_password_hash(password: str) -> str:
         """
-        生成哈希密码
+        生成哈希密码，在线程池中计算，不阻塞事件循环
         :param password: 原始密码
         :return: 哈希密码
         """
-        return pwd_context.hash(password)
+        return await password_hasher.hash(password)
 
     @staticmethod
-    def verify_password(password: str, hashed_password: str) -> bool:
+    async def verify_password(password: str, hashed_password: str) -> bool:
         """
         验证原始密码是否与哈希密码一致
         :param password: 原始密码
         :param hashed_password: 哈希密码
         :return:
         """
-        return pwd_context.verify(password, hashed_password)
+        return await password_hasher.verify(password, hashed_password)
+
+    async def verify_and_update_password(self, password: str) -> bool:
+        """
+        验证密码，验证成功且哈希强度低于当前配置时按当前配置重新生成哈希
+        :param password: 原始密码
+        :return: 是否验证成功
+        """
+        result, new_hash = await password_hasher.verify_and_update(password, self.password)
+        if result and new_hash:
+            self.password = new_hash
+        return result
 
     def is_admin(self) -> bool:
         """
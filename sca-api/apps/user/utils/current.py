@@ -10,6 +10,7 @@ from fastapi import Request, Depends
 from application import settings
 from infra.db.database import db_getter
 from .validation.auth import Auth
+from .principal_cache import principal_cache
 
 
 class OpenAuth(AuthValidation):
@@ -30,8 +31,8 @@ class OpenAuth(AuthValidation):
         if not settings.OAUTH_ENABLE:
             return Auth(db=db)
         try:
-            telephone, password = self.validate_token(request, token)
-            user = await UserDal(db).get_data(telephone=telephone, password=password, v_return_none=True)
+            claims = self.validate_token(request, token)
+            user = await self.get_user(claims, db)
             return await self.validate_user(request, user, db, is_all=True)
         except CustomException:
             return Auth(db=db)
@@ -54,8 +55,8 @@ class AllUserAuth(AuthValidation):
         """
         if not settings.OAUTH_ENABLE:
             return Auth(db=db)
-        telephone, password = self.validate_token(request, token)
-        user = await UserDal(db).get_data(telephone=telephone, password=password, v_return_none=True)
+        claims = self.validate_token(request, token)
+        user = await self.get_user(claims, db)
         return await self.validate_user(request, user, db, is_all=True)
 
 
@@ -83,21 +84,35 @@ class FullAdminAuth(AuthValidation):
         """
         if not settings.OAUTH_ENABLE:
             return Auth(db=db)
-        telephone, password = self.validate_token(request, token)
-        options = [
-            joinedload(User.roles).subqueryload(Role.menus),
-            joinedload(User.roles).subqueryload(Role.depts),
-            joinedload(User.depts)
-        ]
-        user = await UserDal(db).get_data(
-            telephone=telephone,
-            password=password,
-            v_return_none=True,
-            v_options=options,
-            is_staff=True
-        )
-        result = await self.validate_user(request, user, db, is_all=False)
-        permissions = self.get_user_permissions(user)
+        claims = self.validate_token(request, token)
+        principal = await self.get_principal(claims)
+        if principal and principal["permissions"] is not None:
+            # 命中缓存时不查询数据库，权限与数据范围直接使用缓存
+            user = await principal_cache.attach_user(db, principal)
+            if user.is_delete or not user.is_staff:
+                user = None
+            result = await self.validate_user(request, user, db, is_all=True)
+            result.data_range = principal["data_range"]
+            result.dept_ids = principal["dept_ids"]
+            result.is_admin = principal["is_admin"]
+            permissions = set(principal["permissions"])
+        else:
+            options = [
+                joinedload(User.roles).subqueryload(Role.menus),
+                joinedload(User.roles).subqueryload(Role.depts),
+                joinedload(User.depts)
+            ]
+            user = await UserDal(db).get_data(
+                claims.user_id,
+                v_return_none=True,
+                v_options=options,
+                is_staff=True
+            )
+            result = await self.validate_user(request, user, db, is_all=False)
+            result.is_admin = user.is_admin()
+            permissions = self.get_user_permissions(user)
+            await principal_cache.set_principal(user, permissions, result.data_range, result.dept_ids)
+        result.permissions = permissions
         if permissions != {'*.*.*'} and self.permissions:
             if not (self.permissions & permissions):
                 raise CustomException(msg="无权限操作", code=status.HTTP_403_FORBIDDEN)
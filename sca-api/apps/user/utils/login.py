@@ -12,7 +12,6 @@ PassLib 是一个用于处理哈希密码的很棒的 Python 包。它支持许
 推荐的算法是 「Bcrypt」：pip install passlib[bcrypt]
 """
 
-from datetime import timedelta
 from redis.asyncio import Redis
 from fastapi import APIRouter, Depends, Request, Body
 from fastapi.security import OAuth2PasswordRequestForm
@@ -22,7 +21,6 @@ from infra.redis.redis_db import  redis_getter
 from infra.exception.exception import CustomException
 from infra.utils import status
 from infra.utils.response import SuccessResponse, ErrorResponse
-from application import settings
 from .login_manage import LoginManage
 from .validation import LoginForm, WXLoginForm
 from apps.record.models import LoginRecord
@@ -30,6 +28,8 @@ from apps.user.crud.menu_dal import MenuDal
 from apps.user.crud.user_dal import UserDal
 from apps.user.models import User
 from .current import FullAdminAuth
+from .principal_cache import principal_cache
+from .session_token import session_token
 from .validation.auth import Auth
 from infra.utils.wx.oauth import WXOAuth
 import jwt
@@ -47,14 +47,15 @@ async def api_login_for_access_token(
     error_code = status.HTTP_401_UNAUTHORIZED
     if not user:
         raise CustomException(status_code=error_code, code=error_code, msg="该手机号不存在")
-    result = User.verify_password(data.password, user.password)
+    result = await user.verify_and_update_password(data.password)
     if not result:
         raise CustomException(status_code=error_code, code=error_code, msg="手机号或密码错误")
     if not user.is_active:
         raise CustomException(status_code=error_code, code=error_code, msg="此手机号已被冻结")
     elif not user.is_staff:
         raise CustomException(status_code=error_code, code=error_code, msg="此手机号无权限")
-    access_token = LoginManage.create_token({"sub": user.telephone, "password": user.password})
+    version = await principal_cache.get_session_version(user.id)
+    access_token = session_token.create_token(user.id, version)
     record = LoginForm(platform='2', method='0', telephone=data.username, password=data.password)
     resp = {"access_token": access_token, "token_type": "bearer"}
     await LoginRecord.create_login_record(db, record, True, request, resp)
@@ -79,18 +80,9 @@ async def login_for_access_token(
         if not result.status:
             raise ValueError(result.msg)
 
-        access_token = LoginManage.create_token(
-            {"sub": result.user.telephone, "is_refresh": False, "password": result.user.password}
-        )
-        expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
-        refresh_token = LoginManage.create_token(
-            payload={"sub": result.user.telephone, "is_refresh": True, "password": result.user.password},
-            expires=expires
-        )
+        version = await principal_cache.get_session_version(result.user.id)
         resp = {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer",
+            **session_token.create_tokens(result.user.id, version),
             "is_reset_password": result.user.is_reset_password,
             "is_wx_server_openid": result.user.is_wx_server_openid
         }
@@ -129,16 +121,9 @@ async def wx_login_for_access_token(
     await UserDal(db).update_login_info(user, request.client.host)
 
     # 登录成功创建 token
-    access_token = LoginManage.create_token({"sub": user.telephone, "is_refresh": False, "password": user.password})
-    expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
-    refresh_token = LoginManage.create_token(
-        payload={"sub": user.telephone, "is_refresh": True, "password": user.password},
-        expires=expires
-    )
+    version = await principal_cache.get_session_version(user.id)
     resp = {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer",
+        **session_token.create_tokens(user.id, version),
         "is_reset_password": user.is_reset_password,
         "is_wx_server_openid": user.is_wx_server_openid
     }
@@ -148,33 +133,22 @@ async def wx_login_for_access_token(
 
 @app.get("/getMenuList", summary="获取当前用户菜单树")
 async def get_menu_list(auth: Auth = Depends(FullAdminAuth())):
-    return SuccessResponse(await MenuDal(auth.db).get_routers(auth.user))
+    return SuccessResponse(await MenuDal(auth.db).get_routers(auth.user, auth.is_admin))
 
 
 @app.post("/token/refresh", summary="刷新Token")
 async def token_refresh(refresh: str = Body(..., title="刷新Token")):
     error_code = status.HTTP_401_UNAUTHORIZED
     try:
-        payload = jwt.decode(refresh, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        telephone: str = payload.get("sub")
-        is_refresh: bool = payload.get("is_refresh")
-        password: str = payload.get("password")
-        if not telephone or not is_refresh or not password:
+        claims = session_token.decode(refresh)
+        if not claims.is_refresh:
             return ErrorResponse("未认证，请您重新登录", code=error_code, status=error_code)
-    except jwt.exceptions.InvalidSignatureError:
+    except (jwt.exceptions.InvalidSignatureError, jwt.exceptions.DecodeError):
         return ErrorResponse("无效认证，请您重新登录", code=error_code, status=error_code)
     except jwt.exceptions.ExpiredSignatureError:
         return ErrorResponse("登录已超时，请您重新登录", code=error_code, status=error_code)
-
-    access_token = LoginManage.create_token({"sub": telephone, "is_refresh": False, "password": password})
-    expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
-    refresh_token = LoginManage.create_token(
-        payload={"sub": telephone, "is_refresh": True, "password": password},
-        expires=expires
-    )
-    resp = {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer"
-    }
-    return SuccessResponse(resp)
+    # 修改密码等操作后会话版本号递增，已签发的刷新令牌不能再使用
+    version = await principal_cache.get_session_version(claims.user_id)
+    if claims.version != version:
+        return ErrorResponse("登录已失效，请您重新登录", code=error_code, status=error_code)
+    return SuccessResponse(session_token.create_tokens(claims.user_id, version))
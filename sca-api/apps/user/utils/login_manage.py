@@ -1,7 +1,4 @@
-from datetime import datetime, timedelta
 from fastapi import Request
-from application import settings
-import jwt
 from infra.redis.redis_db import redis_getter
 from infra.utils.sms.code import CodeSMS
 from .validation import LoginValidation, LoginForm, LoginResult
@@ -16,9 +13,9 @@ class LoginManage:
     @LoginValidation
     async def password_login(self, data: LoginForm, user: models.User, **kwargs) -> LoginResult:
         """
-        验证用户密码
+        验证用户密码，哈希强度低于当前配置时自动更新，登录成功后随登录信息一起保存
         """
-        result = models.User.verify_password(data.password, user.password)
+        result = await user.verify_and_update_password(data.password)
         if result:
             return LoginResult(status=True, msg="验证成功")
         return LoginResult(status=False, msg="手机号或密码错误")
@@ -34,21 +31,3 @@ class LoginManage:
         if result:
             return LoginResult(status=True, msg="验证成功")
         return LoginResult(status=False, msg="验证码错误")
-
-    @staticmethod
-    def create_token(payload: dict, expires: timedelta = None):
-        """
-        创建一个生成新的访问令牌的工具函数。
-
-        pyjwt：https://github.com/jpadilla/pyjwt/blob/master/docs/usage.rst
-        jwt 博客：https://geek-docs.com/python/python-tutorial/j_python-jwt.html
-
-        #TODO 传入的时间为UTC时间datetime.datetime类型，但是在解码时获取到的是本机时间的时间戳
-        """
-        if expires:
-            expire = datetime.utcnow() + expires
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        payload.update({"exp": expire})
-        encoded_jwt = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-        return encoded_jwt
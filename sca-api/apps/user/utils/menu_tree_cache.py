@@ -0,0 +1,200 @@
+"""
+菜单树缓存
+
+全部菜单与角色菜单关系作为一个快照缓存到 Redis，快照带版本号：
+菜单、角色或角色菜单关系修改并提交后递增版本号，下次读取时重新构建。
+进程内同时保留最近一个版本的快照，版本号未变化时无需再次反序列化。
+
+菜单树通过 parent_id -> children 索引一次构建，复杂度 O(N)，
+菜单树选择项与路由表均由完整菜单树剪枝得到。
+"""
+import json
+from collections import defaultdict
+from itertools import chain
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event, select, false
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, ORMExecuteState
+
+from apps.user import models, schemas
+from infra.logger.logger import logger
+from infra.utils.background import BackgroundTasks
+
+# 会话中是否需要使菜单树失效
+SESSION_MENU_KEY = "menu_tree_cache_dirty"
+
+# 修改后需要重建菜单树的表
+MENU_TABLES = {models.Menu.__tablename__, models.Role.__tablename__, models.auth_role_menus.name}
+
+# 包含子菜单的菜单类型：0 目录，1 菜单，2 按钮
+TREE_MENU_TYPES = ("0", "1")
+ROUTER_MENU_TYPES = ("0",)
+BUTTON_MENU_TYPE = "2"
+
+
+class MenuTreeCache:
+    """
+    菜单树缓存
+    """
+
+    KEY_PREFIX = "menu_tree"
+    # 快照缓存时间，单位：秒，版本号变化后旧快照自然过期
+    TTL = 3600
+
+    def __init__(self):
+        self.rd: Redis | None = None
+        self.local_version: str | None = None
+        self.local_snapshot: dict | None = None
+        # 事务提交后执行的失效任务
+        self.tasks = BackgroundTasks("菜单树缓存")
+
+    def bind(self, rd: Redis | None) -> None:
+        """
+        绑定 Redis 客户端，未绑定时每次从数据库构建
+        """
+        self.rd = rd
+        self.local_version = None
+        self.local_snapshot = None
+
+    @property
+    def version_key(self) -> str:
+        return f"{self.KEY_PREFIX}:version"
+
+    def snapshot_key(self, version: str) -> str:
+        return f"{self.KEY_PREFIX}:snapshot:{version}"
+
+    async def get_snapshot(self, db: AsyncSession) -> dict:
+        """
+        获取菜单树快照
+        :return: {"tree": 完整菜单树, "role_menus": {角色 ID: [菜单 ID]}}
+        """
+        if self.rd is None:
+            return await self.build_snapshot(db)
+        try:
+            version = await self.rd.get(self.version_key) or "0"
+            if version == self.local_version and self.local_snapshot is not None:
+                return self.local_snapshot
+            cached = await self.rd.get(self.snapshot_key(version))
+            if cached is not None:
+                snapshot = json.loads(cached)
+            else:
+                snapshot = await self.build_snapshot(db)
+                await self.rd.set(self.snapshot_key(version), json.dumps(snapshot, default=str), ex=self.TTL)
+        except RedisError as e:
+            logger.error(f"读取菜单树缓存失败：{e}")
+            return await self.build_snapshot(db)
+        self.local_version, self.local_snapshot = version, snapshot
+        return snapshot
+
+    @staticmethod
+    async def build_snapshot(db: AsyncSession) -> dict:
+        """
+        从数据库构建菜单树快照
+        """
+        menus = (await db.scalars(select(models.Menu).where(models.Menu.is_delete == false()))).all()
+        nodes = [schemas.MenuTreeListOut.model_validate(menu).model_dump() for menu in menus]
+        role_menus = defaultdict(list)
+        rows = (await db.execute(select(models.auth_role_menus.c.role_id, models.auth_role_menus.c.menu_id))).all()
+        for role_id, menu_id in rows:
+            role_menus[str(role_id)].append(menu_id)
+        return {"tree": build_tree(nodes), "role_menus": role_menus}
+
+    async def invalidate(self) -> None:
+        """
+        递增版本号，使菜单树缓存失效
+        """
+        if self.rd is None:
+            return
+        try:
+            await self.rd.incr(self.version_key)
+        except RedisError as e:
+            logger.error(f"菜单树缓存失效失败：{e}")
+
+
+def build_tree(nodes: list[dict]) -> list[dict]:
+    """
+    通过 parent_id -> children 索引构建菜单树，同级按 order 排序，只有目录与菜单包含子菜单
+    :param nodes: 菜单列表
+    """
+    children = defaultdict(list)
+    for node in sorted(nodes, key=lambda item: item["order"] or 0):
+        children[node["parent_id"] or None].append(node)
+
+    def attach(node: dict) -> dict:
+        node["children"] = [attach(son) for son in children[node["id"]]] if node["menu_type"] in TREE_MENU_TYPES else []
+        return node
+
+    return [attach(root) for root in children[None]]
+
+
+def prune_options(tree: list[dict], only_enabled: bool = False) -> list[dict]:
+    """
+    由菜单树剪枝得到菜单树选择项
+    :param tree: 完整菜单树
+    :param only_enabled: 是否只保留未禁用的菜单，禁用菜单的下级菜单一并移除
+    """
+    return [
+        {"value": node["id"], "label": node["title"], "order": node["order"], "children": prune_options(node["children"], only_enabled)}
+        for node in tree if not (only_enabled and node["disabled"])
+    ]
+
+
+def prune_routers(tree: list[dict], menu_ids: set[int] | None = None, name: str = "") -> list[dict]:
+    """
+    由菜单树剪枝得到路由表，移除按钮、禁用菜单及无权限菜单，只有目录包含子路由
+    :param tree: 完整菜单树
+    :param menu_ids: 有权限的菜单 ID，为 None 时不限制
+    :param name: 上级路由名称，路由名称由上级名称与当前路径拼接，切记Name不能重复
+    """
+    data = []
+    for node in tree:
+        if node["disabled"] or node["menu_type"] == BUTTON_MENU_TYPE:
+            continue
+        if menu_ids is not None and node["id"] not in menu_ids:
+            continue
+        router = schemas.RouterOut(
+            component=node["component"],
+            path=node["path"],
+            redirect=node["redirect"],
+            order=node["order"],
+            meta=schemas.Meta(
+                title=node["title"],
+                icon=node["icon"],
+                hidden=node["hidden"],
+                alwaysShow=node["alwaysShow"],
+                noCache=node["noCache"]
+            )
+        )
+        router.name = name + "".join(part.capitalize() for part in router.path.split("/"))
+        if node["menu_type"] in ROUTER_MENU_TYPES:
+            router.children = prune_routers(node["children"], menu_ids, router.name)
+        data.append(router.model_dump())
+    return data
+
+
+menu_tree_cache = MenuTreeCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (models.Menu, models.Role)):
+            session.info[SESSION_MENU_KEY] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statements(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_select:
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if getattr(table, "name", None) in MENU_TABLES:
+        orm_execute_state.session.info[SESSION_MENU_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop(SESSION_MENU_KEY, False) and menu_tree_cache.rd is not None:
+        menu_tree_cache.tasks.spawn(menu_tree_cache.invalidate())
@@ -0,0 +1,258 @@
+"""
+认证主体缓存
+
+缓存用户基本信息，员工用户同时缓存权限集合、数据范围与部门 ID，
+认证时直接由缓存构建用户实例并关联到数据库会话，不再查询数据库。
+
+失效规则：
+1. 用户数据修改后删除该用户的缓存
+2. 角色、菜单、部门数据修改后递增全局版本号，所有用户的缓存失效
+修改在数据库会话中收集，事务提交后执行失效。
+
+会话版本号：
+每个用户在 Redis 中保存一个会话版本号，签发令牌时写入令牌，认证时与当前版本号比较，
+修改密码等操作后递增版本号，该用户已签发的所有令牌立即失效。
+"""
+import datetime
+import json
+from itertools import chain
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, ORMExecuteState, make_transient_to_detached
+
+from apps.user.models import User, Role, Menu, Dept
+from apps.user.models.m2m import auth_user_roles, auth_role_menus, auth_user_depts, auth_role_depts
+from infra.logger.logger import logger
+from infra.utils.background import BackgroundTasks
+
+# 会话中待失效的用户 ID
+SESSION_USERS_KEY = "principal_cache_users"
+# 会话中是否需要全局失效
+SESSION_GLOBAL_KEY = "principal_cache_global"
+# 会话中待递增会话版本号的用户 ID
+SESSION_REVOKE_KEY = "principal_cache_revoke"
+
+# 修改后影响所有用户权限的表
+GLOBAL_TABLES = {
+    Role.__tablename__,
+    Menu.__tablename__,
+    Dept.__tablename__,
+    auth_role_menus.name,
+    auth_role_depts.name,
+}
+# 修改后影响单个用户的表，批量语句无法确定用户时全局失效
+USER_TABLES = {User.__tablename__, auth_user_roles.name, auth_user_depts.name}
+# 不缓存的用户字段
+USER_EXCLUDE_FIELDS = {"password"}
+
+
+class PrincipalCache:
+    """
+    认证主体缓存
+    """
+
+    KEY_PREFIX = "principal"
+    # 缓存时间，单位：秒
+    TTL = 600
+
+    def __init__(self):
+        self.rd: Redis | None = None
+        # 事务提交后执行的失效与吊销任务
+        self.tasks = BackgroundTasks("认证主体缓存")
+
+    def bind(self, rd: Redis | None) -> None:
+        """
+        绑定 Redis 客户端，未绑定时不缓存
+        """
+        self.rd = rd
+
+    @property
+    def version_key(self) -> str:
+        return f"{self.KEY_PREFIX}:version"
+
+    def user_key(self, user_id: int) -> str:
+        return f"{self.KEY_PREFIX}:user:{user_id}"
+
+    def session_key(self, user_id: int) -> str:
+        return f"{self.KEY_PREFIX}:session:{user_id}"
+
+    @staticmethod
+    def dump_user(user: User) -> dict:
+        """
+        序列化用户字段，不包含密码
+        """
+        return {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(User).column_attrs if attr.key not in USER_EXCLUDE_FIELDS
+        }
+
+    @staticmethod
+    def load_user(data: dict) -> User:
+        """
+        由缓存构建游离状态的用户实例，未缓存的字段为过期状态
+        """
+        values = {}
+        for attr in inspect(User).column_attrs:
+            if attr.key not in data:
+                continue
+            value = data[attr.key]
+            if value is not None and isinstance(attr.columns[0].type, DateTime):
+                value = datetime.datetime.fromisoformat(value)
+            values[attr.key] = value
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    async def attach_user(self, db: AsyncSession, principal: dict) -> User:
+        """
+        将缓存的用户关联到数据库会话，不执行查询，修改后可正常提交
+        注意：角色、部门等关系未加载，需要时请重新查询
+        """
+        return await db.merge(self.load_user(principal["user"]), load=False)
+
+    async def get_session_version(self, user_id: int) -> int:
+        """
+        获取用户当前会话版本号，签发令牌时调用
+        """
+        if self.rd is None:
+            return 0
+        try:
+            return int(await self.rd.get(self.session_key(user_id)) or 0)
+        except RedisError as e:
+            logger.error(f"读取会话版本号失败：{e}")
+            return 0
+
+    async def get(self, user_id: int) -> tuple[int, dict | None]:
+        """
+        获取会话版本号与认证主体，一次请求 Redis
+        :param user_id: 令牌中的用户 ID
+        :return: (会话版本号, 认证主体)，认证主体不存在或已失效时为 None
+        """
+        if self.rd is None:
+            return 0, None
+        try:
+            session_version, cached, version = await self.rd.mget(
+                self.session_key(user_id), self.user_key(user_id), self.version_key
+            )
+        except RedisError as e:
+            logger.error(f"读取认证主体缓存失败：{e}")
+            return 0, None
+        session_version = int(session_version or 0)
+        if cached is None:
+            return session_version, None
+        principal = json.loads(cached)
+        if principal["version"] != (version or "0"):
+            return session_version, None
+        return session_version, principal
+
+    async def set_principal(
+            self,
+            user: User,
+            permissions: set | None = None,
+            data_range: int | None = None,
+            dept_ids: list | None = None
+    ) -> None:
+        """
+        缓存认证主体
+        :param user: 用户，缓存权限时需已加载角色、菜单、部门
+        :param permissions: 权限集合，为 None 时只缓存用户基本信息
+        :param data_range: 数据范围
+        :param dept_ids: 数据范围内的部门 ID
+        """
+        if self.rd is None:
+            return
+        try:
+            version = await self.rd.get(self.version_key) or "0"
+            principal = {
+                "user": self.dump_user(user),
+                "is_admin": user.is_admin() if permissions is not None else False,
+                "permissions": sorted(permissions) if permissions is not None else None,
+                "data_range": data_range,
+                "dept_ids": dept_ids,
+                "version": version,
+            }
+            await self.rd.set(self.user_key(user.id), json.dumps(principal, default=str), ex=self.TTL)
+        except RedisError as e:
+            logger.error(f"写入认证主体缓存失败：{e}")
+
+    async def revoke_sessions(self, user_ids: set[int]) -> None:
+        """
+        递增会话版本号，使用户已签发的令牌全部失效
+        """
+        if self.rd is None or not user_ids:
+            return
+        try:
+            pipe = self.rd.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.incr(self.session_key(user_id))
+            await pipe.execute()
+        except RedisError as e:
+            logger.error(f"递增会话版本号失败：{e}")
+
+    @staticmethod
+    def revoke_on_commit(db: AsyncSession, user_ids: set[int]) -> None:
+        """
+        事务提交后使用户已签发的令牌失效，用于修改密码等操作
+        """
+        db.sync_session.info.setdefault(SESSION_REVOKE_KEY, set()).update(user_ids)
+
+    async def invalidate(self, user_ids: set[int] = None, all_users: bool = False) -> None:
+        """
+        使认证主体缓存失效
+        :param user_ids: 需要失效的用户 ID
+        :param all_users: 是否使所有用户失效
+        """
+        if self.rd is None:
+            return
+        try:
+            if all_users:
+                await self.rd.incr(self.version_key)
+            elif user_ids:
+                await self.rd.delete(*[self.user_key(user_id) for user_id in user_ids])
+        except RedisError as e:
+            logger.error(f"认证主体缓存失效失败：{e}")
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    """
+    收集本次刷新中修改的用户、角色、菜单、部门
+    """
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User):
+            session.info.setdefault(SESSION_USERS_KEY, set()).add(obj.id)
+        elif isinstance(obj, (Role, Menu, Dept)):
+            session.info[SESSION_GLOBAL_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statements(orm_execute_state: ORMExecuteState) -> None:
+    """
+    收集直接执行的 insert、update、delete 语句，无法确定具体用户时全局失效
+    """
+    if orm_execute_state.is_select:
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name in GLOBAL_TABLES or (name in USER_TABLES and not orm_execute_state.is_insert):
+        orm_execute_state.session.info[SESSION_GLOBAL_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    user_ids = session.info.pop(SESSION_USERS_KEY, None)
+    all_users = session.info.pop(SESSION_GLOBAL_KEY, False)
+    revoke_ids = session.info.pop(SESSION_REVOKE_KEY, None)
+    if principal_cache.rd is None:
+        return
+    if user_ids or all_users:
+        principal_cache.tasks.spawn(principal_cache.invalidate(user_ids, all_users))
+    if revoke_ids and not principal_cache.tasks.spawn(principal_cache.revoke_sessions(revoke_ids)):
+        logger.error(f"没有运行中的事件循环，用户 {revoke_ids} 的令牌未能吊销")
+
@@ -0,0 +1,103 @@
+"""
+会话令牌
+
+令牌只包含用户 ID、会话版本号与是否为刷新令牌，不再包含手机号与密码哈希：
+{"sub": "1", "ver": 0, "exp": 1700000000}，刷新令牌额外包含 "is_refresh": true
+
+验证结果按令牌摘要缓存在进程内 LRU 中，令牌过期前重复请求无需再次验证签名；
+令牌是否已被吊销通过 Redis 中的会话版本号判断，见 principal_cache.PrincipalCache.get。
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import jwt
+
+from application import settings
+
+
+class TokenClaims(NamedTuple):
+    user_id: int
+    version: int
+    is_refresh: bool
+    exp: int
+
+
+class SessionToken:
+    """
+    会话令牌签发与验证
+    """
+
+    # 进程内缓存的令牌数量
+    LRU_SIZE = 4096
+
+    def __init__(self):
+        self.lru: OrderedDict[str, TokenClaims] = OrderedDict()
+        self.metrics = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def create_token(user_id: int, version: int, is_refresh: bool = False, expires: timedelta = None) -> str:
+        """
+        签发令牌
+        :param user_id: 用户 ID
+        :param version: 会话版本号
+        :param is_refresh: 是否为刷新令牌
+        :param expires: 有效时间，默认为 ACCESS_TOKEN_EXPIRE_MINUTES
+        """
+        expires = expires or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        payload = {"sub": str(user_id), "ver": version, "exp": datetime.utcnow() + expires}
+        if is_refresh:
+            payload["is_refresh"] = True
+        return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    def create_tokens(self, user_id: int, version: int) -> dict:
+        """
+        签发访问令牌与刷新令牌
+        """
+        return {
+            "access_token": self.create_token(user_id, version),
+            "refresh_token": self.create_token(
+                user_id,
+                version,
+                is_refresh=True,
+                expires=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+            ),
+            "token_type": "bearer"
+        }
+
+    def decode(self, token: str) -> TokenClaims:
+        """
+        验证令牌并解析内容，验证失败时抛出 jwt 异常
+        """
+        key = hashlib.sha256(token.encode()).hexdigest()
+        claims = self.lru.get(key)
+        if claims is not None:
+            if claims.exp <= time.time():
+                self.lru.pop(key, None)
+                raise jwt.exceptions.ExpiredSignatureError("Signature has expired")
+            self.lru.move_to_end(key)
+            self.metrics["hits"] += 1
+            return claims
+        self.metrics["misses"] += 1
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        try:
+            claims = TokenClaims(
+                user_id=int(payload["sub"]),
+                version=int(payload["ver"]),
+                is_refresh=bool(payload.get("is_refresh")),
+                exp=int(payload["exp"])
+            )
+        except (KeyError, TypeError, ValueError):
+            raise jwt.exceptions.DecodeError("Invalid payload")
+        self.lru[key] = claims
+        if len(self.lru) > self.LRU_SIZE:
+            self.lru.popitem(last=False)
+        return claims
+
+    def stats(self) -> dict:
+        return {**self.metrics, "lru_size": len(self.lru)}
+
+
+session_token = SessionToken()
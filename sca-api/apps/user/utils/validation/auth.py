@@ -9,6 +9,8 @@ from infra.utils import status
 from datetime import timedelta, datetime
 # 修改导入路径
 from apps.user.crud.user_dal import UserDal
+from apps.user.utils.principal_cache import principal_cache
+from apps.user.utils.session_token import session_token, TokenClaims
 
 
 class Auth(BaseModel):
@@ -16,6 +18,8 @@ class Auth(BaseModel):
     db: AsyncSession
     data_range: int | None = None
     dept_ids: list | None = []
+    permissions: set | None = None
+    is_admin: bool = False
 
     class Config:
         # 接收任意类型
@@ -36,7 +40,7 @@ class AuthValidation:
     # status_code = 403 时，表示强制要求重新登录，因无系统权限，而进入到系统访问等问题导致
 
     @classmethod
-    def validate_token(cls, request: Request, token: str | None) -> tuple[str, bool]:
+    def validate_token(cls, request: Request, token: str | None) -> TokenClaims:
         """
         验证用户 token
         """
@@ -47,12 +51,8 @@ class AuthValidation:
                 status_code=status.HTTP_403_FORBIDDEN
             )
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            telephone: str = payload.get("sub")
-            exp: int = payload.get("exp")
-            is_refresh: bool = payload.get("is_refresh")
-            password: bool = payload.get("password")
-            if not telephone or is_refresh or not password:
+            claims = session_token.decode(token)
+            if claims.is_refresh:
                 raise CustomException(
                     msg="未认证，请您重新登录",
                     code=status.HTTP_403_FORBIDDEN,
@@ -60,10 +60,7 @@ class AuthValidation:
                 )
             # 计算当前时间 + 缓冲时间是否大于等于 JWT 过期时间
             buffer_time = (datetime.now() + timedelta(minutes=settings.ACCESS_TOKEN_CACHE_MINUTES)).timestamp()
-            # print("过期时间", exp, datetime.fromtimestamp(exp))
-            # print("当前时间", buffer_time, datetime.fromtimestamp(buffer_time))
-            # print("剩余时间", exp - buffer_time)
-            if buffer_time >= exp:
+            if buffer_time >= claims.exp:
                 request.scope["if-refresh"] = 1
             else:
                 request.scope["if-refresh"] = 0
@@ -75,7 +72,31 @@ class AuthValidation:
             )
         except jwt.exceptions.ExpiredSignatureError:
             raise CustomException(msg="认证已失效，请您重新登录", code=cls.error_code, status_code=cls.error_code)
-        return telephone, password
+        return claims
+
+    @classmethod
+    async def get_principal(cls, claims: TokenClaims) -> dict | None:
+        """
+        验证令牌会话版本号并获取缓存的认证主体
+        :return: 未缓存时返回 None
+        """
+        session_version, principal = await principal_cache.get(claims.user_id)
+        if claims.version != session_version:
+            raise CustomException(msg="认证已失效，请您重新登录", code=cls.error_code, status_code=cls.error_code)
+        return principal
+
+    @classmethod
+    async def get_user(cls, claims: TokenClaims, db: AsyncSession) -> User | None:
+        """
+        获取令牌对应的用户，命中缓存时不查询数据库
+        """
+        principal = await cls.get_principal(claims)
+        if principal is not None:
+            return await principal_cache.attach_user(db, principal)
+        user = await UserDal(db).get_data(claims.user_id, v_return_none=True)
+        if user is not None:
+            await principal_cache.set_principal(user)
+        return user
 
     @classmethod
     async def validate_user(cls, request: Request, user: User, db: AsyncSession, is_all: bool = True) -> Auth:
@@ -50,4 +50,9 @@ async def put_dept(
         data: schemas.Dept,
         auth: Auth = Depends(FullAdminAuth())
 ):
-    return SuccessResponse(await DeptDal(auth.db).put_data(data_id, data))
\ No newline at end of file
+    return SuccessResponse(await DeptDal(auth.db).put_data(data_id, data))
+
+@app.post("/dept/closure/rebuild", summary="重建部门闭包表", description="根据上级部门关系重建，用于初始化或修复数据")
+async def rebuild_dept_closure(auth: Auth = Depends(FullAdminAuth())):
+    count = await DeptDal(auth.db).rebuild_closure()
+    return SuccessResponse(f"重建完成，共 {count} 条部门关系")
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends
 
 from apps.user.crud.test_dal import TestDal
-from apps.user.utils.current import OpenAuth
+from apps.user.utils.current import OpenAuth, FullAdminAuth
 from apps.user.utils.validation.auth import Auth
+from infra.db.crud import query_plan_cache
+from infra.db.result_cache import result_cache
 from infra.utils.response import SuccessResponse
 
 app = APIRouter()
@@ -13,4 +15,9 @@ app = APIRouter()
 ###########################################################
 @app.get("/test", summary="接口测试")
 async def test(auth: Auth = Depends(OpenAuth())):
-    return SuccessResponse(await TestDal(auth.db).relationship_where_operations_has())
\ No newline at end of file
+    return SuccessResponse(await TestDal(auth.db).relationship_where_operations_has())
+
+
+@app.get("/test/query/cache", summary="查询计划缓存与查询结果缓存命中情况")
+async def query_cache_stats(auth: Auth = Depends(FullAdminAuth())):
+    return SuccessResponse({**query_plan_cache.stats(), "result_cache": result_cache.stats()})
@@ -9,6 +9,7 @@ from apps.user.utils.current import AllUserAuth, FullAdminAuth
 from apps.user.utils.validation.auth import Auth
 from infra.core.dependencies import IdList
 from infra.redis.redis_db import redis_getter
+from infra.utils.notification import notification_dispatcher
 from infra.utils.response import SuccessResponse, ErrorResponse
 
 app = APIRouter()
@@ -85,8 +86,10 @@ async def post_user_current_update_avatar(file: UploadFile, auth: Auth = Depends
 
 @app.get("/user/admin/current/info", summary="获取当前管理员信息")
 async def get_user_admin_current_info(auth: Auth = Depends(FullAdminAuth())):
-    result = schemas.UserOut.model_validate(auth.user).model_dump()
-    result["permissions"] = list(FullAdminAuth.get_user_permissions(auth.user))
+    options = [joinedload(models.User.roles), joinedload(models.User.depts)]
+    user = await UserDal(auth.db).get_data(auth.user.id, v_options=options)
+    result = schemas.UserOut.model_validate(user).model_dump()
+    result["permissions"] = list(auth.permissions or [])
     return SuccessResponse(result)
 
 
@@ -129,6 +132,17 @@ async def post_users_init_password_send_email(
     return SuccessResponse(await UserDal(auth.db).init_password_send_email(ids.ids, rd))
 
 
+@app.get("/users/init/password/jobs/{job_id}", summary="获取初始化密码通知任务的发送结果")
+async def get_users_init_password_job(
+        job_id: str,
+        auth: Auth = Depends(FullAdminAuth(permissions=["auth.user.reset"]))
+):
+    job = await notification_dispatcher.get_job(job_id)
+    if job is None:
+        return ErrorResponse("通知任务不存在或已过期")
+    return SuccessResponse(job)
+
+
 @app.put("/users/wx/server/openid", summary="更新当前用户服务端微信平台openid")
 async def put_user_wx_server_openid(code: str, auth: Auth = Depends(AllUserAuth()), rd: Redis = Depends(redis_getter)):
     result = await UserDal(auth.db).update_wx_server_openid(code, auth.user, rd)
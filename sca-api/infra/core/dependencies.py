@@ -14,6 +14,7 @@ class QueryParams:
             self.limit = params.limit
             self.v_order = params.v_order
             self.v_order_field = params.v_order_field
+            self.v_cursor = params.v_cursor
 
     def dict(self, exclude: list[str] = None) -> dict:
         result = copy.deepcopy(self.__dict__)
@@ -31,6 +32,7 @@ class QueryParams:
         del params["limit"]
         del params["v_order"]
         del params["v_order_field"]
+        params.pop("v_cursor", None)
         return params
 
 
@@ -39,12 +41,23 @@ class Paging(QueryParams):
     列表分页
     """
 
-    def __init__(self, page: int = 1, limit: int = 10, v_order_field: str = None, v_order: str = None):
+    def __init__(
+            self,
+            page: int = 1,
+            limit: int = 10,
+            v_order_field: str = None,
+            v_order: str = None,
+            cursor: str = None
+    ):
+        """
+        :param cursor: 游标分页时上一次返回的 next 或 prev 游标，存在时忽略 page
+        """
         super().__init__()
         self.page = page
         self.limit = limit
         self.v_order = v_order
         self.v_order_field = v_order_field
+        self.v_cursor = cursor
 
 
 class IdList:
@@ -2,21 +2,54 @@ from fastapi import FastAPI
 from motor.motor_asyncio import AsyncIOMotorClient
 from application.settings import REDIS_DB_URL, MONGO_DB_URL, MONGO_DB_NAME, EVENTS
 from infra.utils.cache import Cache
+from infra.db.result_cache import result_cache
+from apps.user.utils.principal_cache import principal_cache
+from apps.user.utils.menu_tree_cache import menu_tree_cache
+from infra.core.middleware import operation_record_writer
+from infra.mongo.retention import record_retention
+from infra.utils.password import password_hasher
+from infra.utils.ip_manage import ip_locator
+from infra.utils.notification import notification_dispatcher
+from apps.record.utils.location_backfill import location_backfill
 from redis import asyncio as aioredis
 from redis.exceptions import AuthenticationError, TimeoutError, RedisError
 from contextlib import asynccontextmanager
 from infra.utils.tools import import_modules_async
-from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
+from infra.db.database import session_factory
 from infra.logger.logger import logger
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await import_modules_async(EVENTS, "全局事件", app=app, status=True)
+    await backfill_dept_closure()
 
     yield
 
     await import_modules_async(EVENTS, "全局事件", app=app, status=False)
+    password_hasher.shutdown()
+    await location_backfill.stop()
+    await ip_locator.close()
+
+
+async def backfill_dept_closure() -> None:
+    """
+    部门闭包表为空时根据部门上级关系重建
+
+    数据权限按部门闭包表查询下级部门，已有数据库升级后闭包表为空，
+    启动时自动回填，不依赖手动调用重建接口；回填失败只记录日志，不影响启动
+    """
+    from apps.user.crud.dept_dal import DeptDal
+    try:
+        async with session_factory() as session:
+            async with session.begin():
+                count = await DeptDal(session).ensure_closure()
+    except SQLAlchemyError as e:
+        logger.error(f"部门闭包表回填失败：{e}")
+        return
+    if count:
+        logger.info(f"部门闭包表为空，已根据部门上级关系回填 {count} 条关系")
 
 
 async def connect_redis(app: FastAPI, status: bool):
@@ -69,6 +102,11 @@ async def connect_redis(app: FastAPI, status: bool):
             raise TimeoutError(f"Redis 连接超时，地址或者端口错误: {e}")
         except RedisError as e:
             raise RedisError(f"Redis 连接失败: {e}")
+        result_cache.bind(rd)
+        principal_cache.bind(rd)
+        menu_tree_cache.bind(rd)
+        ip_locator.bind(rd)
+        notification_dispatcher.bind(rd)
         try:
             await Cache(app.state.redis).cache_tab_names()
         except ProgrammingError as e:
@@ -76,6 +114,15 @@ async def connect_redis(app: FastAPI, status: bool):
             print(f"sqlalchemy.exc.ProgrammingError: {e}")
     else:
         print("Redis 连接关闭")
+        # 等待事务提交后的令牌吊销、缓存失效等后台任务完成后再关闭连接
+        await principal_cache.tasks.wait()
+        await result_cache.tasks.wait()
+        await menu_tree_cache.tasks.wait()
+        result_cache.bind(None)
+        principal_cache.bind(None)
+        menu_tree_cache.bind(None)
+        ip_locator.bind(None)
+        notification_dispatcher.bind(None)
         await app.state.redis.close()
 
 
@@ -106,6 +153,10 @@ async def connect_mongo(app: FastAPI, status: bool):
             print("MongoDB 连接成功", data)
         except Exception as e:
             raise ValueError(f"MongoDB 连接失败: {e}")
+        operation_record_writer.start(app.state.mongo)
+        record_retention.start(app.state.mongo)
     else:
         print("MongoDB 连接关闭")
+        await operation_record_writer.stop()
+        await record_retention.stop()
         app.state.mongo_client.close()
@@ -5,6 +5,7 @@
 import datetime
 import json
 import time
+from functools import lru_cache
 from fastapi import Request, Response
 from infra.logger.logger import logger
 from fastapi import FastAPI
@@ -13,8 +14,7 @@ from user_agents import parse
 from application.settings import OPERATION_RECORD_METHOD, MONGO_DB_ENABLE, IGNORE_OPERATION_FUNCTION, \
     DEMO_WHITE_LIST_PATH, DEMO, DEMO_BLACK_LIST_PATH
 from infra.utils.response import ErrorResponse
-from apps.record.crud import OperationRecordDal
-from infra.mongo.mongo_db import mongo_getter
+from infra.mongo.batch_writer import MongoBatchWriter
 from infra.utils import status
 
 
@@ -44,10 +44,49 @@ def register_request_log_middleware(app: FastAPI):
         return response
 
 
+@lru_cache(maxsize=1024)
+def parse_user_agent(user_agent: str | None) -> tuple[str, str]:
+    """
+    解析 user-agent，客户端数量有限，缓存解析结果
+    :return: 操作系统、浏览器
+    """
+    result = parse(user_agent or "")
+    return (
+        f"{result.os.family} {result.os.version_string}",
+        f"{result.browser.family} {result.browser.version_string}"
+    )
+
+
+def build_operation_record(record: dict) -> dict:
+    """
+    生成操作记录文档，在后台写入任务中执行，解析 user-agent 与请求体不占用请求时间
+    :param record: 请求中收集的原始数据
+    """
+    system, browser = parse_user_agent(record.pop("user_agent"))
+    body = record.pop("body")
+    if isinstance(body, bytes):
+        body = body.decode(errors="replace")
+        if body:
+            try:
+                body = json.loads(body)
+            except ValueError:
+                pass
+    params = {
+        "body": body,
+        "query_params": record.pop("query_params") or None,
+        "path_params": record.pop("path_params") or None,
+    }
+    return {**record, "system": system, "browser": browser, "params": json.dumps(params)}
+
+
+# 操作记录批量写入器，随 MongoDB 连接启动与关闭
+operation_record_writer = MongoBatchWriter("operation_record", transform=build_operation_record)
+
+
 def register_operation_record_middleware(app: FastAPI):
     """
     操作记录中间件
-    用于将使用认证的操作全部记录到 mongodb 数据库中
+    用于将使用认证的操作全部记录到 mongodb 数据库中，记录放入队列后由后台任务批量写入
     :param app:
     :return:
     """
@@ -69,33 +108,17 @@ def register_operation_record_middleware(app: FastAPI):
         elif route.name in IGNORE_OPERATION_FUNCTION:
             return response
         process_time = time.time() - start_time
-        user_agent = parse(request.headers.get("user-agent"))
-        system = f"{user_agent.os.family} {user_agent.os.version_string}"
-        browser = f"{user_agent.browser.family} {user_agent.browser.version_string}"
-        query_params = dict(request.query_params.multi_items())
-        path_params = request.path_params
-        if isinstance(request.scope.get('body'), str):
-            body = request.scope.get('body')
-        else:
-            body = request.scope.get('body').decode()
-            if body:
-                body = json.loads(body)
-        params = {
-            "body": body,
-            "query_params": query_params if query_params else None,
-            "path_params": path_params if path_params else None,
-        }
         content_length = response.raw_headers[0][1]
         assert isinstance(route, APIRoute)
-        document = {
+        now = datetime.datetime.now()
+        operation_record_writer.put({
             "process_time": process_time,
             "telephone": telephone,
             "user_id": user_id,
             "user_name": user_name,
             "request_api": request.url.__str__(),
             "client_ip": request.client.host,
-            "system": system,
-            "browser": browser,
+            "user_agent": request.headers.get("user-agent"),
             "request_method": request.method,
             "api_path": route.path,
             "summary": route.summary,
@@ -104,10 +127,12 @@ def register_operation_record_middleware(app: FastAPI):
             "route_name": route.name,
             "status_code": response.status_code,
             "content_length": content_length,
-            "create_datetime": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "params": json.dumps(params)
-        }
-        await OperationRecordDal(mongo_getter(request)).create_data(document)
+            "create_datetime": now,
+            "update_datetime": now,
+            "body": request.scope.get('body'),
+            "query_params": dict(request.query_params.multi_items()),
+            "path_params": request.path_params,
+        })
         return response
 
 
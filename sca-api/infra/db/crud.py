@@ -3,14 +3,20 @@
 # sqlalchemy 增删改操作：https://docs.sqlalchemy.org/en/20/orm/queryguide/dml.html
 # sqlalchemy 1.x 语法迁移到 2.x :https://docs.sqlalchemy.org/en/20/changelog/migration_20.html#migration-20-query-usage
 
+import base64
 import datetime
+import json
 from fastapi import HTTPException
+from functools import lru_cache
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import func, delete, update, BinaryExpression, ScalarResult, select, false, insert
+from pydantic import TypeAdapter
+from sqlalchemy import func, delete, update, BinaryExpression, ScalarResult, select, false, insert, or_, and_, text
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.strategy_options import _AbstractLoad
 from starlette import status
 from ..exception.exception import CustomException
+from .result_cache import result_cache, SESSION_TABLES_KEY
 from sqlalchemy.sql.selectable import Select as SelectType
 from typing import Any, Union
 
@@ -90,45 +96,32 @@ class QueryBuilder:
     def _dict_filter(self, **kwargs) -> list[BinaryExpression]:
         """
         字典过滤
+
+        相同模型、相同过滤形态（字段 + 操作符）的过滤条件只解析一次，解析结果缓存在 query_plan_cache 中，
+        之后只需代入参数值；生成的 SQL 结构稳定，可命中 SQLAlchemy 的编译缓存
         :param kwargs: 过滤条件
         """
-        conditions = []
+        shape = []
+        values = []
         for field, value in kwargs.items():
-            if value is not None and value != "":
-                attr = getattr(self.model, field)
-                if isinstance(value, tuple):
-                    if len(value) == 1:
-                        if value[0] == "None":
-                            conditions.append(attr.is_(None))
-                        elif value[0] == "not None":
-                            conditions.append(attr.isnot(None))
-                        else:
-                            raise CustomException("SQL查询语法错误")
-                    elif len(value) == 2 and value[1] not in [None, [], ""]:
-                        if value[0] == "date":
-                            # 根据日期查询， 关键函数是：func.time_format和func.date_format
-                            conditions.append(func.date_format(attr, "%Y-%m-%d") == value[1])
-                        elif value[0] == "like":
-                            conditions.append(attr.like(f"%{value[1]}%"))
-                        elif value[0] == "in":
-                            conditions.append(attr.in_(value[1]))
-                        elif value[0] == "between" and len(value[1]) == 2:
-                            conditions.append(attr.between(value[1][0], value[1][1]))
-                        elif value[0] == "month":
-                            conditions.append(func.date_format(attr, "%Y-%m") == value[1])
-                        elif value[0] == "!=":
-                            conditions.append(attr != value[1])
-                        elif value[0] == ">":
-                            conditions.append(attr > value[1])
-                        elif value[0] == ">=":
-                            conditions.append(attr >= value[1])
-                        elif value[0] == "<=":
-                            conditions.append(attr <= value[1])
-                        else:
-                            raise CustomException("SQL查询语法错误")
-                else:
-                    conditions.append(attr == value)
-        return conditions
+            if value is None or value == "":
+                continue
+            if isinstance(value, tuple):
+                if len(value) == 1:
+                    if value[0] not in QueryPlanCache.NULL_OPERATORS:
+                        raise CustomException("SQL查询语法错误")
+                    shape.append((field, value[0]))
+                    values.append(None)
+                elif len(value) == 2 and value[1] not in [None, [], ""]:
+                    if value[0] in QueryPlanCache.NULL_OPERATORS:
+                        raise CustomException("SQL查询语法错误")
+                    shape.append((field, value[0]))
+                    values.append(value[1])
+            else:
+                shape.append((field, "=="))
+                values.append(value)
+        plan = query_plan_cache.get_filter_plan(self.model, tuple(shape))
+        return [build(value) for build, value in zip(plan, values)]
 
     def add_order(self, sql: SelectType, v_order: str = None, v_order_field: str = None) -> SelectType:
         """
@@ -147,6 +140,206 @@ class QueryBuilder:
         return sql
 
 
+def _day_range(value: Any) -> tuple[str, str]:
+    """
+    日期转换为 [当天, 次日) 区间，格式 YYYY-MM-DD
+    """
+    day = datetime.date.fromisoformat(str(value)[:10])
+    return day.isoformat(), (day + datetime.timedelta(days=1)).isoformat()
+
+
+def _range(attr: Any, bounds: tuple[str, str]) -> BinaryExpression:
+    return and_(attr >= bounds[0], attr < bounds[1])
+
+
+def _month_range(value: Any) -> tuple[str, str]:
+    """
+    月份转换为 [当月1日, 次月1日) 区间，格式 YYYY-MM-DD
+    """
+    year, month = (int(item) for item in str(value)[:7].split("-"))
+    start = datetime.date(year, month, 1)
+    end = datetime.date(year + month // 12, month % 12 + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+class QueryPlanCache:
+    """
+    查询计划缓存
+
+    以 (模型, 过滤形态) 为键缓存过滤条件构建函数，避免每次查询重复解析操作符与 getattr；
+    date、month 条件改写为范围条件，使字段索引可用，字符串与日期时间字段均适用。
+    SQL 的编译缓存由 SQLAlchemy 引擎负责，命中情况由 register_compiled_cache_stats 统计
+    """
+
+    OPERATORS = {
+        "==": lambda attr: lambda value: attr == value,
+        "None": lambda attr: lambda value: attr.is_(None),
+        "not None": lambda attr: lambda value: attr.isnot(None),
+        "like": lambda attr: lambda value: attr.like(f"%{value}%"),
+        "in": lambda attr: lambda value: attr.in_(value),
+        "between": lambda attr: lambda value: attr.between(value[0], value[1]),
+        "!=": lambda attr: lambda value: attr != value,
+        ">": lambda attr: lambda value: attr > value,
+        ">=": lambda attr: lambda value: attr >= value,
+        "<=": lambda attr: lambda value: attr <= value,
+        "date": lambda attr: lambda value: _range(attr, _day_range(value)),
+        "month": lambda attr: lambda value: _range(attr, _month_range(value)),
+    }
+    NULL_OPERATORS = ("None", "not None")
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.plans: dict[tuple, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self.compiled = {}
+
+    def get_filter_plan(self, model: Any, shape: tuple) -> list:
+        """
+        获取过滤条件构建函数列表
+        :param model: 模型
+        :param shape: ((字段, 操作符), ...)
+        """
+        key = (model, shape)
+        plan = self.plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            return plan
+        self.misses += 1
+        plan = []
+        for field, operator in shape:
+            builder = self.OPERATORS.get(operator)
+            if builder is None:
+                raise CustomException("SQL查询语法错误")
+            plan.append(builder(getattr(model, field)))
+        if len(self.plans) >= self.maxsize:
+            self.plans.clear()
+        self.plans[key] = plan
+        return plan
+
+    def stats(self) -> dict:
+        """
+        查询计划缓存与 SQL 编译缓存命中情况，用于调试
+        """
+        total = self.hits + self.misses
+        compiled_total = sum(self.compiled.values())
+        return {
+            "filter_plan": {
+                "size": len(self.plans),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            },
+            "compiled_sql": {
+                **self.compiled,
+                "hit_rate": round(self.compiled.get("CACHE_HIT", 0) / compiled_total, 4) if compiled_total else None,
+            },
+        }
+
+
+query_plan_cache = QueryPlanCache()
+
+
+def register_compiled_cache_stats(engine: Any) -> None:
+    """
+    统计 SQLAlchemy 编译缓存命中情况，结果汇总到 query_plan_cache.stats()
+    :param engine: 同步引擎，异步引擎传入 async_engine.sync_engine
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _count_cache_hit(conn, cursor, statement, parameters, context, executemany):
+        name = str(getattr(context, "cache_hit", "NO_CACHE_KEY"))
+        query_plan_cache.compiled[name] = query_plan_cache.compiled.get(name, 0) + 1
+
+
+class KeysetPaginator:
+    """
+    游标分页器，按 (排序字段, id) 定位分页起点，避免深分页时 offset 扫描
+
+    游标为 base64 编码的 JSON：{"v": 排序字段值, "id": 主键, "d": "next" 或 "prev"}，对调用方不透明；
+    排序字段值为 NULL 的数据无法通过游标定位，使用游标分页的排序字段应为非空字段
+    """
+
+    def __init__(self, model: Any, v_order: str = None, v_order_field: str = None):
+        self.model = model
+        self.desc = v_order in QueryBuilder.ORDER_FIELD
+        self.order_field = v_order_field
+
+    @staticmethod
+    def encode(value: Any, data_id: int, direction: str) -> str:
+        payload = json.dumps({"v": jsonable_encoder(value), "id": data_id, "d": direction}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode(cursor: str) -> dict:
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            data = json.loads(payload)
+            if data["d"] not in ("next", "prev"):
+                raise ValueError(data["d"])
+            return data
+        except (ValueError, KeyError, TypeError):
+            raise CustomException("分页游标无效")
+
+    def _order_by(self, reverse: bool) -> list:
+        desc = self.desc != reverse
+        columns = [getattr(self.model, self.order_field)] if self.order_field else []
+        columns.append(self.model.id)
+        return [column.desc() if desc else column.asc() for column in columns]
+
+    def _seek_condition(self, cursor: dict, reverse: bool) -> BinaryExpression:
+        # 正序向后翻页取大于游标的数据，倒序或向前翻页反之
+        greater = self.desc == reverse
+        id_condition = self.model.id > cursor["id"] if greater else self.model.id < cursor["id"]
+        if not self.order_field:
+            return id_condition
+        field = getattr(self.model, self.order_field)
+        field_condition = field > cursor["v"] if greater else field < cursor["v"]
+        return or_(field_condition, and_(field == cursor["v"], id_condition))
+
+    def apply(self, sql: SelectType, limit: int, cursor: str = None) -> tuple[SelectType, bool]:
+        """
+        为查询添加游标条件与排序，多查询一条数据用于判断是否还有下一页
+        :return: 更新后的查询，是否为向前翻页
+        """
+        data = self.decode(cursor) if cursor else None
+        reverse = bool(data and data["d"] == "prev")
+        sql = sql.order_by(None).order_by(*self._order_by(reverse))
+        if data:
+            sql = sql.where(self._seek_condition(data, reverse))
+        if limit != 0:
+            sql = sql.limit(limit + 1)
+        return sql, reverse
+
+    def page(self, rows: list, limit: int, reverse: bool = False, has_prev: bool = False) -> tuple[list, dict]:
+        """
+        截取当前页数据并生成前后页游标
+        :param rows: 多查询一条的数据
+        :param limit: 当前页数据量
+        :param reverse: 是否为向前翻页
+        :param has_prev: 向后翻页时是否存在上一页
+        :return: 当前页数据，{"next": 下一页游标, "prev": 上一页游标}
+        """
+        has_more = limit != 0 and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+        if reverse:
+            rows = list(reversed(rows))
+            has_next, has_prev = True, has_more
+        else:
+            has_next = has_more
+
+        def make(obj: Any, direction: str) -> str:
+            value = getattr(obj, self.order_field) if self.order_field else None
+            return self.encode(value, obj.id, direction)
+
+        return rows, {
+            "next": make(rows[-1], "next") if rows and has_next else None,
+            "prev": make(rows[0], "prev") if rows and has_prev else None,
+        }
+
+
 class DataSerializer:
     """
     数据序列化器，负责数据的序列化和反序列化
@@ -168,6 +361,40 @@ class DataSerializer:
             return self.schema.model_validate(obj).model_dump()
         return jsonable_encoder(obj)
 
+    def serialize_many(self, objs: list[Any], schema: Any = None) -> list[dict]:
+        """
+        批量序列化，整个列表一次校验、一次导出
+        :param objs: ORM 对象或 Row 列表
+        :param schema: 序列化模式
+        :return: 序列化后的字典列表
+        """
+        schema = schema or self.schema
+        if not schema:
+            return jsonable_encoder(objs)
+        adapter = self.list_adapter(schema)
+        return adapter.dump_python(adapter.validate_python(objs, from_attributes=True))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def list_adapter(schema: Any) -> TypeAdapter:
+        """
+        获取 list[schema] 的 TypeAdapter，构建开销较大，按 schema 缓存
+        """
+        return TypeAdapter(list[schema])
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def scalar_columns(model: Any, schema: Any) -> tuple[str, ...] | None:
+        """
+        若 schema 的字段全部为 model 的普通列，返回这些列名，查询时可只查询这些列，跳过 ORM 对象构建；
+        包含关系字段或其他非列字段时返回 None
+        """
+        columns = {attr.key for attr in sa_inspect(model).column_attrs}
+        fields = tuple(schema.model_fields.keys())
+        if all(field in columns for field in fields):
+            return fields
+        return None
+
 
 class SessionOperator:
     """
@@ -202,6 +429,25 @@ class SessionOperator:
         self.db.expire_all()
 
 
+@lru_cache(maxsize=None)
+def related_tables(model: Any) -> tuple[str, ...]:
+    """
+    模型及其通过关系可以预加载到的全部表名，使用预加载的查询缓存需要在这些表变化时一起失效
+    """
+    tables = [model.__tablename__]
+    mapper = sa_inspect(model)
+    visited, pending = {mapper}, [mapper]
+    while pending:
+        for relationship in pending.pop().relationships:
+            for table in (relationship.mapper.local_table, relationship.secondary):
+                if table is not None and table.name not in tables:
+                    tables.append(table.name)
+            if relationship.mapper not in visited:
+                visited.add(relationship.mapper)
+                pending.append(relationship.mapper)
+    return tuple(tables)
+
+
 class DalBase:
     """
     数据访问层基类
@@ -312,6 +558,10 @@ class DalBase:
             v_schema: Any = None,
             v_distinct: bool = False,
             v_expire_all: bool = False,
+            v_cursor: str = None,
+            v_return_cursor: bool = False,
+            v_estimated_count: bool = False,
+            v_cache_ttl: int = None,
             **kwargs
     ) -> Union[list[Any], ScalarResult, tuple]:
         """
@@ -332,9 +582,56 @@ class DalBase:
         :param v_schema: 指定使用的序列化对象
         :param v_distinct: 是否结果去重
         :param v_expire_all: 使当前会话（Session）中所有已加载的对象过期，确保您获取的是数据库中的最新数据，但可能会有性能损耗，博客：https://blog.csdn.net/k_genius/article/details/135490378。
+        :param v_cursor: 分页游标，存在时按 (v_order_field, id) 定位分页起点，忽略 page
+        :param v_return_cursor: 是否返回前后页游标，游标在返回数组的最后一项：{"next": ..., "prev": ...}
+        :param v_estimated_count: 无过滤条件时使用表统计信息中的估算行数代替 COUNT，有过滤条件时仍精确统计
+        :param v_cache_ttl: 查询结果缓存时间，单位：秒，默认不缓存；仅对使用 kwargs 过滤并返回序列化结果的单表查询生效，
+                            本表数据通过 create_data、create_datas、put_data、delete_datas 修改后缓存自动失效，
+                            使用 v_options 预加载时关联表数据修改后缓存同样失效
         :param kwargs: 查询参数，使用的是自定义表达式
         :return: 返回值优先级：v_return_scalars > v_return_objs > v_schema
         """
+        cacheable = not any([
+            v_return_scalars, v_return_objs, v_start_sql is not None, v_select_from, v_join, v_outer_join, v_where
+        ])
+        if v_cache_ttl and cacheable and result_cache.enabled:
+            params = {
+                "page": page,
+                "limit": limit,
+                "order": v_order,
+                "order_field": v_order_field,
+                "schema": (v_schema or self.schema).__qualname__ if (v_schema or self.schema) else None,
+                "return_count": v_return_count,
+                "estimated_count": v_estimated_count,
+                "cursor": v_cursor,
+                "return_cursor": v_return_cursor,
+                "distinct": v_distinct,
+                "kwargs": kwargs,
+            }
+
+            async def loader() -> dict:
+                result = await self.get_datas(
+                    page=page,
+                    limit=limit,
+                    v_options=v_options,
+                    v_order=v_order,
+                    v_order_field=v_order_field,
+                    v_return_count=v_return_count,
+                    v_schema=v_schema,
+                    v_distinct=v_distinct,
+                    v_expire_all=v_expire_all,
+                    v_cursor=v_cursor,
+                    v_return_cursor=v_return_cursor,
+                    v_estimated_count=v_estimated_count,
+                    **kwargs
+                )
+                return {"value": list(result), "is_tuple": True} if isinstance(result, tuple) else {"value": result}
+
+            # 预加载的关联表数据也会进入缓存结果，缓存键需包含关联表的版本号
+            tables = related_tables(self.model) if v_options else (self.model.__tablename__,)
+            cached = await result_cache.get_or_load(list(tables), params, loader, v_cache_ttl)
+            return tuple(cached["value"]) if cached.get("is_tuple") else cached["value"]
+
         if v_expire_all:
             self.session_operator.expire_all()
 
@@ -356,34 +653,63 @@ class DalBase:
 
         count = 0
         if v_return_count:
-            count_sql = select(func.count()).select_from(sql.alias())
-            count_queryset = await self.db.execute(count_sql)
-            count = count_queryset.one()[0]
+            filtered = any([
+                v_start_sql is not None, v_where, v_join, v_outer_join, v_distinct,
+                self.query_builder._dict_filter(**kwargs)
+            ])
+            if v_estimated_count and not filtered:
+                count = await self.get_estimated_count()
+            else:
+                count_sql = select(func.count()).select_from(sql.alias())
+                count_queryset = await self.db.execute(count_sql)
+                count = count_queryset.one()[0]
+
+        # 仅需普通列时只查询这些列，由 Row 直接批量序列化
+        schema = v_schema or self.schema
+        columns = None
+        if schema and not any([v_return_scalars, v_return_objs, v_options, v_distinct, v_start_sql is not None]):
+            columns = self.serializer.scalar_columns(self.model, schema)
+        if columns:
+            fields = set(columns) | {"id"} | ({v_order_field} if v_order_field else set())
+            sql = sql.with_only_columns(*[getattr(self.model, field) for field in fields])
+
+        cursor = None
+        if v_cursor or v_return_cursor:
+            # 有游标时按游标定位，否则仍按页码分页，同时返回游标供后续翻页使用
+            paginator = KeysetPaginator(self.model, v_order, v_order_field)
+            sql, reverse = paginator.apply(sql, limit, v_cursor)
+            if not v_cursor and limit != 0:
+                sql = sql.offset((page - 1) * limit)
+            if columns:
+                rows = (await self.db.execute(sql)).all()
+            else:
+                queryset = await self.db.scalars(sql)
+                rows = queryset.unique().all() if v_options else queryset.all()
+            has_prev = bool(v_cursor) or page > 1
+            queryset, cursor = paginator.page(list(rows), limit, reverse, has_prev)
+        else:
+            if limit != 0:
+                sql = sql.offset((page - 1) * limit).limit(limit)
+            queryset = (await self.db.execute(sql)).all() if columns else await self.db.scalars(sql)
 
-        if limit != 0:
-            sql = sql.offset((page - 1) * limit).limit(limit)
-
-        queryset = await self.db.scalars(sql)
+        def pack(result: Any) -> Any:
+            extras = ([count] if v_return_count else []) + ([cursor] if v_return_cursor else [])
+            return (result, *extras) if extras else result
 
         if v_return_scalars:
-            if v_return_count:
-                return queryset, count
-            return queryset
+            return pack(queryset)
 
-        if v_options:
+        if isinstance(queryset, list):
+            result = queryset
+        elif v_options:
             result = queryset.unique().all()
         else:
             result = queryset.all()
 
         if v_return_objs:
-            if v_return_count:
-                return list(result), count
-            return list(result)
+            return pack(list(result))
 
-        datas = [await self.out_dict(i, v_schema=v_schema) for i in result]
-        if v_return_count:
-            return datas, count
-        return datas
+        return pack(self.serializer.serialize_many(list(result), v_schema))
 
     async def get_count(
             self,
@@ -414,6 +740,55 @@ class DalBase:
         queryset = await self.db.execute(sql)
         return queryset.one()[0]
 
+    async def get_estimated_count(self) -> int:
+        """
+        从 MySQL 表统计信息获取估算行数，不扫描数据，InnoDB 下误差通常在 10% 以内，
+        软删除的数据同样计入
+        """
+        sql = text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+        )
+        queryset = await self.db.execute(sql, {"table_name": self.model.__tablename__})
+        return queryset.scalar() or 0
+
+    async def get_export_sql(
+            self,
+            page: int = None,
+            limit: int = None,
+            v_cursor: str = None,
+            v_options: list[_AbstractLoad] = None,
+            v_where: list[BinaryExpression] = None,
+            v_order: str = None,
+            v_order_field: str = None,
+            v_fields: list[str] = None,
+            **kwargs
+    ) -> SelectType:
+        """
+        获取导出查询语句，过滤与排序与 get_datas 一致，忽略分页参数，导出全部符合条件的数据
+        :param page: 忽略
+        :param limit: 忽略
+        :param v_cursor: 忽略
+        :param v_options: 预加载选项，集合关系需使用 selectinload
+        :param v_where: 当前表查询条件，原始表达式
+        :param v_order: 排序，默认正序，为 desc 是倒叙
+        :param v_order_field: 排序字段
+        :param v_fields: 导出字段，均为当前表的列且没有预加载选项时只查询这些列，不构建 ORM 对象
+        :param kwargs: 查询参数
+        """
+        sql = await self.filter_core(
+            v_options=v_options,
+            v_where=v_where,
+            v_order=v_order,
+            v_order_field=v_order_field,
+            v_return_sql=True,
+            **kwargs
+        )
+        columns = {attr.key for attr in sa_inspect(self.model).column_attrs}
+        if v_fields and not v_options and all(field in columns for field in v_fields):
+            sql = sql.with_only_columns(*[getattr(self.model, field) for field in v_fields])
+        return sql
+
     async def create_data(
             self,
             data,
@@ -433,6 +808,7 @@ class DalBase:
         else:
             obj = self.model(**data.model_dump())
         await self.session_operator.flush(obj)
+        self.invalidate_cache()
         return await self.out_dict(obj, v_options, v_return_obj, v_schema)
 
     async def create_datas(self, datas: list[dict]) -> None:
@@ -444,6 +820,7 @@ class DalBase:
         """
         await self.db.execute(insert(self.model), datas)
         await self.db.flush()
+        self.invalidate_cache()
 
     async def put_data(
             self,
@@ -466,6 +843,7 @@ class DalBase:
         for key, value in obj_dict.items():
             setattr(obj, key, value)
         await self.session_operator.flush(obj)
+        self.invalidate_cache()
         return await self.out_dict(obj, None, v_return_obj, v_schema)
 
     async def delete_datas(self, ids: list[int], v_soft: bool = False, **kwargs) -> None:
@@ -486,6 +864,20 @@ class DalBase:
         else:
             await self.db.execute(delete(self.model).where(self.model.id.in_(ids)))
         await self.session_operator.flush()
+        self.invalidate_cache()
+
+    def invalidate_cache(self, *models: Any) -> None:
+        """
+        使指定表的查询结果缓存失效，直接执行批量 DML 的方法需在写入后调用
+
+        只在会话中登记被修改的表，事务提交后每个表递增一次版本号，事务中的多次写入不再逐次访问 Redis；
+        提交前读取的旧数据写入的是旧版本号的缓存，提交后不会再被读取
+        :param models: 被修改的模型，默认为本表模型
+        """
+        models = models or (self.model,)
+        if not result_cache.enabled or models[0] is None:
+            return
+        self.db.sync_session.info.setdefault(SESSION_TABLES_KEY, set()).update(model.__tablename__ for model in models)
 
     async def flush(self, obj: Any = None) -> Any:
         """
@@ -2,6 +2,7 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, declared_attr
 from application.config.dev import SQLALCHEMY_DATABASE_URL
+from application.settings import DEBUG
 
 
 # 官方文档：https://docs.sqlalchemy.org/en/20/orm/extensions/asyncio.html#sqlalchemy.ext.asyncio.create_async_engine
@@ -84,6 +85,10 @@ session_factory_manager = SessionFactory(db_engine.engine)
 # 导出会话工厂和引擎，保持向后兼容
 async_engine = db_engine.engine
 session_factory = session_factory_manager.session_factory
+# 调试模式下统计 SQL 编译缓存命中率，可通过 query_plan_cache.stats() 查看
+if DEBUG:
+    from .crud import register_compiled_cache_stats
+    register_compiled_cache_stats(db_engine.engine.sync_engine)
 
 
 async def db_getter() -> AsyncGenerator[AsyncSession, None]:
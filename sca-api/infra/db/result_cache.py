@@ -0,0 +1,153 @@
+"""
+DalBase 查询结果缓存
+
+读穿透缓存：先查 Redis，未命中时执行查询并写入 Redis。
+缓存键包含查询涉及的所有表的版本号，create_data、create_datas、put_data、delete_datas 写入时在会话中登记被修改的表，
+批量 DML 写入后需调用 DalBase.invalidate_cache 登记，事务提交后每个表递增一次版本号，旧版本的缓存不再被读取，由 TTL 自然过期；冷启动时同一缓存键只允许一个请求查询数据库，其余请求等待结果。
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from infra.logger.logger import logger
+from infra.utils.background import BackgroundTasks
+
+
+class QueryResultCache:
+    """
+    查询结果缓存
+    """
+
+    KEY_PREFIX = "dal_cache"
+    # 默认缓存时间，单位：秒
+    DEFAULT_TTL = 60
+    # 防击穿锁的过期时间，单位：秒，避免加锁请求异常退出后锁无法释放
+    LOCK_TTL = 10
+    # 等待其他请求加载结果的轮询间隔与次数
+    LOCK_WAIT_INTERVAL = 0.05
+    LOCK_WAIT_TIMES = 40
+
+    def __init__(self):
+        self.rd: Redis | None = None
+        self.metrics = {"hits": 0, "misses": 0, "lock_waits": 0, "errors": 0, "invalidations": 0}
+        # 事务提交后执行的失效任务
+        self.tasks = BackgroundTasks("查询结果缓存")
+
+    def bind(self, rd: Redis | None) -> None:
+        """
+        绑定 Redis 客户端，Redis 连接成功后调用，未绑定时缓存不生效
+        """
+        self.rd = rd
+
+    @property
+    def enabled(self) -> bool:
+        return self.rd is not None
+
+    def version_key(self, table: str) -> str:
+        return f"{self.KEY_PREFIX}:version:{table}"
+
+    def make_key(self, table: str, version: str, params: dict) -> str:
+        """
+        生成缓存键：表名 + 表版本号 + 规范化查询参数的摘要
+        """
+        normalized = json.dumps(params, sort_keys=True, default=str, ensure_ascii=False)
+        digest = hashlib.sha1(normalized.encode()).hexdigest()
+        return f"{self.KEY_PREFIX}:{table}:{version}:{digest}"
+
+    async def invalidate(self, *tables: str) -> None:
+        """
+        递增表版本号，使该表的所有缓存失效
+        """
+        if not self.enabled:
+            return
+        try:
+            pipe = self.rd.pipeline(transaction=False)
+            for table in tables:
+                pipe.incr(self.version_key(table))
+            await pipe.execute()
+            self.metrics["invalidations"] += len(tables)
+        except RedisError as e:
+            self.metrics["errors"] += 1
+            logger.error(f"查询缓存失效失败：{tables}，{e}")
+
+    async def get_or_load(
+            self,
+            tables: list[str],
+            params: dict,
+            loader: Callable[[], Awaitable[Any]],
+            ttl: int = None
+    ) -> Any:
+        """
+        读取缓存，未命中时加载并写入缓存，Redis 异常时直接查询数据库
+        :param tables: 查询读取的全部表名，第一个为主表，任一表的版本号变化都会使缓存失效
+        :param params: 查询参数，需可 JSON 序列化
+        :param loader: 未命中时的加载函数，返回值需可 JSON 序列化
+        :param ttl: 缓存时间，单位：秒
+        """
+        if not self.enabled:
+            return await loader()
+        table = tables[0]
+        try:
+            versions = await self.rd.mget([self.version_key(name) for name in tables])
+            version = ".".join(value or "0" for value in versions)
+            key = self.make_key(table, version, params)
+            cached = await self.rd.get(key)
+            if cached is not None:
+                self.metrics["hits"] += 1
+                return json.loads(cached)
+
+            self.metrics["misses"] += 1
+            lock_key = f"{key}:lock"
+            if not await self.rd.set(lock_key, "1", nx=True, ex=self.LOCK_TTL):
+                # 其他请求正在加载，等待其写入结果
+                self.metrics["lock_waits"] += 1
+                for _ in range(self.LOCK_WAIT_TIMES):
+                    await asyncio.sleep(self.LOCK_WAIT_INTERVAL)
+                    cached = await self.rd.get(key)
+                    if cached is not None:
+                        return json.loads(cached)
+                return await loader()
+            try:
+                result = await loader()
+                await self.rd.set(key, json.dumps(result, default=str, ensure_ascii=False), ex=ttl or self.DEFAULT_TTL)
+                return result
+            finally:
+                await self.rd.delete(lock_key)
+        except RedisError as e:
+            self.metrics["errors"] += 1
+            logger.error(f"查询缓存读取失败：{table}，{e}")
+            return await loader()
+
+    def stats(self) -> dict:
+        """
+        缓存命中情况，计数为当前进程内的累计值
+        """
+        total = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": round(self.metrics["hits"] / total, 4) if total else None,
+        }
+
+
+result_cache = QueryResultCache()
+
+# 会话中已修改的表，事务提交后递增版本号
+SESSION_TABLES_KEY = "dal_cache_tables"
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    tables = session.info.pop(SESSION_TABLES_KEY, None)
+    if tables and result_cache.enabled:
+        result_cache.tasks.spawn(result_cache.invalidate(*tables))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(SESSION_TABLES_KEY, None)
@@ -0,0 +1,141 @@
+"""
+MongoDB 批量写入器
+
+请求处理中只把数据放入进程内有界队列，由后台任务按数量或时间批量 insert_many 写入，
+写入耗时不计入请求响应时间。MongoDB 写入缓慢导致队列已满时丢弃新数据并计数，不阻塞请求。
+"""
+import asyncio
+import datetime
+from typing import Any, Callable
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+from infra.logger.logger import logger
+
+
+class MongoBatchWriter:
+    """
+    MongoDB 批量写入器
+    """
+
+    def __init__(
+            self,
+            collection: str,
+            transform: Callable[[Any], dict] = None,
+            max_size: int = 10000,
+            batch_size: int = 500,
+            flush_interval: float = 1.0
+    ):
+        """
+        :param collection: 集合名称
+        :param transform: 写入前在后台任务中执行的转换函数，耗时的序列化可放在这里
+        :param max_size: 队列最大长度，超出后丢弃
+        :param batch_size: 每批最大写入数量
+        :param flush_interval: 最长写入间隔，单位：秒
+        """
+        self.collection_name = collection
+        self.transform = transform
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.collection = None
+        self.task: asyncio.Task | None = None
+        self.stopping = asyncio.Event()
+        self.metrics = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self.__reported_dropped = 0
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        """
+        启动后台写入任务，MongoDB 连接成功后调用
+        """
+        self.collection = db[self.collection_name]
+        if self.task is None or self.task.done():
+            self.stopping.clear()
+            self.task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        """
+        停止后台写入任务，并写入队列中剩余的数据
+
+        不取消后台任务，而是通知其在当前批次写入完成后退出，避免已出队的数据丢失
+        """
+        if self.task is None:
+            return
+        self.stopping.set()
+        await self.task
+        self.task = None
+        while not self.queue.empty():
+            await self.__flush(self.__drain(self.batch_size))
+
+    def put(self, item: Any) -> bool:
+        """
+        放入队列，不等待
+        :return: 未启动或队列已满时返回 False
+        """
+        if self.task is None:
+            return False
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.metrics["dropped"] += 1
+            return False
+        self.metrics["enqueued"] += 1
+        return True
+
+    def stats(self) -> dict:
+        return {**self.metrics, "pending": self.queue.qsize()}
+
+    def __drain(self, limit: int) -> list:
+        items = []
+        while len(items) < limit and not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
+
+    async def __run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self.stopping.is_set():
+            # 等待第一条数据，然后在间隔时间内凑满一批，空闲时按间隔检查是否需要停止
+            try:
+                items = [await asyncio.wait_for(self.queue.get(), self.flush_interval)]
+            except asyncio.TimeoutError:
+                continue
+            deadline = loop.time() + self.flush_interval
+            while len(items) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                items.extend(self.__drain(self.batch_size - len(items)))
+            await self.__flush(items)
+
+    async def __flush(self, items: list) -> None:
+        if not items:
+            return
+        now = datetime.datetime.now()
+        documents = []
+        for item in items:
+            try:
+                document = self.transform(item) if self.transform else item
+            except Exception as e:
+                self.metrics["failed"] += 1
+                logger.error(f"{self.collection_name} 数据转换失败：{e}")
+                continue
+            document.setdefault("create_datetime", now)
+            document.setdefault("update_datetime", now)
+            documents.append(document)
+        if not documents:
+            return
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+            self.metrics["written"] += len(documents)
+            self.metrics["batches"] += 1
+        except PyMongoError as e:
+            self.metrics["failed"] += len(documents)
+            logger.error(f"{self.collection_name} 批量写入失败，{len(documents)} 条数据：{e}")
+        if self.metrics["dropped"] > self.__reported_dropped:
+            logger.warning(f"{self.collection_name} 写入队列已满，累计丢弃 {self.metrics['dropped']} 条数据")
+            self.__reported_dropped = self.metrics["dropped"]
@@ -114,9 +114,12 @@ class MongoManage:
             v_order: str = None,
             v_order_field: str = None,
             v_return_objs: bool = False,
+            v_cursor: str = None,
             **kwargs
     ):
         """
+        v_cursor 为 MySQL 游标分页参数，MongoDB 查询仍按 page 分页，忽略该参数
+
         使用 find() 要查询的一组文档。 find() 没有I / O，也不需要 await 表达式。它只是创建一个 AsyncIOMotorCursor 实例
         当您调用 to_list() 或为循环执行异步时 (async for) ，查询实际上是在服务器上执行的。
         """
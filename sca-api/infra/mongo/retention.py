@@ -0,0 +1,331 @@
+"""
+MongoDB 日志保留与每日汇总
+
+原始日志（操作日志、定时任务调度日志）按 RECORD_RETENTION_DAYS 通过 TTL 索引由 MongoDB 自动删除。
+
+原始日志按天汇总到 {集合名称}_daily 集合，每个接口、每个任务每天一条数据：
+请求或执行次数、错误次数与错误率、平均、p50、p95 与最大耗时。
+统计页面查询汇总集合，不再扫描原始日志。
+
+后台任务启动时补全保留期内缺失的汇总数据，之后每隔 RECORD_ROLLUP_INTERVAL 秒刷新前一天与当天的汇总数据。
+"""
+import asyncio
+import datetime
+from typing import Any
+
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from pymongo.errors import PyMongoError
+
+from application.settings import RECORD_RETENTION_DAYS, RECORD_ROLLUP_RETENTION_DAYS, RECORD_ROLLUP_INTERVAL
+from infra.logger.logger import logger
+from infra.mongo.mongo_manage import MongoManage
+
+
+class RollupPolicy:
+    """
+    日志保留与汇总规则
+    """
+
+    def __init__(
+            self,
+            collection: str,
+            keys: list[str],
+            labels: list[str],
+            error: dict,
+            indexes: list[list[tuple[str, int]]] = None,
+            extra: dict = None
+    ):
+        """
+        :param collection: 原始日志集合
+        :param keys: 汇总分组字段
+        :param labels: 汇总数据中保留的展示字段，取当天任意一条日志中的值
+        :param error: 判断日志是否为错误的聚合表达式
+        :param indexes: 原始日志列表查询使用的索引
+        :param extra: 额外的汇总字段，值为 $group 累加器表达式
+        """
+        self.collection = collection
+        self.rollup_collection = f"{collection}_daily"
+        self.keys = keys
+        self.labels = labels
+        self.error = error
+        self.indexes = indexes or []
+        self.extra = extra or {}
+        self.retention_days = RECORD_RETENTION_DAYS.get(collection, 0)
+
+
+OPERATION_RECORD_POLICY = RollupPolicy(
+    "operation_record",
+    keys=["api_path", "request_method"],
+    labels=["summary", "route_name"],
+    error={"$gte": ["$status_code", 400]},
+    indexes=[
+        [("telephone", ASCENDING), ("create_datetime", DESCENDING)],
+        [("request_method", ASCENDING), ("create_datetime", DESCENDING)],
+    ]
+)
+
+TASK_RECORD_POLICY = RollupPolicy(
+    "scheduler_task_record",
+    keys=["job_id"],
+    labels=["name", "group"],
+    # 执行成功时 exception 保存的是 json.dumps(None)
+    error={"$not": [{"$in": [{"$ifNull": ["$exception", "null"]}, ["null", ""]]}]},
+    indexes=[
+        [("job_id", ASCENDING), ("create_datetime", DESCENDING)],
+    ],
+    # 任务在执行器中排队等待的时间
+    extra={
+        "avg_wait_time": {"$avg": "$wait_time"},
+        "max_wait_time": {"$max": "$wait_time"},
+    }
+)
+
+ROLLUP_POLICIES = [OPERATION_RECORD_POLICY, TASK_RECORD_POLICY]
+
+
+class RecordRetention:
+    """
+    日志保留与每日汇总后台任务
+    """
+
+    # 永久保留日志时，启动时补全汇总数据的天数
+    BACKFILL_DAYS = 30
+    # 保存在汇总数据中的百分位耗时
+    PERCENTILES = {"p50_time": 0.5, "p95_time": 0.95}
+
+    def __init__(self, policies: list[RollupPolicy], interval: float = RECORD_ROLLUP_INTERVAL):
+        """
+        :param policies: 保留与汇总规则
+        :param interval: 刷新当天汇总数据的间隔时间，单位：秒
+        """
+        self.policies = policies
+        self.interval = interval
+        self.db: AsyncIOMotorDatabase | None = None
+        self.task: asyncio.Task | None = None
+        self.metrics = {"rollups": 0, "failed": 0, "last_rollup_datetime": None}
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        """
+        启动后台任务，MongoDB 连接成功后调用
+        """
+        self.db = db
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            "running": self.task is not None and not self.task.done(),
+            "retention_days": {policy.collection: policy.retention_days for policy in self.policies},
+        }
+
+    async def __run(self) -> None:
+        try:
+            await self.ensure_indexes()
+            await self.backfill()
+        except PyMongoError as e:
+            self.metrics["failed"] += 1
+            logger.error(f"初始化日志保留与汇总失败：{e}")
+        while True:
+            today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+            for policy in self.policies:
+                for day in (today - datetime.timedelta(days=1), today):
+                    await self.safe_rollup(policy, day)
+            self.metrics["last_rollup_datetime"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            await asyncio.sleep(self.interval)
+
+    async def ensure_indexes(self) -> None:
+        """
+        创建原始日志的 TTL 索引与列表查询索引，以及汇总集合的唯一索引
+        """
+        for policy in self.policies:
+            collection = self.db[policy.collection]
+            await self.ensure_ttl_index(collection, "create_datetime", policy.retention_days)
+            for keys in policy.indexes:
+                await collection.create_index(keys)
+            rollup = self.db[policy.rollup_collection]
+            await rollup.create_index([("date", ASCENDING), *[(key, ASCENDING) for key in policy.keys]], unique=True)
+            await rollup.create_index([*[(key, ASCENDING) for key in policy.keys], ("date", ASCENDING)])
+            await self.ensure_ttl_index(rollup, "date", RECORD_ROLLUP_RETENTION_DAYS)
+
+    @staticmethod
+    async def ensure_ttl_index(collection: AsyncIOMotorCollection, field: str, days: int) -> None:
+        """
+        创建或修改单字段升序索引的过期时间
+        :param collection: 集合
+        :param field: 日期字段
+        :param days: 保留天数，0 表示永久保留，只创建普通索引
+        """
+        seconds = days * 86400 if days else None
+        for name, index in (await collection.index_information()).items():
+            if index["key"] != [(field, ASCENDING)]:
+                continue
+            if index.get("expireAfterSeconds") == seconds:
+                return
+            if seconds and "expireAfterSeconds" in index:
+                await collection.database.command(
+                    "collMod", collection.name, index={"name": name, "expireAfterSeconds": seconds}
+                )
+                return
+            await collection.drop_index(name)
+            break
+        if seconds:
+            await collection.create_index([(field, ASCENDING)], expireAfterSeconds=seconds)
+        else:
+            await collection.create_index([(field, ASCENDING)])
+
+    async def backfill(self) -> None:
+        """
+        补全保留期内缺失的汇总数据
+        """
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        for policy in self.policies:
+            days = policy.retention_days or self.BACKFILL_DAYS
+            first = today - datetime.timedelta(days=days)
+            exists = set(await self.db[policy.rollup_collection].distinct("date", {"date": {"$gte": first}}))
+            for i in range(days, 1, -1):
+                day = today - datetime.timedelta(days=i)
+                if day not in exists:
+                    await self.safe_rollup(policy, day)
+
+    async def safe_rollup(self, policy: RollupPolicy, day: datetime.datetime) -> None:
+        try:
+            await self.rollup(policy, day)
+        except PyMongoError as e:
+            self.metrics["failed"] += 1
+            logger.error(f"{policy.collection} 汇总 {day.date()} 数据失败：{e}")
+
+    async def rollup(self, policy: RollupPolicy, day: datetime.datetime) -> int:
+        """
+        汇总一天的原始日志，重复执行时覆盖已有的汇总数据
+        :param policy: 汇总规则
+        :param day: 日期，时间部分为 0 点
+        :return: 汇总数据数量
+        """
+        percentiles = {
+            field: {
+                "$arrayElemAt": [
+                    "$durations",
+                    {"$toInt": {"$floor": {"$multiply": [{"$subtract": [{"$size": "$durations"}, 1]}, value]}}}
+                ]
+            }
+            for field, value in self.PERCENTILES.items()
+        }
+        pipeline = [
+            {"$match": {"create_datetime": {"$gte": day, "$lt": day + datetime.timedelta(days=1)}}},
+            {"$sort": {"process_time": ASCENDING}},
+            {
+                "$group": {
+                    "_id": {key: f"${key}" for key in policy.keys},
+                    **{label: {"$first": f"${label}"} for label in policy.labels},
+                    "count": {"$sum": 1},
+                    "error_count": {"$sum": {"$cond": [policy.error, 1, 0]}},
+                    "avg_time": {"$avg": "$process_time"},
+                    "max_time": {"$max": "$process_time"},
+                    "durations": {"$push": "$process_time"},
+                    **policy.extra,
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    **{key: f"$_id.{key}" for key in policy.keys},
+                    **{label: 1 for label in policy.labels},
+                    "count": 1,
+                    "error_count": 1,
+                    "error_rate": {"$divide": ["$error_count", "$count"]},
+                    "avg_time": 1,
+                    "max_time": 1,
+                    **{field: 1 for field in policy.extra},
+                    **percentiles,
+                }
+            },
+        ]
+        cursor = self.db[policy.collection].aggregate(pipeline, allowDiskUse=True)
+        now = datetime.datetime.now()
+        operations = []
+        async for row in cursor:
+            row.update(date=day, update_datetime=now)
+            operations.append(ReplaceOne({"date": day, **{key: row.get(key) for key in policy.keys}}, row, upsert=True))
+        if operations:
+            await self.db[policy.rollup_collection].bulk_write(operations, ordered=False)
+        self.metrics["rollups"] += 1
+        return len(operations)
+
+
+# 随 MongoDB 连接启动与关闭
+record_retention = RecordRetention(ROLLUP_POLICIES)
+
+
+class RollupDal(MongoManage):
+    """
+    日志每日汇总数据查询
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, policy: RollupPolicy):
+        super(RollupDal, self).__init__(db, policy.rollup_collection)
+        self.policy = policy
+
+    async def get_rollups(self, start_date: datetime.date, end_date: datetime.date, **kwargs) -> list[dict]:
+        """
+        获取日期范围内的每日汇总数据，按日期升序
+        :param start_date: 开始日期
+        :param end_date: 结束日期，包含当天
+        :param kwargs: 分组字段过滤条件
+        """
+        params = self.filter_condition(**kwargs)
+        params["date"] = {
+            "$gte": datetime.datetime.combine(start_date, datetime.time()),
+            "$lt": datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time())
+        }
+        sort = [("date", ASCENDING), *[(key, ASCENDING) for key in self.policy.keys]]
+        cursor = self.collection.find(params, {"_id": 0}).sort(sort)
+        datas = await cursor.to_list(length=None)
+        for data in datas:
+            data["date"] = data["date"].strftime("%Y-%m-%d")
+            data["update_datetime"] = data["update_datetime"].strftime("%Y-%m-%d %H:%M:%S")
+        return datas
+
+    async def get_summary(self, start_date: datetime.date, end_date: datetime.date, **kwargs) -> list[dict]:
+        """
+        按分组字段合计日期范围内的汇总数据
+
+        百分位耗时无法由每日数据精确合并，返回范围内每日 p95 的最大值
+        """
+        datas = await self.get_rollups(start_date, end_date, **kwargs)
+        result: dict[tuple, dict[str, Any]] = {}
+        for data in datas:
+            key = tuple(data.get(field) for field in self.policy.keys)
+            item = result.setdefault(key, {
+                **{field: data.get(field) for field in self.policy.keys + self.policy.labels},
+                "count": 0,
+                "error_count": 0,
+                "total_time": 0,
+                "max_time": None,
+                "p95_time": None,
+            })
+            item["count"] += data["count"]
+            item["error_count"] += data["error_count"]
+            item["total_time"] += (data.get("avg_time") or 0) * data["count"]
+            for field in ("max_time", "p95_time"):
+                if data.get(field) is not None:
+                    item[field] = max(item[field] or 0, data[field])
+        items = []
+        for item in result.values():
+            total_time = item.pop("total_time")
+            item["error_rate"] = item["error_count"] / item["count"] if item["count"] else 0
+            item["avg_time"] = total_time / item["count"] if item["count"] else None
+            items.append(item)
+        items.sort(key=lambda i: i["count"], reverse=True)
+        return items
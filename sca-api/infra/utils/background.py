@@ -0,0 +1,52 @@
+"""
+后台任务
+
+事务提交后的缓存失效、令牌吊销等操作在事件监听器中以后台任务执行，
+事件循环只保存任务的弱引用，需要持有任务引用避免执行中被垃圾回收，
+任务异常记录日志，关闭 Redis 连接前等待未完成的任务执行完成。
+"""
+import asyncio
+from typing import Coroutine
+
+from infra.logger.logger import logger
+
+
+class BackgroundTasks:
+    """
+    持有引用的后台任务集合
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: 任务集合名称，用于日志
+        """
+        self.name = name
+        self.tasks: set[asyncio.Task] = set()
+
+    def spawn(self, coroutine: Coroutine) -> bool:
+        """
+        在当前事件循环中后台执行
+        :return: 没有运行中的事件循环时返回 False，协程不会执行
+        """
+        try:
+            task = asyncio.get_running_loop().create_task(coroutine)
+        except RuntimeError:
+            coroutine.close()
+            return False
+        self.tasks.add(task)
+        task.add_done_callback(self.__done)
+        return True
+
+    def __done(self, task: asyncio.Task) -> None:
+        self.tasks.discard(task)
+        if task.cancelled():
+            logger.error(f"{self.name} 后台任务被取消")
+        elif task.exception() is not None:
+            logger.error(f"{self.name} 后台任务执行失败：{task.exception()!r}")
+
+    async def wait(self) -> None:
+        """
+        等待未完成的任务执行完成
+        """
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -1,11 +1,10 @@
-from typing import List
+from typing import Iterator, List
 from fastapi import UploadFile
 from infra.exception.exception import CustomException
 from infra.utils import status
 from .excel_manage import ExcelManage
 from infra.utils.file.file_manage import FileManage
 from .write_xlsx import WriteXlsx
-from ..tools import list_dict_find
 from enum import Enum
 
 
@@ -23,9 +22,10 @@ class ImportManage(ExcelManage):
     1. 判断文件类型
     2. 保存文件为临时文件
     3. 获取文件中的数据
-    4. 逐行检查数据，通过则创建数据
-    5. 不通过则添加到错误列表
-    6. 统计数量并返回
+    4. 按列检查数据，选项通过字典查找，相同的值只校验一次
+    5. 唯一字段由调用方一次查询已存在的值后通过 check_unique 检查
+    6. 通过的数据由调用方按 chunks 分批插入，不通过则添加到错误列表
+    7. 统计数量并返回
     """
 
     file_type = ["application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]
@@ -41,6 +41,10 @@ class ImportManage(ExcelManage):
         self.check_file_type(file)
         self.file = file
         self.headers = headers
+        # 选项 label -> value，避免逐行线性查找
+        self.__option_maps = [
+            {item.get("label"): item.get("value") for item in header.get("options", [])} for header in headers
+        ]
 
     @classmethod
     def check_file_type(cls, file: UploadFile) -> None:
@@ -79,59 +83,104 @@ class ImportManage(ExcelManage):
     def check_table_data(self) -> None:
         """
         检查表格数据
+
+        按列检查，每行只记录第一个不通过的字段，检查条件：
+        1. 检查是否为必填项
+        2. 检查是否为选项列表
+        3. 检查是否符合规则
         :return:
         """
-        for row in self.__table_data:
-            result = self.__check_row(row)
-            if not result[0]:
-                row.append(result[1])
+        rows = self.__table_data
+        datas = [{} for _ in rows]
+        row_errors: dict[int, str] = {}
+        for index, field in enumerate(self.headers):
+            label = self.__table_header[index]
+            key = field.get("field")
+            required = field.get("required", False)
+            option_map = self.__option_maps[index]
+            rules = field.get("rules", [])
+            field_type = field.get("type", FieldType.str)
+            # 规则校验结果缓存，相同的值只校验一次
+            rule_results: dict[str, str | None] = {}
+            for row_index, row in enumerate(rows):
+                if row_index in row_errors:
+                    continue
+                cell = row[index] if index < len(row) else None
+                value = cell
+                if not cell:
+                    if required:
+                        row_errors[row_index] = f"{label}不能为空！"
+                        continue
+                elif option_map:
+                    if cell not in option_map:
+                        row_errors[row_index] = f"请选择正确的{label}"
+                        continue
+                    value = option_map[cell]
+                elif rules:
+                    text = str(cell)
+                    if text not in rule_results:
+                        rule_results[text] = self.__check_rules(text, rules)
+                    if rule_results[text]:
+                        row_errors[row_index] = f"{label}：{rule_results[text]}"
+                        continue
+                if value:
+                    if field_type == FieldType.list:
+                        value = [value]
+                    elif field_type == FieldType.str:
+                        value = str(value)
+                datas[row_index][key] = value
+
+        for row_index, row in enumerate(rows):
+            if row_index in row_errors:
+                row.append(row_errors[row_index])
                 self.errors.append(row)
                 self.error_number += 1
             else:
+                datas[row_index]["old_data_list"] = row
+                self.success.append(datas[row_index])
                 self.success_number += 1
-                self.success.append(result[1])
 
-    def __check_row(self, row: list) -> tuple:
+    @staticmethod
+    def __check_rules(value: str, rules: list) -> str | None:
         """
-        检查行数据
+        依次执行校验规则
+        :return: 第一个不通过的错误信息，全部通过返回 None
+        """
+        for validator in rules:
+            try:
+                validator(value)
+            except ValueError as e:
+                return e.__str__()
+        return None
 
-        检查条件：
-        1. 检查是否为必填项
-        2. 检查是否为选项列表
-        3. 检查是否符合规则
-        :param row: 数据行
+    def check_unique(self, field: str, existing: set, label: str) -> None:
+        """
+        检查唯一字段，与已存在的值或表格中前面的行重复时添加到错误列表
+        :param field: 字段
+        :param existing: 数据库中已存在的值，由调用方一次查询
+        :param label: 字段名称
         :return:
         """
-        data = {}
-        for index, cell in enumerate(row):
-            value = cell
-            field = self.headers[index]
-            label = self.__table_header[index]
-            if not cell and field.get("required", False):
-                return False, f"{label}不能为空！"
-            elif field.get("options", []) and cell:
-                item = list_dict_find(field.get("options", []), "label", cell)
-                if item:
-                    value = item.get("value")
-                else:
-                    return False, f"请选择正确的{label}"
-            elif field.get("rules", []) and cell:
-                rules = field.get("rules")
-                for validator in rules:
-                    try:
-                        validator(str(cell))
-                    except ValueError as e:
-                        return False, f"{label}：{e.__str__()}"
-            if value:
-                field_type = field.get("type", FieldType.str)
-                if field_type == FieldType.list:
-                    data[field.get("field")] = [value]
-                elif field_type == FieldType.str:
-                    data[field.get("field")] = str(value)
+        seen = set()
+        success = []
+        for item in self.success:
+            value = item.get(field)
+            if value in existing:
+                self.add_error_data(item["old_data_list"] + [f"{label}已存在！"])
+            elif value in seen:
+                self.add_error_data(item["old_data_list"] + [f"{label}在表格中重复！"])
             else:
-                data[field.get("field")] = value
-        data["old_data_list"] = row
-        return True, data
+                seen.add(value)
+                success.append(item)
+        self.success = success
+
+    @staticmethod
+    def chunks(items: list, size: int = 1000) -> Iterator[list]:
+        """
+        按批次切分数据，用于分批插入
+        """
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
 
     def generate_error_url(self) -> str:
         """
@@ -0,0 +1,203 @@
+"""
+流式导出
+
+查询结果通过 AsyncSession.stream() 按批次读取，每批转换后立即写出，内存占用与导出行数无关：
+CSV 边查询边输出到客户端；xlsx 使用 XlsxWriter 的 constant_memory 模式逐行写入文件，
+写完后返回 static 访问地址或上传到 OSS。
+
+注意：流式读取 ORM 对象时，一对多、多对多关系需使用 selectinload 预加载，joinedload 集合与 yield_per 不兼容。
+"""
+import asyncio
+import codecs
+import csv
+import datetime
+import decimal
+import io
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+import xlsxwriter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.selectable import Select as SelectType
+
+from application.settings import STATIC_ROOT, STATIC_URL, ALIYUN_OSS
+from infra.db.database import session_factory
+from infra.utils.file.aliyun_oss import AliyunOSS, BucketConf
+from infra.utils.file.file_base import FileBase
+
+
+class StreamExport:
+    """
+    流式导出查询结果
+    """
+
+    # 每批读取的行数
+    CHUNK_SIZE = 1000
+    # xlsx 单个工作表最大行数，超出后自动新建工作表
+    XLSX_MAX_ROWS = 1048576
+
+    def __init__(
+            self,
+            header: list[dict],
+            options: dict[str, list[dict]] = None,
+            formatters: dict[str, Callable[[Any], Any]] = None
+    ):
+        """
+        :param header: 表头与对应字段，如 [{"label": "姓名", "field": "name"}]
+        :param options: 选择项，导出时将字段值转换为 label，如 {"gender": [{"label": "男", "value": "0"}]}
+        :param formatters: 字段格式化函数，优先于 options
+        """
+        self.labels = [item.get("label") for item in header]
+        self.fields = [item.get("field") for item in header]
+        # 选择项预先转换为字典，每个值只需一次查找
+        self.options = {
+            field: {item["value"]: item["label"] for item in items}
+            for field, items in (options or {}).items()
+        }
+        self.formatters = formatters or {}
+
+    @staticmethod
+    def format_value(value: Any) -> Any:
+        """
+        转换为可写入文件的基础类型
+        """
+        if value is None:
+            return ""
+        if isinstance(value, datetime.datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, datetime.date):
+            return value.strftime("%Y-%m-%d")
+        if isinstance(value, bool):
+            return 1 if value else 0
+        if isinstance(value, decimal.Decimal):
+            return float(value)
+        if isinstance(value, (str, int, float)):
+            return value
+        return str(value)
+
+    def format_row(self, obj: Any) -> list:
+        """
+        将 ORM 对象或行映射转换为导出行
+        """
+        row = []
+        for field in self.fields:
+            value = obj.get(field) if isinstance(obj, Mapping) else getattr(obj, field, None)
+            if field in self.formatters:
+                value = self.formatters[field](value)
+            elif field in self.options:
+                value = self.options[field].get(value, "")
+            row.append(self.format_value(value))
+        return row
+
+    async def iter_chunks(self, sql: SelectType, db: AsyncSession = None) -> AsyncIterator[list[list]]:
+        """
+        按批次读取并转换查询结果
+        :param sql: 查询语句，可查询 ORM 对象或指定列
+        :param db: 数据库会话，为空时新建会话，用于响应返回后仍需读取数据的流式响应
+        """
+        if db is None:
+            async with session_factory() as session:
+                async for chunk in self.iter_chunks(sql, session):
+                    yield chunk
+            return
+        # 只查询一个 ORM 实体时按对象取值，查询指定列时（包括只查询一列）按列名取值
+        descriptions = sql.column_descriptions
+        is_entity = len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+        result = await db.stream(sql.execution_options(yield_per=self.CHUNK_SIZE))
+        async for partition in result.partitions():
+            yield [self.format_row(row[0] if is_entity else row._mapping) for row in partition]
+
+    async def iter_csv(self, sql: SelectType, db: AsyncSession = None) -> AsyncIterator[bytes]:
+        """
+        流式生成 CSV 内容，带 BOM 以便 Excel 正确识别中文
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.labels)
+        yield codecs.BOM_UTF8 + buffer.getvalue().encode("utf-8")
+        async for chunk in self.iter_chunks(sql, db):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(chunk)
+            yield buffer.getvalue().encode("utf-8")
+
+    async def write_xlsx(self, sql: SelectType, file_path: str, sheet_name: str = "sheet1", db: AsyncSession = None) -> int:
+        """
+        逐批写入 xlsx 文件
+        :param sql: 查询语句
+        :param file_path: 文件路径
+        :param sheet_name: 工作表名称
+        :param db: 数据库会话
+        :return: 写入的数据行数
+        """
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        wb = xlsxwriter.Workbook(file_path, {"constant_memory": True})
+        header_format = wb.add_format({"bold": True, "bg_color": "#D9D9D9", "align": "center", "valign": "vcenter"})
+        sheets = 0
+        sheet = None
+        row_number = self.XLSX_MAX_ROWS
+        total = 0
+
+        def write_chunk(chunk: list[list]) -> None:
+            nonlocal sheets, sheet, row_number
+            for row in chunk:
+                if row_number >= self.XLSX_MAX_ROWS:
+                    sheets += 1
+                    sheet = wb.add_worksheet(sheet_name if sheets == 1 else f"{sheet_name}{sheets}")
+                    sheet.set_column(0, len(self.labels) - 1, 22)
+                    sheet.write_row(0, 0, self.labels, header_format)
+                    row_number = 1
+                sheet.write_row(row_number, 0, row)
+                row_number += 1
+
+        try:
+            async for chunk in self.iter_chunks(sql, db):
+                await asyncio.to_thread(write_chunk, chunk)
+                total += len(chunk)
+            if sheet is None:
+                # 无数据时仍输出表头
+                sheet = wb.add_worksheet(sheet_name)
+                sheet.write_row(0, 0, self.labels, header_format)
+        finally:
+            await asyncio.to_thread(wb.close)
+        return total
+
+    async def save_xlsx(self, sql: SelectType, sheet_name: str = "sheet1", path: str = "stream_export", db: AsyncSession = None) -> dict:
+        """
+        导出到 static 目录
+        :return: 本地路径、访问地址与数据行数
+        """
+        file_path = FileBase.generate_static_file_path(path=path, suffix="xlsx")
+        total = await self.write_xlsx(sql, file_path, sheet_name, db)
+        return {
+            "local_path": file_path,
+            "remote_path": file_path.replace(STATIC_ROOT, STATIC_URL),
+            "total": total
+        }
+
+    async def export_xlsx(self, dal: Any, filename: str, oss_path: str = None, **kwargs) -> dict:
+        """
+        按数据访问层的查询条件导出为 xlsx 文件
+        :param dal: 数据访问层实例，查询语句由 get_export_sql 生成，过滤与排序与 get_datas 一致
+        :param filename: 文件名称，同时作为工作表名称，不含后缀
+        :param oss_path: OSS 目录，存在时上传到 OSS，否则返回 static 访问地址
+        :param kwargs: 查询参数，同 get_export_sql
+        :return: 文件访问地址、文件名称与数据行数
+        """
+        sql = await dal.get_export_sql(v_fields=self.fields, **kwargs)
+        result = await self.save_xlsx(sql, filename, db=dal.db)
+        url = result["remote_path"]
+        if oss_path:
+            url = await AliyunOSS(BucketConf(**ALIYUN_OSS)).upload_local_file(oss_path, result["local_path"])
+        return {"url": url, "filename": f"{filename}.xlsx", "total": result["total"]}
+
+    async def export_csv(self, dal: Any, **kwargs) -> AsyncIterator[bytes]:
+        """
+        按数据访问层的查询条件流式导出为 CSV，返回字节流，用于 StreamingResponse 边查询边输出，
+        读取时使用独立会话，不受请求会话在响应开始后关闭的影响
+        :param dal: 数据访问层实例
+        :param kwargs: 查询参数，同 get_export_sql
+        """
+        sql = await dal.get_export_sql(v_fields=self.fields, **kwargs)
+        return self.iter_csv(sql)
@@ -1,11 +1,16 @@
+import asyncio
+import os
+from typing import AsyncIterator
+import aiofiles
 from fastapi import UploadFile
 from pydantic import BaseModel
 import oss2  # 安装依赖库：pip install oss2
-from oss2.models import PutObjectResult
+from oss2.models import PartInfo
 from infra.exception.exception import CustomException
 from infra.logger.logger import logger
 from infra.utils import status
 from infra.utils.file.file_base import FileBase
+from infra.utils.file.local_bucket import LocalBucket
 
 
 class BucketConf(BaseModel):
@@ -26,14 +31,28 @@ class AliyunOSS(FileBase):
     使用Python SDK时，大部分操作都是通过oss2.Service和oss2.Bucket两个类进行。
     oss2.Service类用于列举存储空间。
     oss2.Bucket类用于上传、下载、删除文件以及对存储空间进行各种配置。
+
+    上传时分块读取文件，小于 MULTIPART_THRESHOLD 的文件一次上传，超过后使用分片上传，
+    同时最多 PART_CONCURRENCY 个分片在线程池中上传，内存占用与文件大小无关。
+    endpoint 配置为 file:///本地目录 时使用本地对象存储，用于测试环境。
     """
 
+    # 超过该大小使用分片上传，单位：字节
+    MULTIPART_THRESHOLD = 10 * 1024 * 1024
+    # 分片大小，单位：字节，OSS 要求除最后一个分片外不小于 100KB
+    PART_SIZE = 5 * 1024 * 1024
+    # 同时上传的分片数量
+    PART_CONCURRENCY = 3
+
     def __init__(self, bucket: BucketConf):
-        # 阿里云账号AccessKey拥有所有API的访问权限，风险很高。强烈建议您创建并使用RAM用户进行API访问或日常运维，请登录RAM控制台创建RAM用户。
-        auth = oss2.Auth(bucket.accessKeyId, bucket.accessKeySecret)
-        # yourEndpoint填写Bucket所在地域对应的Endpoint。以华东1（杭州）为例，Endpoint填写为https://oss-cn-hangzhou.aliyuncs.com。
-        # 填写Bucket名称。
-        self.bucket = oss2.Bucket(auth, bucket.endpoint, bucket.bucket)
+        if bucket.endpoint.startswith("file://"):
+            self.bucket = LocalBucket(bucket.endpoint[len("file://"):])
+        else:
+            # 阿里云账号AccessKey拥有所有API的访问权限，风险很高。强烈建议您创建并使用RAM用户进行API访问或日常运维，请登录RAM控制台创建RAM用户。
+            auth = oss2.Auth(bucket.accessKeyId, bucket.accessKeySecret)
+            # yourEndpoint填写Bucket所在地域对应的Endpoint。以华东1（杭州）为例，Endpoint填写为https://oss-cn-hangzhou.aliyuncs.com。
+            # 填写Bucket名称。
+            self.bucket = oss2.Bucket(auth, bucket.endpoint, bucket.bucket)
         self.baseUrl = bucket.baseUrl
 
     async def upload_image(self, path: str, file: UploadFile, max_size: int = 10) -> str:
@@ -49,8 +68,7 @@ class AliyunOSS(FileBase):
         await self.validate_file(file, max_size, self.IMAGE_ACCEPT)
         # 生成文件路径
         path = self.generate_relative_path(path, file.filename)
-        file_data = await file.read()
-        return await self.__upload_file_to_oss(path, file_data)
+        return await self.__upload_stream(path, self.iter_file(file, max_size))
 
     async def upload_video(self, path: str, file: UploadFile, max_size: int = 100) -> str:
         """
@@ -65,8 +83,7 @@ class AliyunOSS(FileBase):
         await self.validate_file(file, max_size, self.VIDEO_ACCEPT)
         # 生成文件路径
         path = self.generate_relative_path(path, file.filename)
-        file_data = await file.read()
-        return await self.__upload_file_to_oss(path, file_data)
+        return await self.__upload_stream(path, self.iter_file(file, max_size))
 
     async def upload_file(self, path: str, file: UploadFile) -> str:
         """
@@ -77,20 +94,104 @@ class AliyunOSS(FileBase):
         :return: 上传后的文件oss链接
         """
         path = self.generate_relative_path(path, file.filename)
-        file_data = await file.read()
-        return await self.__upload_file_to_oss(path, file_data)
+        return await self.__upload_stream(path, self.iter_file(file))
 
-    async def __upload_file_to_oss(self, path: str, file_data: bytes) -> str:
+    async def upload_local_file(self, path: str, local_path: str, remove: bool = True) -> str:
         """
-        上传文件到OSS
+        上传本地文件，从磁盘分块读取，不将整个文件载入内存
+
+        :param path: OSS 目录，文件名称随机生成
+        :param local_path: 本地文件路径
+        :param remove: 上传成功后是否删除本地文件
+        :return: 上传后的文件oss链接
+        """
+        path = self.generate_relative_path(path, local_path)
+        url = await self.__upload_stream(path, self.iter_local_file(local_path))
+        if remove:
+            os.remove(local_path)
+        return url
+
+    @classmethod
+    async def iter_local_file(cls, local_path: str) -> AsyncIterator[bytes]:
+        """
+        分块读取本地文件
+        """
+        async with aiofiles.open(local_path, "rb") as f:
+            while chunk := await f.read(cls.CHUNK_SIZE):
+                yield chunk
+
+    async def __upload_stream(self, path: str, chunks: AsyncIterator[bytes]) -> str:
+        """
+        分块上传文件到OSS，文件小于 MULTIPART_THRESHOLD 时一次上传，否则使用分片上传
 
         :param path: path由包含文件后缀，不包含Bucket名称组成的Object完整路径，例如abc/efg/123.jpg。
-        :param file_data: 文件数据
+        :param chunks: 文件数据块
         :return: 上传后的文件oss链接
         """
-        result = self.bucket.put_object(path, file_data)
-        assert isinstance(result, PutObjectResult)
+        buffer = bytearray()
+        upload_id = None
+        parts: list[PartInfo] = []
+        tasks: list[asyncio.Task] = []
+        semaphore = asyncio.Semaphore(self.PART_CONCURRENCY)
+
+        async def upload_part(part_number: int, data: bytes) -> None:
+            try:
+                result = await asyncio.to_thread(self.bucket.upload_part, path, upload_id, part_number, data)
+                self.__check_result(result)
+                parts.append(PartInfo(part_number, result.etag, size=len(data)))
+            finally:
+                semaphore.release()
+
+        async def submit(data: bytes) -> None:
+            # 达到并发上限时等待，限制缓存在内存中的分片数量
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(upload_part(len(tasks) + 1, data)))
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                if upload_id is None:
+                    if len(buffer) < self.MULTIPART_THRESHOLD:
+                        continue
+                    result = await asyncio.to_thread(self.bucket.init_multipart_upload, path)
+                    upload_id = result.upload_id
+                while len(buffer) >= self.PART_SIZE:
+                    data = bytes(buffer[:self.PART_SIZE])
+                    del buffer[:self.PART_SIZE]
+                    await submit(data)
+            if upload_id is None:
+                return await self.__upload_file_to_oss(path, bytes(buffer))
+            if buffer:
+                await submit(bytes(buffer))
+            await asyncio.gather(*tasks)
+            parts.sort(key=lambda item: item.part_number)
+            result = await asyncio.to_thread(self.bucket.complete_multipart_upload, path, upload_id, parts)
+            self.__check_result(result)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            if upload_id is not None:
+                try:
+                    await asyncio.to_thread(self.bucket.abort_multipart_upload, path, upload_id)
+                except Exception as e:
+                    logger.error(f"取消OSS分片上传失败：{path}，{e}")
+            raise
+        return self.baseUrl + path
+
+    @staticmethod
+    def __check_result(result) -> None:
         if result.status != 200:
             logger.error(f"文件上传到OSS失败，状态码：{result.status}")
             raise CustomException("上传文件失败", code=status.HTTP_ERROR)
+
+    async def __upload_file_to_oss(self, path: str, file_data: bytes) -> str:
+        """
+        上传文件到OSS
+
+        :param path: path由包含文件后缀，不包含Bucket名称组成的Object完整路径，例如abc/efg/123.jpg。
+        :param file_data: 文件数据
+        :return: 上传后的文件oss链接
+        """
+        result = await asyncio.to_thread(self.bucket.put_object, path, file_data)
+        self.__check_result(result)
         return self.baseUrl + path
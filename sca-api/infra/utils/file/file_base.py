@@ -1,6 +1,8 @@
 import datetime
 import os
 from pathlib import Path
+from typing import AsyncIterator
+import aiofiles
 from aiopathlib import AsyncPath
 from fastapi import UploadFile
 from application.settings import TEMP_DIR, STATIC_ROOT
@@ -14,6 +16,8 @@ class FileBase:
     VIDEO_ACCEPT = ["video/mp4", "video/mpeg"]
     AUDIO_ACCEPT = ["audio/wav", "audio/mp3", "audio/m4a", "audio/wma", "audio/ogg", "audio/mpeg", "audio/x-wav"]
     ALL_ACCEPT = [*IMAGE_ACCEPT, *VIDEO_ACCEPT, *AUDIO_ACCEPT]
+    # 分块读取上传文件的大小，单位：字节
+    CHUNK_SIZE = 1024 * 1024
 
     @classmethod
     def get_random_filename(cls, suffix: str) -> str:
@@ -124,16 +128,56 @@ class FileBase:
         """
         验证文件是否符合格式
 
+        只根据请求中已知的文件大小做预检，不读取文件内容，
+        实际大小在 iter_file 分块读取时逐块校验，超出后立即中止
+
         :param file: 文件
         :param max_size: 文件最大值，单位 MB
         :param mime_types: 支持的文件类型
         """
-        if max_size:
-            size = len(await file.read()) / 1024 / 1024
-            if size > max_size:
-                raise CustomException(f"上传文件过大，不能超过{max_size}MB", status.HTTP_ERROR)
-            await file.seek(0)
         if mime_types:
             if file.content_type not in mime_types:
                 raise CustomException(f"上传文件格式错误，只支持 {'/'.join(mime_types)} 格式!", status.HTTP_ERROR)
+        if max_size and file.size is not None and file.size > max_size * 1024 * 1024:
+            raise CustomException(f"上传文件过大，不能超过{max_size}MB", status.HTTP_ERROR)
         return True
+
+    @classmethod
+    async def iter_file(cls, file: UploadFile, max_size: int = None, chunk_size: int = None) -> AsyncIterator[bytes]:
+        """
+        分块读取上传文件，累计大小超出限制时抛出异常
+
+        :param file: 文件
+        :param max_size: 文件最大值，单位 MB
+        :param chunk_size: 每块大小，单位：字节
+        """
+        limit = max_size * 1024 * 1024 if max_size else None
+        total = 0
+        await file.seek(0)
+        while chunk := await file.read(chunk_size or cls.CHUNK_SIZE):
+            total += len(chunk)
+            if limit and total > limit:
+                raise CustomException(f"上传文件过大，不能超过{max_size}MB", status.HTTP_ERROR)
+            yield chunk
+
+    @classmethod
+    async def stream_to_file(cls, file: UploadFile, path: str, max_size: int = None) -> int:
+        """
+        分块写入本地文件，超出大小限制或写入失败时删除已写入的部分
+
+        :param file: 文件
+        :param path: 本地文件路径
+        :param max_size: 文件最大值，单位 MB
+        :return: 文件大小，单位：字节
+        """
+        total = 0
+        try:
+            async with aiofiles.open(path, "wb") as f:
+                async for chunk in cls.iter_file(file, max_size):
+                    await f.write(chunk)
+                    total += len(chunk)
+        except BaseException:
+            if await AsyncPath(path).exists():
+                await AsyncPath(path).unlink()
+            raise
+        return total
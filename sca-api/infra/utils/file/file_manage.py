@@ -1,4 +1,4 @@
-import io
+import asyncio
 import os
 import zipfile
 from application.settings import STATIC_ROOT, BASE_DIR, STATIC_URL
@@ -18,6 +18,8 @@ class FileManage(FileBase):
     def __init__(self, file: UploadFile, path: str):
         self.path = self.generate_static_file_path(path, file.filename)
         self.file = file
+        # 文件最大值，单位 MB，保存时分块校验
+        self.max_size = None
 
     async def save_image_local(self, accept: list = None) -> dict:
         """
@@ -28,6 +30,7 @@ class FileManage(FileBase):
         if accept is None:
             accept = self.IMAGE_ACCEPT
         await self.validate_file(self.file, max_size=5, mime_types=accept)
+        self.max_size = 5
         return await self.async_save_local()
 
     async def save_audio_local(self, accept: list = None) -> dict:
@@ -39,6 +42,7 @@ class FileManage(FileBase):
         if accept is None:
             accept = self.AUDIO_ACCEPT
         await self.validate_file(self.file, max_size=50, mime_types=accept)
+        self.max_size = 50
         return await self.async_save_local()
 
     async def save_video_local(self, accept: list = None) -> dict:
@@ -50,11 +54,12 @@ class FileManage(FileBase):
         if accept is None:
             accept = self.VIDEO_ACCEPT
         await self.validate_file(self.file, max_size=100, mime_types=accept)
+        self.max_size = 100
         return await self.async_save_local()
 
     async def async_save_local(self) -> dict:
         """
-        保存文件到本地
+        分块保存文件到本地，不将整个文件载入内存
         :return: 示例：
         {
             'local_path': 'D:\\project\\sca-api_dev\\sca-api-api\\static\\system\\20240301\\1709303205HuYB3mrC.png',
@@ -66,7 +71,7 @@ class FileManage(FileBase):
             path = AsyncPath(self.path.replace("/", "\\"))
         if not await path.parent.exists():
             await path.parent.mkdir(parents=True, exist_ok=True)
-        await path.write_bytes(await self.file.read())
+        await self.stream_to_file(self.file, str(path), self.max_size)
         return {
             "local_path": str(path),
             "remote_path": STATIC_URL + str(path).replace(STATIC_ROOT, '').replace("\\", '/')
@@ -80,7 +85,7 @@ class FileManage(FileBase):
         :return:
         """
         temp_file_path = await cls.async_generate_temp_file_path(file.filename)
-        await AsyncPath(temp_file_path).write_bytes(await file.read())
+        await cls.stream_to_file(file, temp_file_path)
         return temp_file_path
 
     @classmethod
@@ -93,13 +98,14 @@ class FileManage(FileBase):
         """
         if file.content_type != "application/x-zip-compressed":
             raise CustomException("上传文件类型错误，必须是 zip 压缩包格式！")
-        # 读取上传的文件内容
-        contents = await file.read()
-        # 将文件内容转换为字节流
-        zip_stream = io.BytesIO(contents)
-        # 使用zipfile库解压字节流
-        with zipfile.ZipFile(zip_stream, "r") as zip_ref:
-            zip_ref.extractall(dir_path)
+        # 上传文件已由框架缓存为临时文件，直接在线程中解压，不再读入内存
+        await file.seek(0)
+
+        def extract() -> None:
+            with zipfile.ZipFile(file.file, "r") as zip_ref:
+                zip_ref.extractall(dir_path)
+
+        await asyncio.to_thread(extract)
         return dir_path
 
     @staticmethod
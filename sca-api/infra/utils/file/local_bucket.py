@@ -0,0 +1,70 @@
+"""
+本地对象存储
+
+实现 AliyunOSS 用到的 oss2.Bucket 接口子集，对象保存到本地目录，
+用于测试与无法访问 OSS 的开发环境。
+
+使用方式：将 ALIYUN_OSS 的 endpoint 配置为 file:///本地目录，例如 file:///tmp/oss
+"""
+import os
+import shutil
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+
+class LocalBucket:
+    """
+    本地对象存储，接口与 oss2.Bucket 保持一致
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: 对象保存目录
+        """
+        self.root = Path(root)
+        self.uploads_dir = self.root / ".multipart"
+
+    def object_path(self, key: str) -> Path:
+        path = (self.root / key.lstrip("/")).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"无效的对象路径：{key}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @staticmethod
+    def result(**kwargs) -> SimpleNamespace:
+        return SimpleNamespace(status=200, **kwargs)
+
+    def put_object(self, key: str, data: bytes):
+        self.object_path(key).write_bytes(data)
+        return self.result(etag=uuid.uuid4().hex)
+
+    def put_object_from_file(self, key: str, filename: str):
+        shutil.copyfile(filename, self.object_path(key))
+        return self.result(etag=uuid.uuid4().hex)
+
+    def init_multipart_upload(self, key: str):
+        upload_id = uuid.uuid4().hex
+        (self.uploads_dir / upload_id).mkdir(parents=True, exist_ok=True)
+        return self.result(upload_id=upload_id)
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes):
+        (self.uploads_dir / upload_id / f"{part_number:05d}").write_bytes(data)
+        return self.result(etag=f"{upload_id}-{part_number}")
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: list):
+        upload_dir = self.uploads_dir / upload_id
+        with open(self.object_path(key), "wb") as f:
+            for part in sorted(parts, key=lambda item: item.part_number):
+                with open(upload_dir / f"{part.part_number:05d}", "rb") as part_file:
+                    shutil.copyfileobj(part_file, f)
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        return self.result(etag=uuid.uuid4().hex)
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        shutil.rmtree(self.uploads_dir / upload_id, ignore_errors=True)
+        return self.result()
+
+    def object_exists(self, key: str) -> bool:
+        return os.path.exists(self.root / key.lstrip("/"))
@@ -6,13 +6,29 @@ JSONP请求示例（IPv4）
 https://api.ip138.com/ip/?ip=58.16.180.3&datatype=jsonp&token=cc87f3c77747bccbaaee35006da1ebb65e0bad57
 
 aiohttp 异步请求文档：https://docs.aiohttp.org/en/stable/client_quickstart.html
+
+IP 归属地查询：
+1. 查询结果按网段缓存（IPv4 /24，IPv6 /48），先查进程内 LRU，再查 Redis，都未命中时才请求查询服务
+2. 同一网段同时只发起一次查询，其余请求等待结果
+3. 在线查询共用一个带连接池与超时时间的 aiohttp 会话，不再每次新建
+4. 配置 IP_PARSE_LOCAL_DB 后使用离线 IP 库查询，不依赖外部服务，适合测试与内网部署
 """
-from aiohttp import TCPConnector
+import asyncio
+import bisect
+from abc import ABC, abstractmethod
+import csv
+import ipaddress
+import json
+from collections import OrderedDict
 
-from application.config.dev import IP_PARSE_TOKEN, IP_PARSE_ENABLE
 import aiohttp
-from infra.logger.logger import logger
+from aiohttp import TCPConnector
 from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from application.settings import IP_PARSE_TOKEN, IP_PARSE_ENABLE, IP_PARSE_LOCAL_DB
+from infra.logger.logger import logger
 
 
 class IPLocationOut(BaseModel):
@@ -27,37 +43,286 @@ class IPLocationOut(BaseModel):
     area_code: str | None = None
 
 
+# 归属地字段，不包含 IP
+LOCATION_FIELDS = [field for field in IPLocationOut.model_fields if field != "ip"]
+
+
+class IPLocationProvider(ABC):
+    """
+    IP 归属地查询服务，子类未实现 lookup 时无法实例化
+    """
+
+    @abstractmethod
+    async def lookup(self, ip: str) -> dict | None:
+        """
+        查询 IP 归属地
+        :return: 归属地字段，查询失败时返回 None
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+class IP138Provider(IPLocationProvider):
+    """
+    ip138 在线查询
+    """
+
+    URL = "https://api.ip138.com/ip/"
+
+    def __init__(self, token: str, timeout: float = 3, limit: int = 20):
+        """
+        :param token: 接口 token
+        :param timeout: 请求超时时间，单位：秒
+        :param limit: 连接池最大连接数
+        """
+        self.token = token
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.limit = limit
+        self.session: aiohttp.ClientSession | None = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=TCPConnector(ssl=False, limit=self.limit),
+                timeout=self.timeout
+            )
+        return self.session
+
+    async def lookup(self, ip: str) -> dict | None:
+        """
+        接口返回：{'ret': 'ok', 'ip': '114.222.121.253','data': ['中国', '江苏', '南京', '江宁区', '电信', '211100', '025']}
+        """
+        params = {"ip": ip, "datatype": "jsonp", "token": self.token}
+        try:
+            async with self.get_session().get(self.URL, params=params) as resp:
+                body = await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"获取IP所属地失败：{ip}，{e}")
+            return None
+        if body.get("ret") != 'ok':
+            logger.error(f"获取IP所属地失败：{body}")
+            return None
+        data = body.get("data")
+        return {
+            "address": f"{''.join(data[i] for i in range(0, 4))} {data[4]}",
+            "country": data[0],
+            "province": data[1],
+            "city": data[2],
+            "county": data[3],
+            "operator": data[4],
+            "postal_code": data[5],
+            "area_code": data[6],
+        }
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class LocalIPProvider(IPLocationProvider):
+    """
+    离线 IP 库查询
+
+    IP 库为 CSV 文件，每行一个 IP 段，不需要表头：
+    起始IP,结束IP,国家,省份,城市,区县,运营商,邮政编码,地区区号
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: IP 库文件路径
+        """
+        self.path = path
+        self.starts: list[int] = []
+        self.ranges: list[tuple[int, dict]] = []
+        self.loaded = False
+        self.lock = asyncio.Lock()
+
+    def load(self) -> None:
+        rows = []
+        with open(self.path, encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or row[0].startswith("#"):
+                    continue
+                row += [""] * (9 - len(row))
+                start, end = int(ipaddress.ip_address(row[0])), int(ipaddress.ip_address(row[1]))
+                country, province, city, county, operator, postal_code, area_code = row[2:9]
+                rows.append((start, end, {
+                    "address": f"{country}{province}{city}{county} {operator}".strip(),
+                    "country": country,
+                    "province": province,
+                    "city": city,
+                    "county": county,
+                    "operator": operator,
+                    "postal_code": postal_code,
+                    "area_code": area_code,
+                }))
+        rows.sort(key=lambda item: item[0])
+        self.starts = [item[0] for item in rows]
+        self.ranges = [(item[1], item[2]) for item in rows]
+        self.loaded = True
+
+    async def lookup(self, ip: str) -> dict | None:
+        if not self.loaded:
+            async with self.lock:
+                if not self.loaded:
+                    await asyncio.to_thread(self.load)
+        value = int(ipaddress.ip_address(ip))
+        index = bisect.bisect_right(self.starts, value) - 1
+        if index < 0 or value > self.ranges[index][0]:
+            return None
+        return dict(self.ranges[index][1])
+
+
+class IPLocator:
+    """
+    带缓存的 IP 归属地查询
+    """
+
+    KEY_PREFIX = "ip_location"
+    # Redis 缓存时间，单位：秒
+    TTL = 7 * 86400
+    # 进程内 LRU 缓存数量
+    LRU_SIZE = 4096
+
+    def __init__(self, provider: IPLocationProvider | None):
+        """
+        :param provider: 查询服务，为 None 时不查询归属地
+        """
+        self.provider = provider
+        self.rd: Redis | None = None
+        self.lru: OrderedDict[str, dict] = OrderedDict()
+        self.pending: dict[str, asyncio.Future] = {}
+        self.metrics = {"lru_hits": 0, "redis_hits": 0, "lookups": 0, "failed": 0}
+
+    def bind(self, rd: Redis | None) -> None:
+        """
+        绑定 Redis 客户端，未绑定时只使用进程内缓存
+        """
+        self.rd = rd
+
+    @staticmethod
+    def network(ip: str) -> str | None:
+        """
+        获取 IP 所在网段，作为缓存键
+        :return: 内网、回环等非公网地址以及无效地址返回 None
+        """
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if not address.is_global:
+            return None
+        prefix = 24 if address.version == 4 else 48
+        return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+    def cache_key(self, network: str) -> str:
+        return f"{self.KEY_PREFIX}:{network}"
+
+    def lru_get(self, network: str) -> dict | None:
+        location = self.lru.get(network)
+        if location is not None:
+            self.lru.move_to_end(network)
+        return location
+
+    def lru_set(self, network: str, location: dict) -> None:
+        self.lru[network] = location
+        self.lru.move_to_end(network)
+        if len(self.lru) > self.LRU_SIZE:
+            self.lru.popitem(last=False)
+
+    async def locate(self, ip: str) -> IPLocationOut:
+        """
+        查询 IP 归属地
+        :param ip: IP 地址
+        :return: 查询失败时只包含 IP
+        """
+        out = IPLocationOut(ip=ip)
+        network = self.network(ip)
+        if self.provider is None or network is None:
+            return out
+        location = self.lru_get(network)
+        if location is not None:
+            self.metrics["lru_hits"] += 1
+            return out.model_copy(update=location)
+        future = self.pending.get(network)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.pending[network] = future
+            location = None
+            try:
+                location = await self.load(network, ip)
+            except Exception as e:
+                logger.error(f"获取IP所属地失败：{ip}，{e}")
+            finally:
+                # 当前请求被取消时也要唤醒等待同一网段结果的请求，并移除占位
+                if not future.done():
+                    future.set_result(location)
+                self.pending.pop(network, None)
+        else:
+            location = await asyncio.shield(future)
+        return out.model_copy(update=location) if location else out
+
+    async def load(self, network: str, ip: str) -> dict | None:
+        """
+        依次查询 Redis 缓存与查询服务
+        """
+        if self.rd is not None:
+            try:
+                cached = await self.rd.get(self.cache_key(network))
+                if cached is not None:
+                    self.metrics["redis_hits"] += 1
+                    location = json.loads(cached)
+                    self.lru_set(network, location)
+                    return location
+            except RedisError as e:
+                logger.error(f"读取IP所属地缓存失败：{e}")
+        self.metrics["lookups"] += 1
+        location = await self.provider.lookup(ip)
+        if not location:
+            self.metrics["failed"] += 1
+            return None
+        self.lru_set(network, location)
+        if self.rd is not None:
+            try:
+                await self.rd.set(self.cache_key(network), json.dumps(location, ensure_ascii=False), ex=self.TTL)
+            except RedisError as e:
+                logger.error(f"写入IP所属地缓存失败：{e}")
+        return location
+
+    def stats(self) -> dict:
+        return {**self.metrics, "lru_size": len(self.lru), "pending": len(self.pending)}
+
+    async def close(self) -> None:
+        if self.provider is not None:
+            await self.provider.close()
+
+
+def create_provider() -> IPLocationProvider | None:
+    """
+    根据配置创建查询服务，配置了离线 IP 库时优先使用离线查询
+    """
+    if IP_PARSE_LOCAL_DB:
+        return LocalIPProvider(IP_PARSE_LOCAL_DB)
+    if IP_PARSE_ENABLE:
+        return IP138Provider(IP_PARSE_TOKEN)
+    return None
+
+
+ip_locator = IPLocator(create_provider())
+
+
 class IPManage:
 
     def __init__(self, ip: str):
         self.ip = ip
-        self.url = f"https://api.ip138.com/ip/?ip={ip}&datatype=jsonp&token={IP_PARSE_TOKEN}"
 
-    async def parse(self):
+    async def parse(self) -> IPLocationOut:
         """
         IP 数据解析
-
-        接口返回：{'ret': 'ok', 'ip': '114.222.121.253','data': ['中国', '江苏', '南京', '江宁区', '电信', '211100', '025']}
         """
-        out = IPLocationOut()
-        out.ip = self.ip
-        if not IP_PARSE_ENABLE:
+        if ip_locator.provider is None:
             logger.warning(
                 "未开启IP地址数据解析，无法获取到IP所属地，请在application/config/prod.py:IP_PARSE_ENABLE中开启！")
-            return out
-        async with aiohttp.ClientSession(connector=TCPConnector(ssl=False)) as session:
-            async with session.get(self.url) as resp:
-                body = await resp.json()
-                if body.get("ret") != 'ok':
-                    logger.error(f"获取IP所属地失败：{body}")
-                    return out
-                data = body.get("data")
-                out.address = f"{''.join(data[i] for i in range(0, 4))} {data[4]}"
-                out.country = data[0]
-                out.province = data[1]
-                out.city = data[2]
-                out.county = data[3]
-                out.operator = data[4]
-                out.postal_code = data[5]
-                out.area_code = data[6]
-                return out
+        return await ip_locator.locate(self.ip)
@@ -0,0 +1,228 @@
+"""
+批量通知发送
+
+短信、邮件的发送配置只获取一次，按批次并发发送：
+短信通过 SendBatchSms 每次最多发送 100 个手机号，邮件每个连接依次发送一组邮件，
+同时发送的批次数量有上限。
+
+每次批量发送生成一个任务，任务状态与每个接收人的发送结果保存在 Redis 中，
+接口只返回任务 ID，发送在后台进行，可通过任务 ID 查询进度与结果。
+SendBatchSms 返回成功只表示短信服务已受理，不代表已送达，短信接收人的状态记为 submitted，
+送达情况以短信服务的发送回执为准。
+任务在数据库事务提交后才开始发送，事务回滚时不发送。
+"""
+import asyncio
+import datetime
+import json
+import uuid
+from typing import Type
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from infra.exception.exception import CustomException
+from infra.logger.logger import logger
+from infra.utils.send_email import EmailSender
+from infra.utils.sms.aliyun import AliyunSMS
+
+# 会话中待发送的通知任务
+SESSION_JOBS_KEY = "notification_jobs"
+# 短信已被短信服务受理，尚未确认送达
+SMS_SUBMITTED = "submitted"
+
+
+class NotificationDispatcher:
+    """
+    批量通知发送
+    """
+
+    KEY_PREFIX = "notification_job"
+    # 任务状态保存时间，单位：秒
+    TTL = 86400
+    # 同时发送的短信批次数量
+    SMS_CONCURRENCY = 5
+    # 每个邮件连接发送的邮件数量与同时使用的连接数量
+    EMAIL_BATCH_SIZE = 20
+    EMAIL_CONCURRENCY = 3
+
+    def __init__(self):
+        self.rd: Redis | None = None
+        # 持有后台任务的引用，避免被垃圾回收
+        self.tasks: set[asyncio.Task] = set()
+
+    def bind(self, rd: Redis | None) -> None:
+        self.rd = rd
+
+    def job_key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{job_id}"
+
+    @staticmethod
+    def create_job(channel: str, recipients: list[dict]) -> dict:
+        """
+        创建通知任务
+        :param channel: 发送渠道，sms 或 email
+        :param recipients: 接收人，每项包含 id、name、to（手机号或邮箱），可包含 status、msg 表示无需发送的结果
+        """
+        results = {}
+        for item in recipients:
+            results[str(item["id"])] = {
+                "id": item["id"],
+                "name": item.get("name"),
+                "to": item.get("to"),
+                "status": item.get("status"),
+                "msg": item.get("msg", "")
+            }
+        job = {
+            "id": uuid.uuid4().hex,
+            "channel": channel,
+            "status": "pending",
+            "total": len(results),
+            "success": 0,
+            "submitted": 0,
+            "failed": 0,
+            "create_datetime": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "results": results,
+        }
+        NotificationDispatcher.count(job)
+        return job
+
+    @staticmethod
+    def count(job: dict) -> None:
+        results = job["results"].values()
+        job["success"] = sum(1 for item in results if item["status"] is True)
+        job["submitted"] = sum(1 for item in results if item["status"] == SMS_SUBMITTED)
+        job["failed"] = sum(1 for item in results if item["status"] is False)
+
+    async def save(self, job: dict) -> None:
+        if self.rd is None:
+            return
+        try:
+            await self.rd.set(self.job_key(job["id"]), json.dumps(job, ensure_ascii=False), ex=self.TTL)
+        except RedisError as e:
+            logger.error(f"保存通知任务状态失败：{job['id']}，{e}")
+
+    async def get_job(self, job_id: str) -> dict | None:
+        """
+        获取通知任务状态与每个接收人的发送结果
+        """
+        if self.rd is None:
+            return None
+        cached = await self.rd.get(self.job_key(job_id))
+        return json.loads(cached) if cached else None
+
+    async def submit_on_commit(self, db: AsyncSession, job: dict, messages: list[dict], **options) -> dict:
+        """
+        保存任务，事务提交后在后台开始发送
+        :param db: 数据库会话
+        :param job: create_job 创建的任务
+        :param messages: 需发送的消息，每项包含 id、to 以及各渠道所需的参数
+        :param options: 渠道参数，短信为 sms_class，邮件为 subject
+        :return: 不包含每个接收人结果的任务摘要
+        """
+        if self.rd is None:
+            raise CustomException("未开启 Redis，无法创建通知任务")
+        await self.save(job)
+        db.sync_session.info.setdefault(SESSION_JOBS_KEY, []).append((job, messages, options))
+        return {key: value for key, value in job.items() if key != "results"}
+
+    def start(self, job: dict, messages: list[dict], options: dict) -> None:
+        task = asyncio.create_task(self.run(job, messages, **options))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run(self, job: dict, messages: list[dict], **options) -> None:
+        job["status"] = "running"
+        await self.save(job)
+        try:
+            if job["channel"] == "sms":
+                await self.send_sms(job, messages, options["sms_class"])
+            elif job["channel"] == "email":
+                await self.send_email(job, messages, options["subject"])
+            job["status"] = "finished"
+        except Exception as e:
+            logger.error(f"通知任务发送失败：{job['id']}，{e}")
+            for item in messages:
+                result = job["results"][str(item["id"])]
+                if result["status"] is None:
+                    result["status"], result["msg"] = False, str(e)
+            job["status"] = "failed"
+        self.count(job)
+        await self.save(job)
+
+    async def send_sms(self, job: dict, messages: list[dict], sms_class: Type[AliyunSMS]) -> None:
+        """
+        批量发送短信，messages 每项的 params 为模板参数，短信服务受理的接收人状态为 submitted
+        """
+        sms = sms_class([], self.rd)
+        await sms._get_settings_async()
+        client = sms.create_client(sms.access_key, sms.access_key_secret)
+        valid = []
+        for item in messages:
+            try:
+                sms.check_telephone_format(item["to"])
+                valid.append(item)
+            except CustomException as e:
+                job["results"][str(item["id"])].update(status=False, msg=e.msg)
+        semaphore = asyncio.Semaphore(self.SMS_CONCURRENCY)
+
+        async def send_batch(batch: list[dict]) -> None:
+            async with semaphore:
+                success = await sms.send_batch_async(
+                    [item["to"] for item in batch], [item["params"] for item in batch], client
+                )
+            for item in batch:
+                if success:
+                    job["results"][str(item["id"])].update(status=SMS_SUBMITTED, msg="短信已提交，送达情况以发送回执为准")
+                else:
+                    job["results"][str(item["id"])].update(status=False, msg="短信发送失败，请联系管理员")
+            self.count(job)
+            await self.save(job)
+
+        batches = [valid[i:i + sms.BATCH_MAX_SIZE] for i in range(0, len(valid), sms.BATCH_MAX_SIZE)]
+        await asyncio.gather(*[send_batch(batch) for batch in batches])
+
+    async def send_email(self, job: dict, messages: list[dict], subject: str) -> None:
+        """
+        批量发送邮件，messages 每项的 body 为邮件内容
+        """
+        sender = EmailSender(self.rd)
+        await sender.get_settings()
+        semaphore = asyncio.Semaphore(self.EMAIL_CONCURRENCY)
+
+        async def send_batch(batch: list[dict]) -> None:
+            async with semaphore:
+                try:
+                    results = await sender.send_emails([([item["to"]], subject, item["body"]) for item in batch])
+                    msgs = ["" if result else "邮件发送失败，请联系管理员" for result in results]
+                except CustomException as e:
+                    results, msgs = [False] * len(batch), [e.msg] * len(batch)
+            for item, result, msg in zip(batch, results, msgs):
+                job["results"][str(item["id"])].update(status=result, msg=msg)
+            self.count(job)
+            await self.save(job)
+
+        batches = [messages[i:i + self.EMAIL_BATCH_SIZE] for i in range(0, len(messages), self.EMAIL_BATCH_SIZE)]
+        await asyncio.gather(*[send_batch(batch) for batch in batches])
+
+
+notification_dispatcher = NotificationDispatcher()
+
+
+@event.listens_for(Session, "after_commit")
+def _start_after_commit(session: Session) -> None:
+    jobs = session.info.pop(SESSION_JOBS_KEY, None)
+    if not jobs:
+        return
+    try:
+        for job, messages, options in jobs:
+            notification_dispatcher.start(job, messages, options)
+    except RuntimeError:
+        pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(SESSION_JOBS_KEY, None)
@@ -0,0 +1,95 @@
+"""
+密码哈希服务
+
+bcrypt 每次计算耗时约 100~300 ms，直接在协程中调用会阻塞事件循环，期间所有并发请求都无法处理。
+哈希计算统一放到有界线程池中执行（bcrypt 计算时会释放 GIL，多个线程可并行），
+并通过信号量限制同时排队的任务数，避免大量登录请求把线程池队列堆满。
+
+bcrypt 计算强度通过 PASSWORD_BCRYPT_ROUNDS 配置，登录验证成功后如果哈希的强度低于当前配置，
+会返回按当前配置重新生成的哈希，由调用方保存，用户无感知地升级到新参数。
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from application.settings import PASSWORD_BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
+
+
+class PasswordHasher:
+    """
+    密码哈希服务
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = 4, max_pending: int = None):
+        """
+        :param rounds: bcrypt 计算强度，每增加 1 耗时翻倍
+        :param max_workers: 线程池大小
+        :param max_pending: 同时执行与等待的最大任务数，默认为线程池大小的 4 倍
+        """
+        # 低于 min_rounds 的哈希在验证时会被标记为需要更新
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds
+        )
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 4
+        self.executor: ThreadPoolExecutor | None = None
+        self.semaphore: asyncio.Semaphore | None = None
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="password-hasher")
+        return self.executor
+
+    def get_semaphore(self) -> asyncio.Semaphore:
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_pending)
+        return self.semaphore
+
+    async def run(self, func, *args):
+        async with self.get_semaphore():
+            return await asyncio.get_running_loop().run_in_executor(self.get_executor(), func, *args)
+
+    async def hash(self, password: str) -> str:
+        """
+        生成哈希密码
+        :param password: 原始密码
+        :return: 哈希密码
+        """
+        return await self.run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        验证原始密码是否与哈希密码一致
+        :param password: 原始密码
+        :param hashed_password: 哈希密码
+        """
+        if not hashed_password:
+            return False
+        return await self.run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        验证密码，验证成功且哈希参数已过期时同时返回新的哈希密码
+        :param password: 原始密码
+        :param hashed_password: 哈希密码
+        :return: (是否验证成功, 新的哈希密码，无需更新时为 None)
+        """
+        if not hashed_password:
+            return False, None
+        return await self.run(self.context.verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        """
+        关闭线程池，应用关闭时调用
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.semaphore = None
+
+
+password_hasher = PasswordHasher(PASSWORD_BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS)
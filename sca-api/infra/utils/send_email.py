@@ -1,6 +1,7 @@
 
 
 
+import asyncio
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -22,7 +23,7 @@ class EmailSender:
         self.server = None
         self.rd = rd
 
-    async def __get_settings(self, retry: int = 3):
+    async def get_settings(self, retry: int = 3):
         """
         获取配置信息
         """
@@ -32,31 +33,25 @@ class EmailSender:
         self.smtp_server = web_email.get("email_server")
         self.smtp_port = int(web_email.get("email_port"))
 
-        self.server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-        self.server.starttls()
-        try:
-            self.server.login(self.email, self.password)
-        except smtplib.SMTPAuthenticationError:
-            raise CustomException("邮件发送失败，邮箱服务器认证失败！")
-        except AttributeError:
-            raise CustomException("邮件发送失败，邮箱服务器认证失败！")
-
-    async def send_email(self, to_emails: List[str], subject: str, body: str, attachments: List[str] = None):
+    def __connect(self) -> smtplib.SMTP:
         """
-        发送邮件
-        :param to_emails: 收件人，一个或多个
-        :param subject: 主题
-        :param body: 内容
-        :param attachments: 附件
+        连接并登录邮箱服务器，阻塞操作，需在线程中执行
         """
-        await self.__get_settings()
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        server.starttls()
+        try:
+            server.login(self.email, self.password)
+        except (smtplib.SMTPAuthenticationError, AttributeError):
+            server.quit()
+            raise CustomException("邮件发送失败，邮箱服务器认证失败！")
+        return server
 
+    def __build_message(self, to_emails: List[str], subject: str, body: str, attachments: List[str] = None) -> str:
         message = MIMEMultipart()
         message['From'] = self.email
         message['To'] = ', '.join(to_emails)
         message['Subject'] = subject
-        body = MIMEText(body)
-        message.attach(body)
+        message.attach(MIMEText(body))
         if attachments:
             for attachment in attachments:
                 with open(attachment, 'rb') as f:
@@ -65,18 +60,52 @@ class EmailSender:
                 attachment = MIMEApplication(file_data, Name=filename)
                 attachment['Content-Disposition'] = f'attachment; filename="{filename}"'
                 message.attach(attachment)
+        return message.as_string()
+
+    def __send_many(self, messages: List[tuple[List[str], str, str]]) -> List[bool]:
+        """
+        使用同一个连接依次发送多封邮件，阻塞操作，需在线程中执行
+        """
+        server = self.__connect()
+        result = []
         try:
-            result = self.server.sendmail(self.email, to_emails, message.as_string())
-            self.server.quit()
-            print("邮件发送结果", result)
-            if result:
+            for to_emails, subject, body in messages:
+                try:
+                    refused = server.sendmail(self.email, to_emails, self.__build_message(to_emails, subject, body))
+                    result.append(not refused)
+                except smtplib.SMTPException as e:
+                    print('邮件发送失败！错误信息：', e)
+                    result.append(False)
+        finally:
+            try:
+                server.quit()
+            except smtplib.SMTPException:
+                pass
+        return result
+
+    async def send_email(self, to_emails: List[str], subject: str, body: str, attachments: List[str] = None):
+        """
+        发送邮件
+        :param to_emails: 收件人，一个或多个
+        :param subject: 主题
+        :param body: 内容
+        :param attachments: 附件
+        """
+        await self.get_settings()
+
+        def send() -> bool:
+            self.server = self.__connect()
+            try:
+                result = self.server.sendmail(self.email, to_emails, self.__build_message(to_emails, subject, body, attachments))
+                print("邮件发送结果", result)
+                return not result
+            except smtplib.SMTPException as e:
+                print('邮件发送失败！错误信息：', e)
                 return False
-            else:
-                return True
-        except smtplib.SMTPException as e:
-            self.server.quit()
-            print('邮件发送失败！错误信息：', e)
-            return False
+            finally:
+                self.server.quit()
+
+        return await asyncio.to_thread(send)
 
 # if __name__ == '__main__':
 #     sender = EmailSender()
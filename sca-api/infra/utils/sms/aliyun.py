@@ -9,6 +9,7 @@ Python 3
 pip install alibabacloud_tea_openapi
 pip install alibabacloud_dysmsapi20170525
 """
+import json
 import random
 import re
 from typing import List
@@ -27,6 +28,8 @@ from infra.utils.sms.db_getter import DBGetter
 class AliyunSMS(DBGetter):
     # 返回错误码对应：
     doc = "https://help.aliyun.com/document_detail/101346.html"
+    # SendBatchSms 一次最多支持的手机号数量
+    BATCH_MAX_SIZE = 100
 
     def __init__(self, telephones: List[str], rd: Redis = None):
         super().__init__()
@@ -70,6 +73,34 @@ class AliyunSMS(DBGetter):
             print(e.__str__())
             return False
 
+    async def send_batch_async(self, telephones: List[str], params: List[dict], client: Dysmsapi20170525Client = None) -> bool:
+        """
+        批量发送短信，一次请求最多 BATCH_MAX_SIZE 个手机号，每个手机号使用各自的模板参数
+
+        需先调用 _get_settings_async 获取配置
+        文档：https://help.aliyun.com/document_detail/419274.html
+        :param telephones: 手机号列表
+        :param params: 与手机号一一对应的模板参数
+        :param client: 复用的客户端，为空时新建
+        :return: 整批是否被短信服务受理，受理不代表已送达，送达情况需通过发送回执或 QuerySendDetails 查询
+        """
+        if len(telephones) > self.BATCH_MAX_SIZE:
+            raise ValueError(f"批量发送短信一次最多 {self.BATCH_MAX_SIZE} 个手机号")
+        client = client or self.create_client(self.access_key, self.access_key_secret)
+        send_batch_sms_request = dysmsapi_20170525_models.SendBatchSmsRequest(
+            phone_number_json=json.dumps(telephones),
+            sign_name_json=json.dumps([self.sign_name] * len(telephones), ensure_ascii=False),
+            template_code=self.template_code,
+            template_param_json=f"[{','.join(self._get_template_param(**item) for item in params)}]"
+        )
+        runtime = util_models.RuntimeOptions()
+        try:
+            resp = await client.send_batch_sms_with_options_async(send_batch_sms_request, runtime)
+            return self._validation(",".join(telephones), resp)
+        except Exception as e:
+            logger.error(f"批量发送短信失败：{e}")
+            return False
+
     async def _get_settings_async(self, retry: int = 3):
         """
         获取配置信息
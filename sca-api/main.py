@@ -16,6 +16,7 @@ import typer
 from scripts.initialize.initialize import InitializeData, Environment
 import asyncio
 from scripts.create_app.main import CreateApp
+from scripts.benchmark.main import LoginBenchmark
 from infra.core.event import lifespan
 from infra.utils.tools import import_modules
 
@@ -108,5 +109,24 @@ def init_app(path: str):
     app.run()
 
 
+@shell_app.command()
+def benchmark_login(
+        telephone: str,
+        password: str,
+        url: str = typer.Option(default='http://127.0.0.1:9000', help='服务地址'),
+        concurrency: int = typer.Option(default=20, help='并发数'),
+        total: int = typer.Option(default=200, help='请求总数')):
+    """
+    登录接口压测，统计吞吐量与响应耗时
+
+    命令例子：python main.py benchmark-login 15020221010 kinit2022 --concurrency 50 --total 500
+
+    :param telephone: 登录手机号
+    :param password: 登录密码
+    """
+    benchmark = LoginBenchmark(url, telephone, password, concurrency, total)
+    asyncio.run(benchmark.run())
+
+
 if __name__ == '__main__':
     shell_app()
@@ -0,0 +1,68 @@
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+class LoginBenchmark:
+    """
+    登录接口压测
+
+    以固定并发数循环请求手机号密码登录接口，统计吞吐量与响应耗时，
+    用于对比密码哈希计算是否阻塞事件循环、调整 PASSWORD_BCRYPT_ROUNDS 与 PASSWORD_HASH_WORKERS。
+
+    注意：连续输错密码会冻结账号，压测前请确认账号密码正确，建议在开发环境中使用 DEMO 模式。
+    """
+
+    def __init__(self, url: str, telephone: str, password: str, concurrency: int = 20, total: int = 200):
+        """
+        :param url: 服务地址，如 http://127.0.0.1:9000
+        :param telephone: 登录手机号
+        :param password: 登录密码
+        :param concurrency: 并发数
+        :param total: 请求总数
+        """
+        self.login_url = url.rstrip("/") + "/auth/login"
+        self.body = {"telephone": telephone, "password": password, "method": "0", "platform": "0"}
+        self.concurrency = concurrency
+        self.total = total
+        self.latencies = []
+        self.failed = 0
+
+    async def worker(self, client: httpx.AsyncClient, queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.post(self.login_url, json=self.body)
+                success = response.status_code == 200 and response.json().get("code") == 200
+            except httpx.HTTPError:
+                success = False
+            self.latencies.append(time.perf_counter() - start)
+            if not success:
+                self.failed += 1
+
+    async def run(self) -> dict:
+        queue = asyncio.Queue()
+        for i in range(self.total):
+            queue.put_nowait(i)
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=60) as client:
+            await asyncio.gather(*[self.worker(client, queue) for _ in range(self.concurrency)])
+        elapsed = time.perf_counter() - start
+        latencies = sorted(self.latencies)
+        result = {
+            "total": self.total,
+            "failed": self.failed,
+            "concurrency": self.concurrency,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(self.total / elapsed, 2),
+            "latency_avg": round(statistics.mean(latencies), 3),
+            "latency_p50": round(latencies[len(latencies) // 2], 3),
+            "latency_p95": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+            "latency_max": round(latencies[-1], 3),
+        }
+        for key, value in result.items():
+            print(f"{key}: {value}")
+        return result
@@ -160,6 +160,24 @@ class InitializeData:
         生成部门详情数据
         """
         await self.__generate_data("auth_dept", auth_models.Dept)
+        await self.generate_dept_closure()
+
+    async def generate_dept_closure(self):
+        """
+        根据部门上级关系生成部门闭包表数据
+        """
+        from apps.user.crud.dept_dal import DeptDal
+        async_session = db_getter()
+        db = await async_session.__anext__()
+        try:
+            count = await DeptDal(db).rebuild_closure()
+            await db.commit()
+            print(f"auth_dept_closure 表数据已生成，共 {count} 条")
+        except Exception as e:
+            await db.rollback()
+            print(f"auth_dept_closure 表数据生成过程中出现错误: {str(e)}")
+        finally:
+            await db.close()
 
     async def generate_user_dept(self):
         """
@@ -36,3 +36,27 @@ SCHEDULER_TASK = "system_task"
 定时任务脚本目录
 """
 TASKS_ROOT = "tasks"
+# 任务实例默认是否复用，开启后相同类路径表达式的任务共用一个实例，不再每次执行都创建
+# 默认关闭，任务类可通过类属性 WARM_INSTANCE = True 单独开启，确认 main 方法可重复、并发调用后再开启
+TASKS_WARM_INSTANCES = False
+
+"""
+定时任务执行器，任务通过 executor 字段选择：
+
+thread：线程池，默认执行器，适合 IO 密集型任务
+process：进程池，适合 CPU 密集型任务，不与其他任务竞争 GIL
+asyncio：独立线程中的事件循环，适合 main 为协程函数的任务
+
+值为各执行器同时执行的最大任务数量
+"""
+SCHEDULER_EXECUTORS = {
+    "thread": 10,
+    "process": 4,
+    "asyncio": 50,
+}
+# 任务默认执行参数，任务中设置了 max_instances、coalesce、misfire_grace_time 时以任务为准
+SCHEDULER_JOB_DEFAULTS = {
+    "coalesce": False,
+    "max_instances": 1,
+    "misfire_grace_time": 1,
+}
@@ -0,0 +1,68 @@
+"""
+定时任务执行器
+
+BackgroundScheduler 本身没有事件循环，无法直接使用 APScheduler 的 AsyncIOExecutor，
+AsyncLoopExecutor 在独立线程中运行一个事件循环，协程任务都在该事件循环中执行。
+"""
+import asyncio
+import concurrent.futures
+import threading
+
+from apscheduler.executors.base import BaseExecutor, run_coroutine_job
+
+
+class AsyncLoopExecutor(BaseExecutor):
+    """
+    在独立线程的事件循环中执行协程任务
+    """
+
+    def __init__(self, max_workers: int = 50):
+        """
+        :param max_workers: 同时执行的最大任务数量
+        """
+        super().__init__()
+        self.max_workers = max_workers
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._pending: set[concurrent.futures.Future] = set()
+
+    def start(self, scheduler, alias: str) -> None:
+        super().start(scheduler, alias)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name=f"executor-{alias}", daemon=True)
+        self._thread.start()
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._loop is None:
+            return
+        if wait:
+            concurrent.futures.wait(list(self._pending))
+        else:
+            for future in list(self._pending):
+                future.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def _do_submit_job(self, job, run_times) -> None:
+        future = asyncio.run_coroutine_threadsafe(self._run(job, run_times), self._loop)
+        self._pending.add(future)
+
+        def callback(f: concurrent.futures.Future) -> None:
+            self._pending.discard(f)
+            try:
+                events = f.result()
+            except BaseException as e:
+                self._run_job_error(job.id, e, e.__traceback__)
+            else:
+                self._run_job_success(job.id, events)
+
+        future.add_done_callback(callback)
+
+    async def _run(self, job, run_times) -> list:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            return await run_coroutine_job(job, job._jobstore_alias, run_times, self._logger.name)
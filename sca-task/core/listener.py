@@ -1,49 +1,83 @@
 import datetime
 import json
-from apscheduler.events import JobExecutionEvent
+from apscheduler.events import JobExecutionEvent, JobEvent
+from bson.errors import InvalidId
 from core.mongo import get_database
 import pytz
-from application.settings import SCHEDULER_TASK_RECORD, SCHEDULER_TASK
+from application.settings import SCHEDULER_TASK
 from core.logger import logger
+from core.record_writer import record_writer
+from core.runner import TaskRun
+from core.task_cache import task_cache
 
 
 def before_job_execution(event: JobExecutionEvent):
-    # print("在执行定时任务前执行的代码...")
+    """
+    任务执行完成或执行失败后记录调度日志
+
+    wait_time：计划执行时间到实际开始执行的时间，即在执行器中排队等待的时间
+    process_time：实际开始执行到执行完成的时间
+    """
     shanghai_tz = pytz.timezone("Asia/Shanghai")
-    start_time: datetime.datetime = event.scheduled_run_time.astimezone(shanghai_tz)
+    scheduled_time: datetime.datetime = event.scheduled_run_time.astimezone(shanghai_tz)
     end_time = datetime.datetime.now(shanghai_tz)
-    process_time = (end_time - start_time).total_seconds()
+    if isinstance(event.retval, TaskRun):
+        retval, task_start_time = event.retval
+    else:
+        retval, task_start_time = event.retval, getattr(event.exception, "task_start_time", None)
+    if task_start_time:
+        start_time = datetime.datetime.fromtimestamp(task_start_time, shanghai_tz)
+    else:
+        start_time = scheduled_time
     job_id = event.job_id
     if "-temp-" in job_id:
         job_id = job_id.split("-")[0]
-    # print("任务标识符：", event.job_id)
-    # print("任务开始执行时间：", start_time.strftime("%Y-%m-%d %H:%M:%S"))
-    # print("任务执行完成时间：", end_time.strftime("%Y-%m-%d %H:%M:%S"))
-    # print("任务耗时（秒）：", process_time)
-    # print("任务返回值：", event.retval)
-    # print("异常信息：", event.exception)
-    # print("堆栈跟踪：", event.traceback)
 
     result = {
         "job_id": job_id,
+        "scheduled_time": scheduled_time.strftime("%Y-%m-%d %H:%M:%S"),
         "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
         "end_time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
-        "process_time": process_time,
-        "retval": json.dumps(event.retval),
-        "exception": json.dumps(event.exception),
+        "wait_time": max((start_time - scheduled_time).total_seconds(), 0),
+        "process_time": (end_time - start_time).total_seconds(),
+        "retval": json.dumps(retval, default=str),
+        "exception": json.dumps(str(event.exception) if event.exception else None),
         "traceback": json.dumps(event.traceback)
     }
 
-    db = get_database()
+    task = task_cache.get(job_id)
+    if not task:
+        result["exception"] = "未找到任务信息"
+    for field in task_cache.FIELDS:
+        result[field] = task.get(field, None)
+    # 日志与任务最近执行时间由 record_writer 在后台线程中批量写入
+    now = datetime.datetime.now()
+    result["create_datetime"] = now
+    result["update_datetime"] = now
+    record_writer.put(result)
+
+
+def job_removed(event: JobEvent):
+    """
+    任务从调度器中移除，包括 date 任务执行完成与 cron、interval 任务到达结束时间，将任务状态改为 False
+
+    执行一次的临时任务不影响任务状态
+    """
+    if "-temp-" in event.job_id:
+        return
+    task_cache.remove(event.job_id)
+    update_task(event.job_id, {"is_active": False})
+
+
+def update_task(job_id: str, data: dict) -> None:
+    """
+    更新任务表中的冗余字段，任务不存在时忽略
+    :param job_id: 任务编号
+    :param data: 更新内容
+    :return:
+    """
     try:
-        task = db.get_data(SCHEDULER_TASK, job_id, is_object_id=True)
-        result["job_class"] = task.get("job_class", None)
-        result["name"] = task.get("name", None)
-        result["group"] = task.get("group", None)
-        result["exec_strategy"] = task.get("exec_strategy", None)
-        result["expression"] = task.get("expression", None)
-    except ValueError as e:
-        result["exception"] = str(e)
-        logger.error(f"任务编号：{event.job_id}，报错：{e}")
-    db.create_data(SCHEDULER_TASK_RECORD, result)
+        get_database().put_data(SCHEDULER_TASK, job_id, data, is_object_id=True)
+    except (ValueError, InvalidId) as e:
+        logger.error(f"任务编号：{job_id}，更新任务状态失败：{e}")
 
@@ -119,6 +119,16 @@ class MongoManage:
         else:
             raise ValueError("更新数据失败，未找到匹配的数据")
 
+    def create_indexes(self, collection: str, indexes: list[list[tuple[str, int]]]) -> None:
+        """
+        创建索引，索引已存在时不会重复创建
+        :param collection: 集合
+        :param indexes: 索引列表，每个索引为 (字段, 排序方向) 列表
+        :return:
+        """
+        for keys in indexes:
+            self.db[collection].create_index(keys)
+
     @classmethod
     def filter_condition(cls, **kwargs) -> dict:
         """
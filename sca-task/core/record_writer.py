@@ -0,0 +1,139 @@
+"""
+调度日志批量写入
+
+监听器只把调度日志放入进程内有界队列，由后台线程按数量或时间批量 insert_many 写入，
+并按任务合并更新任务表中的最近执行时间，监听器不再等待 MongoDB 写入。
+MongoDB 写入缓慢导致队列已满时丢弃新日志并计数，不阻塞调度器。
+"""
+import queue
+import threading
+import time
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from application.settings import SCHEDULER_TASK_RECORD, SCHEDULER_TASK
+from core.logger import logger
+from core.mongo import get_database
+
+
+class RecordWriter:
+    """
+    调度日志批量写入器
+    """
+
+    def __init__(self, max_size: int = 10000, batch_size: int = 200, flush_interval: float = 1.0):
+        """
+        :param max_size: 队列最大长度，超出后丢弃
+        :param batch_size: 每批最大写入数量
+        :param flush_interval: 最长写入间隔，单位：秒
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self.thread: threading.Thread | None = None
+        self.stopped = threading.Event()
+        self.metrics = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def start(self) -> None:
+        """
+        启动后台写入线程，MongoDB 连接成功后调用
+        """
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.__run, name="record-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """
+        停止后台写入线程，并写入队列中剩余的日志
+        """
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join(timeout)
+        self.thread = None
+        while not self.queue.empty():
+            self.__flush(self.__drain(self.batch_size))
+
+    def put(self, record: dict) -> bool:
+        """
+        放入队列，不等待
+        :return: 队列已满时返回 False
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.metrics["dropped"] += 1
+            if self.metrics["dropped"] % 100 == 1:
+                logger.warning(f"调度日志写入队列已满，累计丢弃 {self.metrics['dropped']} 条日志")
+            return False
+        self.metrics["enqueued"] += 1
+        return True
+
+    def stats(self) -> dict:
+        return {**self.metrics, "pending": self.queue.qsize()}
+
+    def __drain(self, limit: int) -> list:
+        records = []
+        while len(records) < limit:
+            try:
+                records.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def __run(self) -> None:
+        while not self.stopped.is_set():
+            # 等待第一条日志，然后在间隔时间内凑满一批
+            try:
+                records = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(records) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    records.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                records.extend(self.__drain(self.batch_size - len(records)))
+            self.__flush(records)
+
+    def __flush(self, records: list[dict]) -> None:
+        if not records:
+            return
+        db = get_database().db
+        try:
+            db[SCHEDULER_TASK_RECORD].insert_many(records, ordered=False)
+            self.metrics["written"] += len(records)
+            self.metrics["batches"] += 1
+        except PyMongoError as e:
+            self.metrics["failed"] += len(records)
+            logger.error(f"调度日志批量写入失败，{len(records)} 条日志：{e}")
+            return
+        # 同一批次中每个任务只更新一次最近执行时间
+        last_runs = {}
+        for record in records:
+            job_id = record["job_id"]
+            last_runs[job_id] = max(last_runs.get(job_id, record["create_datetime"]), record["create_datetime"])
+        operations = []
+        for job_id, last_run in last_runs.items():
+            try:
+                operations.append(UpdateOne({"_id": ObjectId(job_id)}, {"$max": {"last_run_datetime": last_run}}))
+            except InvalidId:
+                continue
+        if not operations:
+            return
+        try:
+            db[SCHEDULER_TASK].bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            logger.error(f"更新任务最近执行时间失败：{e}")
+
+
+record_writer = RecordWriter()
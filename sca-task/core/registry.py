@@ -0,0 +1,186 @@
+"""
+任务注册表
+
+启动时导入 TASKS_ROOT 下的全部任务模块，记录每个模块的导入耗时与导入失败信息，
+导入依赖较多（pandas、akshare 等）的任务模块不再在添加任务或执行一次任务时才导入。
+
+类路径表达式的解析结果与任务类都会缓存；任务类定义 WARM_INSTANCE = True 时（未定义时取 TASKS_WARM_INSTANCES，默认关闭），
+相同表达式的任务复用同一个实例，实例只在第一次使用时创建，在进程池中执行时每个子进程各自缓存。
+开启复用的任务类需要保证 main 方法可以重复调用，以及在 max_instances 大于 1 时可以并发调用。
+"""
+import importlib
+import pkgutil
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any
+
+from application.settings import TASKS_ROOT, TASKS_WARM_INSTANCES
+from core.logger import logger
+
+
+def parse_arguments(args_str: str) -> list:
+    """
+    解析类路径参数字符串
+    :param args_str: 类参数字符串
+    :return:
+    """
+    arguments = []
+
+    for arg in re.findall(r'"([^"]*)"|(\d+\.\d+)|(\d+)|([Tt]rue|[Ff]alse)', args_str):
+        if arg[0]:
+            # 字符串参数
+            arguments.append(arg[0])
+        elif arg[1]:
+            # 浮点数参数
+            arguments.append(float(arg[1]))
+        elif arg[2]:
+            # 整数参数
+            arguments.append(int(arg[2]))
+        elif arg[3]:
+            # 布尔参数
+            if arg[3].lower() == 'true':
+                arguments.append(True)
+            else:
+                arguments.append(False)
+
+    return arguments
+
+
+@lru_cache(maxsize=1024)
+def parse_expression(expression: str) -> tuple[str, str, tuple]:
+    """
+    使用正则表达式匹配类路径和参数，结果会被缓存
+    :param expression: 类路径表达式，例如 test.main.Test("kinit", 1)
+    :return: 模块路径、类名、参数
+    """
+    match = re.match(r'([\w.]+)(?:\((.*)\))?', expression)
+    if not match or "." not in match.group(1):
+        raise ValueError(f"无效的类路径：{expression}")
+    class_path = match.group(1)
+    arguments = parse_arguments(match.group(2)) if match.group(2) else []
+    module = TASKS_ROOT + '.' + class_path[0:class_path.rindex(".")]
+    return module, class_path[class_path.rindex(".") + 1:], tuple(arguments)
+
+
+class JobRegistry:
+    """
+    任务注册表
+    """
+
+    def __init__(self, root: str = TASKS_ROOT, warm_instances: bool = TASKS_WARM_INSTANCES):
+        """
+        :param root: 任务目录包名
+        :param warm_instances: 任务类未定义 WARM_INSTANCE 时是否复用任务实例
+        """
+        self.root = root
+        self.warm_instances = warm_instances
+        # 模块导入耗时，单位：秒
+        self.import_times: dict[str, float] = {}
+        # 模块导入失败信息
+        self.import_errors: dict[str, str] = {}
+        # 已注册的任务类，键为去掉 root 的类路径，例如 test.main.Test
+        self.jobs: dict[str, type] = {}
+        self.instances: dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def preload(self) -> None:
+        """
+        导入任务目录下的全部模块，注册模块中定义了 main 方法的类，并输出每个模块的导入耗时
+        """
+        package = self.import_module(self.root)
+        if package is None:
+            return
+        for module_info in pkgutil.walk_packages(package.__path__, prefix=f"{self.root}."):
+            module = self.import_module(module_info.name)
+            if module is None:
+                continue
+            for name, value in vars(module).items():
+                if not isinstance(value, type) or value.__module__ != module.__name__:
+                    continue
+                if callable(getattr(value, "main", None)):
+                    self.jobs[f"{module.__name__[len(self.root) + 1:]}.{name}"] = value
+        self.report()
+
+    def import_module(self, name: str):
+        """
+        导入模块并记录导入耗时，导入失败时记录失败信息并返回 None
+        """
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+        except Exception as e:
+            self.import_errors[name] = f"{type(e).__name__}: {e}"
+            return None
+        self.import_times[name] = time.perf_counter() - start
+        return module
+
+    def report(self) -> None:
+        lines = [f"任务模块导入完成，共注册 {len(self.jobs)} 个任务类："]
+        for name, seconds in sorted(self.import_times.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {name}：{seconds * 1000:.1f} ms")
+        for name, error in self.import_errors.items():
+            lines.append(f"  {name}：导入失败，{error}")
+        logger.info("\n".join(lines))
+        for name, error in self.import_errors.items():
+            logger.error(f"任务模块 {name} 导入失败：{error}")
+
+    def get_class(self, expression: str) -> type:
+        """
+        获取任务类
+        :param expression: 类路径表达式
+        """
+        module_path, class_name, _ = parse_expression(expression)
+        key = f"{module_path[len(self.root) + 1:]}.{class_name}"
+        job_class = self.jobs.get(key)
+        if job_class is not None:
+            return job_class
+        try:
+            # 启动后新增的模块或未定义 main 方法的类，按原方式导入
+            module = importlib.import_module(module_path)
+        except ModuleNotFoundError:
+            raise ValueError(f"未找到该模块：{module_path}")
+        try:
+            job_class = getattr(module, class_name)
+        except AttributeError:
+            raise ValueError(f"未找到该模块下的方法：{class_name}")
+        self.jobs[key] = job_class
+        return job_class
+
+    def create_instance(self, expression: str) -> Any:
+        _, _, args = parse_expression(expression)
+        job_class = self.get_class(expression)
+        try:
+            return job_class(*args)
+        except TypeError as e:
+            raise ValueError(f"参数传递错误：{list(args)}, 详情：{e}")
+
+    def get_instance(self, expression: str) -> Any:
+        """
+        获取任务实例，任务类开启复用实例时相同表达式返回同一个实例
+        :param expression: 类路径表达式
+        """
+        if not getattr(self.get_class(expression), "WARM_INSTANCE", self.warm_instances):
+            return self.create_instance(expression)
+        instance = self.instances.get(expression)
+        if instance is not None:
+            return instance
+        with self.lock:
+            instance = self.instances.get(expression)
+            if instance is None:
+                instance = self.create_instance(expression)
+                self.instances[expression] = instance
+        return instance
+
+    def stats(self) -> dict:
+        return {
+            "jobs": list(self.jobs),
+            "import_times": self.import_times,
+            "import_errors": self.import_errors,
+            "instances": len(self.instances),
+            "parse_cache": parse_expression.cache_info()._asdict(),
+        }
+
+
+job_registry = JobRegistry()
@@ -0,0 +1,53 @@
+"""
+任务执行入口
+
+调度器中保存的任务函数统一为本模块的 run_task 或 run_task_async，参数为任务类路径表达式，
+可以通过文本引用保存到 MongoDB 任务存储中，也可以被进程池执行器序列化到子进程中执行。
+
+执行时从任务注册表获取任务实例并调用 main 方法，同时返回实际开始执行时间，
+监听器据此区分任务在执行器中的排队等待时间与实际执行时间。
+"""
+import asyncio
+import inspect
+import time
+from typing import Any, NamedTuple
+
+from core.registry import job_registry
+
+
+class TaskRun(NamedTuple):
+    # main 方法的返回值
+    retval: Any
+    # 实际开始执行的时间戳
+    start_time: float
+
+
+def run_task(expression: str, *args, **kwargs) -> TaskRun:
+    """
+    在线程池或进程池中执行任务，main 为协程函数时在新的事件循环中执行
+    """
+    start_time = time.time()
+    try:
+        retval = job_registry.get_instance(expression).main(*args, **kwargs)
+        if inspect.isawaitable(retval):
+            retval = asyncio.run(retval)
+    except Exception as e:
+        # 异常会被序列化回调度器进程，实例属性随异常一起保留
+        e.task_start_time = start_time
+        raise
+    return TaskRun(retval, start_time)
+
+
+async def run_task_async(expression: str, *args, **kwargs) -> TaskRun:
+    """
+    在 asyncio 执行器的事件循环中执行任务
+    """
+    start_time = time.time()
+    try:
+        retval = job_registry.get_instance(expression).main(*args, **kwargs)
+        if inspect.isawaitable(retval):
+            retval = await retval
+    except Exception as e:
+        e.task_start_time = start_time
+        raise
+    return TaskRun(retval, start_time)
@@ -1,7 +1,7 @@
 import datetime
-import importlib
+import inspect
 from typing import List
-import re
+from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
 from apscheduler.jobstores.base import JobLookupError
 from apscheduler.jobstores.mongodb import MongoDBJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -9,15 +9,20 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.job import Job
-from .listener import before_job_execution
-from apscheduler.events import EVENT_JOB_EXECUTED
-from application.settings import MONGO_DB_NAME, SCHEDULER_TASK_JOBS, TASKS_ROOT
+from .executors import AsyncLoopExecutor
+from .listener import before_job_execution, job_removed
+from .registry import job_registry
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_REMOVED
+from application.settings import MONGO_DB_NAME, SCHEDULER_TASK_JOBS, SCHEDULER_EXECUTORS, SCHEDULER_JOB_DEFAULTS
 from core.mongo import get_database
 
 
 class Scheduler:
-    TASK_DIR = TASKS_ROOT
     COLLECTION = SCHEDULER_TASK_JOBS
+    # 任务 executor 字段与调度器中执行器名称的对应关系，线程池为 APScheduler 的默认执行器
+    EXECUTORS = {"thread": "default", "process": "process", "asyncio": "asyncio"}
+    # 可在任务中单独设置的执行参数
+    JOB_OPTIONS = ("executor", "max_instances", "coalesce", "misfire_grace_time")
 
     def __init__(self):
         self.scheduler = None
@@ -29,10 +34,18 @@ class Scheduler:
         :param listener: 是否注册事件监听器
         :return:
         """
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = BackgroundScheduler(
+            executors={
+                "default": ThreadPoolExecutor(SCHEDULER_EXECUTORS["thread"]),
+                "process": ProcessPoolExecutor(SCHEDULER_EXECUTORS["process"]),
+                "asyncio": AsyncLoopExecutor(SCHEDULER_EXECUTORS["asyncio"]),
+            },
+            job_defaults=SCHEDULER_JOB_DEFAULTS
+        )
         if listener:
-            # 注册事件监听器
-            self.scheduler.add_listener(before_job_execution, EVENT_JOB_EXECUTED)
+            # 注册事件监听器，执行成功与失败都记录调度日志
+            self.scheduler.add_listener(before_job_execution, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+            self.scheduler.add_listener(job_removed, EVENT_JOB_REMOVED)
         self.scheduler.add_jobstore(self.__get_mongodb_job_store())
         self.scheduler.start()
 
@@ -50,20 +63,37 @@ class Scheduler:
             trigger: CronTrigger | DateTrigger | IntervalTrigger,
             name: str = None,
             *args,
+            options: dict = None,
             **kwargs
     ) -> None | Job:
         """
         date触发器用于在指定的日期和时间触发一次任务。它适用于需要在特定时间点执行一次的任务，例如执行一次备份操作。
+
+        任务函数使用 core.runner 中的文本引用，执行时再导入任务类，任务可以保存到 MongoDB 任务存储，也可以在进程池中执行
         :param job_class: 类路径
         :param trigger: 触发条件
         :param name: 任务名称
+        :param options: 任务执行参数：executor、max_instances、coalesce、misfire_grace_time，为空时使用默认值
         :return:
         """
-        job_class = self.__import_module(job_class)
-        if job_class:
-            return self.scheduler.add_job(job_class.main, trigger=trigger, args=args, kwargs=kwargs, id=name)
-        else:
-            raise ValueError(f"添加任务失败，未找到该模块下的方法：{job_class}")
+        options = {key: value for key, value in (options or {}).items() if value is not None}
+        executor = options.pop("executor", None) or "thread"
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"无效的执行器：{executor}")
+        # 添加时先创建一次任务实例，类路径错误时直接返回添加失败
+        task = job_registry.get_instance(job_class)
+        if executor == "asyncio" and not inspect.iscoroutinefunction(task.main):
+            raise ValueError("asyncio 执行器只能执行 main 为协程函数的任务")
+        func = "core.runner:run_task_async" if executor == "asyncio" else "core.runner:run_task"
+        return self.scheduler.add_job(
+            func,
+            trigger=trigger,
+            args=[job_class, *args],
+            kwargs=kwargs,
+            id=name,
+            executor=self.EXECUTORS[executor],
+            **options
+        )
 
     def add_cron_job(
             self,
@@ -74,6 +104,7 @@ class Scheduler:
             timezone: str = "Asia/Shanghai",
             name: str = None,
             args: tuple = (),
+            options: dict = None,
             **kwargs
     ) -> None | Job:
         """
@@ -85,6 +116,7 @@ class Scheduler:
         :param timezone: 时区，表示触发器应用的时区。可选参数，默认为 None，使用上海默认时区。
         :param name: 任务名称
         :param args: 非关键字参数
+        :param options: 任务执行参数
         :return:
         """
         second, minute, hour, day, month, day_of_week, year = self.__parse_cron_expression(expression)
@@ -100,19 +132,28 @@ class Scheduler:
             end_date=end_date,
             timezone=timezone
         )
-        return self.add_job(job_class, trigger, name, *args, **kwargs)
+        return self.add_job(job_class, trigger, name, *args, options=options, **kwargs)
 
-    def add_date_job(self, job_class: str, expression: str, name: str = None, args: tuple = (), **kwargs) -> None | Job:
+    def add_date_job(
+            self,
+            job_class: str,
+            expression: str,
+            name: str = None,
+            args: tuple = (),
+            options: dict = None,
+            **kwargs
+    ) -> None | Job:
         """
         date触发器用于在指定的日期和时间触发一次任务。它适用于需要在特定时间点执行一次的任务，例如执行一次备份操作。
         :param job_class: 类路径
         :param expression: date
         :param name: 任务名称
         :param args: 非关键字参数
+        :param options: 任务执行参数
         :return:
         """
         trigger = DateTrigger(run_date=expression)
-        return self.add_job(job_class, trigger, name, *args, **kwargs)
+        return self.add_job(job_class, trigger, name, *args, options=options, **kwargs)
 
     def add_interval_job(
             self,
@@ -124,6 +165,7 @@ class Scheduler:
             jitter: int = None,
             name: str = None,
             args: tuple = (),
+            options: dict = None,
             **kwargs
     ) -> None | Job:
         """
@@ -138,6 +180,7 @@ class Scheduler:
         :param jitter：表示时间抖动，可以设置为整数或浮点数。例如，设置 jitter=2 表示任务的执行时间会在原定时间上随机增加 0~2 秒的时间抖动。
         :param name: 任务名称
         :param args: 非关键字参数
+        :param options: 任务执行参数
         :return:
         """
         second, minute, hour, day, week = self.__parse_interval_expression(expression)
@@ -152,7 +195,7 @@ class Scheduler:
             timezone=timezone,
             jitter=jitter
         )
-        return self.add_job(job_class, trigger, name, *args, **kwargs)
+        return self.add_job(job_class, trigger, name, *args, options=options, **kwargs)
 
     def run_job(self, job_class: str, args: tuple = (), **kwargs) -> None:
         """
@@ -161,8 +204,7 @@ class Scheduler:
         :param args: 类路径
         :return: 类实例
         """
-        job_class = self.__import_module(job_class)
-        job_class.main(*args, **kwargs)
+        job_registry.get_instance(job_class).main(*args, **kwargs)
 
     def remove_job(self, name: str) -> None:
         """
@@ -209,26 +251,6 @@ class Scheduler:
         jobs = self.scheduler.get_jobs()
         return [job.id for job in jobs]
 
-    def __import_module(self, expression: str):
-        """
-        反射模块
-        :param expression: 类路径
-        :return: 类实例
-        """
-        module, args = self.__parse_string_to_class(expression)
-        module_pag = self.TASK_DIR + '.' + module[0:module.rindex(".")]
-        module_class = module[module.rindex(".") + 1:]
-        try:
-            # 动态导入模块
-            pag = importlib.import_module(module_pag)
-            return getattr(pag, module_class)(*args)
-        except ModuleNotFoundError:
-            raise ValueError(f"未找到该模块：{module_pag}")
-        except AttributeError:
-            raise ValueError(f"未找到该模块下的方法：{module_class}")
-        except TypeError as e:
-            raise ValueError(f"参数传递错误：{args}, 详情：{e}")
-
     @staticmethod
     def __parse_cron_expression(expression: str) -> tuple:
         """
@@ -263,57 +285,6 @@ class Scheduler:
         parsed_fields = [int(field) if field != '*' else 0 for field in fields]
         return tuple(parsed_fields)
 
-    @classmethod
-    def __parse_string_to_class(cls, expression: str) -> tuple:
-        """
-        使用正则表达式匹配类路径和参数
-        :param expression: 表达式
-        :return:
-        """
-        pattern = r'([\w.]+)(?:\((.*)\))?'
-        match = re.match(pattern, expression)
-
-        if match:
-            class_path = match.group(1)
-            arguments = match.group(2)
-
-            if arguments:
-                arguments = cls.__parse_arguments(arguments)
-            else:
-                arguments = []
-
-            return class_path, arguments
-
-        return None, None
-
-    @staticmethod
-    def __parse_arguments(args_str) -> list:
-        """
-        解析类路径参数字符串
-        :param args_str: 类参数字符串
-        :return:
-        """
-        arguments = []
-
-        for arg in re.findall(r'"([^"]*)"|(\d+\.\d+)|(\d+)|([Tt]rue|[Ff]alse)', args_str):
-            if arg[0]:
-                # 字符串参数
-                arguments.append(arg[0])
-            elif arg[1]:
-                # 浮点数参数
-                arguments.append(float(arg[1]))
-            elif arg[2]:
-                # 整数参数
-                arguments.append(int(arg[2]))
-            elif arg[3]:
-                # 布尔参数
-                if arg[3].lower() == 'true':
-                    arguments.append(True)
-                else:
-                    arguments.append(False)
-
-        return arguments
-
     def shutdown(self) -> None:
         """
         关闭调度器
@@ -0,0 +1,84 @@
+"""
+任务信息缓存
+
+调度日志中需要保存任务的类路径、名称、分组等信息，任务执行完成后从进程内缓存读取，不再每次查询任务表。
+接收到添加任务消息（新增、修改任务或重新启用任务）时刷新缓存，任务从调度器中移除时删除缓存。
+"""
+import threading
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from application.settings import SCHEDULER_TASK
+from core.logger import logger
+from core.mongo import get_database
+
+
+class TaskCache:
+    """
+    任务信息缓存，APScheduler 在线程池中执行监听器，读写需要加锁
+    """
+
+    FIELDS = ("job_class", "name", "group", "exec_strategy", "expression", "executor")
+
+    def __init__(self):
+        self.tasks: dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0}
+
+    def load(self, job_id: str) -> dict:
+        """
+        从任务表中查询任务信息
+        :param job_id: 任务编号
+        :return: 任务不存在时返回空字典
+        """
+        try:
+            task = get_database().db[SCHEDULER_TASK].find_one(
+                {"_id": ObjectId(job_id)}, {field: 1 for field in self.FIELDS}
+            )
+        except InvalidId:
+            task = None
+        if not task:
+            logger.error(f"任务编号：{job_id}，未找到任务信息")
+            return {}
+        return {field: task.get(field, None) for field in self.FIELDS}
+
+    def get(self, job_id: str) -> dict:
+        """
+        获取任务信息，未缓存时查询任务表
+        :param job_id: 任务编号
+        :return: 任务不存在时返回空字典，不缓存
+        """
+        with self.lock:
+            task = self.tasks.get(job_id)
+        if task is not None:
+            self.metrics["hits"] += 1
+            return task
+        self.metrics["misses"] += 1
+        task = self.load(job_id)
+        if task:
+            with self.lock:
+                self.tasks[job_id] = task
+        return task
+
+    def refresh(self, job_id: str) -> dict:
+        """
+        重新查询并缓存任务信息，任务信息变更时调用
+        """
+        task = self.load(job_id)
+        with self.lock:
+            if task:
+                self.tasks[job_id] = task
+            else:
+                self.tasks.pop(job_id, None)
+        return task
+
+    def remove(self, job_id: str) -> None:
+        with self.lock:
+            self.tasks.pop(job_id, None)
+
+    def stats(self) -> dict:
+        return {**self.metrics, "size": len(self.tasks)}
+
+
+task_cache = TaskCache()
@@ -4,6 +4,12 @@ import json
 import random
 from enum import Enum
 from apscheduler.jobstores.base import ConflictingIdError
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from core.listener import update_task
+from core.record_writer import record_writer
+from core.registry import job_registry
+from core.task_cache import task_cache
 from core.scheduler import Scheduler
 from core.mongo import get_database as get_mongo
 from application.settings import MONGO_DB_NAME, MONGO_DB_URL, REDIS_DB_URL, SUBSCRIBE, SCHEDULER_TASK, \
@@ -34,18 +40,25 @@ class ScheduledTask:
         :return:
         """
         name = job_params.get("name", None)
+        options = {key: job_params.pop(key) for key in Scheduler.JOB_OPTIONS if key in job_params}
         error_info = None
+        # 新增、修改任务后都会发送添加任务消息，刷新缓存的任务信息
+        task_cache.refresh(name)
         try:
             if exec_strategy == self.JobExecStrategy.interval.value:
-                self.scheduler.add_interval_job(**job_params)
+                self.scheduler.add_interval_job(**job_params, options=options)
             elif exec_strategy == self.JobExecStrategy.cron.value:
-                self.scheduler.add_cron_job(**job_params)
+                self.scheduler.add_cron_job(**job_params, options=options)
             elif exec_strategy == self.JobExecStrategy.date.value:
-                self.scheduler.add_date_job(**job_params)
+                self.scheduler.add_date_job(**job_params, options=options)
             elif exec_strategy == self.JobExecStrategy.once.value:
                 # 这种方式会自动执行事件监听器，用于保存执行任务完成后的日志
                 job_params["name"] = f"{name}-temp-{random.randint(1000, 9999)}"
-                self.scheduler.add_date_job(**job_params, expression=datetime.datetime.now())
+                self.scheduler.add_date_job(
+                    **job_params,
+                    expression=datetime.datetime.now(),
+                    options={"executor": options.get("executor")}
+                )
             else:
                 raise ValueError("无效的触发器")
         except ConflictingIdError as e:
@@ -57,6 +70,8 @@ class ScheduledTask:
         if error_info:
             logger.error(f"任务编号：{name}，报错：{error_info}")
             self.error_record(name, error_info)
+        elif exec_strategy != self.JobExecStrategy.once.value:
+            update_task(name, {"is_active": True})
 
     def error_record(self, name: str, error_info: str) -> None:
         """
@@ -66,9 +81,9 @@ class ScheduledTask:
         :return:
         """
         try:
-            self.mongo.put_data(SCHEDULER_TASK, name, {"is_active": False})
-            task = self.mongo.get_data(SCHEDULER_TASK, name)
-            # 执行你想要在任务执行前执行的代码
+            self.mongo.put_data(SCHEDULER_TASK, name, {"is_active": False}, is_object_id=True)
+            task = task_cache.get(name)
+            now = datetime.datetime.now()
             result = {
                 "job_id": name,
                 "job_class": task.get("job_class", None),
@@ -76,15 +91,17 @@ class ScheduledTask:
                 "group": task.get("group", None),
                 "exec_strategy": task.get("exec_strategy", None),
                 "expression": task.get("expression", None),
-                "start_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "end_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "start_time": now.strftime("%Y-%m-%d %H:%M:%S"),
+                "end_time": now.strftime("%Y-%m-%d %H:%M:%S"),
                 "process_time": 0,
                 "retval": "任务添加失败",
                 "exception": error_info,
-                "traceback": None
+                "traceback": None,
+                "create_datetime": now,
+                "update_datetime": now
             }
-            self.mongo.create_data(SCHEDULER_TASK_RECORD, result)
-        except ValueError as e:
+            record_writer.put(result)
+        except (ValueError, InvalidId) as e:
             logger.error(f"任务编号：{name}, 报错：{e}")
 
     def run(self) -> None:
@@ -93,7 +110,9 @@ class ScheduledTask:
         :return:
         """
         self.start_mongo()
+        job_registry.preload()
         self.start_scheduler()
+        self.sync_task_status()
         self.start_redis()
 
         assert isinstance(self.rd, RedisManage)
@@ -123,6 +142,34 @@ class ScheduledTask:
         """
         self.mongo = get_mongo()
         self.mongo.connect_to_database(MONGO_DB_URL, MONGO_DB_NAME)
+        # create_datetime 的 TTL 索引由 sca-api 按日志保留天数创建
+        self.mongo.create_indexes(SCHEDULER_TASK_RECORD, [
+            [("job_id", ASCENDING)],
+            [("job_id", ASCENDING), ("create_datetime", DESCENDING)],
+        ])
+        record_writer.start()
+
+    def sync_task_status(self) -> None:
+        """
+        同步任务表中的冗余字段 is_active 与 last_run_datetime
+
+        is_active 以调度器中是否存在该任务为准；
+        last_run_datetime 只补全还未保存该字段的历史任务，之后由监听器在任务执行完成后更新
+        :return:
+        """
+        job_ids = set(self.scheduler.get_job_names())
+        tasks = self.mongo.db[SCHEDULER_TASK].find({}, {"_id": 1, "last_run_datetime": 1})
+        for task in tasks:
+            task_id = str(task["_id"])
+            data = {"is_active": task_id in job_ids}
+            if "last_run_datetime" not in task:
+                record = self.mongo.db[SCHEDULER_TASK_RECORD].find_one(
+                    {"job_id": task_id},
+                    {"create_datetime": 1},
+                    sort=[("create_datetime", DESCENDING)]
+                )
+                data["last_run_datetime"] = record["create_datetime"] if record else None
+            self.mongo.db[SCHEDULER_TASK].update_one({"_id": task["_id"]}, {"$set": data})
 
     def start_scheduler(self) -> None:
         """
@@ -148,9 +195,11 @@ class ScheduledTask:
         关闭程序
         :return:
         """
-        self.mongo.close_database_connection()
         if self.scheduler:
             self.scheduler.shutdown()
+        # 调度器关闭后写入剩余的调度日志，再关闭数据库连接
+        record_writer.stop()
+        self.mongo.close_database_connection()
         if self.rd:
             self.rd.close_database_connection()
 